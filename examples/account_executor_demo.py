@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+单账户执行器使用示例
+
+在仓库根目录运行: python -m examples.account_executor_demo
+"""
+
+import time
+
+from howtrader.event import EventEngine
+from howtrader.trader.engine import MainEngine
+
+from project.account_executor_refactored import AccountConfig, SingleAccountExecutor
+
+
+if __name__ == "__main__":
+    # 创建引擎
+    event_engine = EventEngine()
+    main_engine = MainEngine(event_engine)
+    
+    # 账户配置
+    account_config = AccountConfig(
+        account_id="TEST_ACCOUNT_001",
+        api_key="your_api_key",
+        api_secret="your_api_secret", 
+        api_passphrase="your_passphrase",
+        gateway_name="OKX",
+        test_mode=True,
+        supported_symbols=["BTC-USDT-SWAP.OKX", "ETH-USDT-SWAP.OKX"]
+    )
+    
+    # 马丁策略配置
+   
+    martin_config={
+    'opp_ratio': 0.0025,
+    'profit_target': 0.0055,
+    'lever': 10,
+    'initial_margin':100000,
+    'adding_number': 25,
+    'amount_multiplie': 1.13,
+    'price_multiple': 1.10,
+    'mode': 1
+     }
+    
+    try:
+        print("🚀 启动买单队列马丁策略测试")
+        
+        # 创建执行器
+        executor = SingleAccountExecutor(account_config, main_engine, event_engine)
+        
+        # 启动执行器
+        executor.start()
+        
+        # 添加BTC做多策略
+        if executor.add_martin_strategy("BTC-USDT-SWAP.OKX", 1, martin_config):
+            print("✅ BTC做多马丁策略添加成功")
+        
+        print("\n🔄 执行器运行中...")
+        print("按 Ctrl+C 停止")
+        
+        # 主循环
+        while True:
+            time.sleep(30)
+        
+    except KeyboardInterrupt:
+        print("\n🛑 收到停止信号...")
+        
+    except Exception as e:
+        print(f"❌ 运行异常: {e}")
+        
+    finally:
+        if 'executor' in locals():
+            executor.stop()
+        print("🏁 执行器已停止")
@@ -106,6 +106,9 @@ symbol_contract_map: Dict[str, ContractData] = {}
 # local order set
 local_orderids: Set[str] = set()
 
+# max orders per batch request.
+BATCH_ORDER_LIMIT: int = 20
+
 
 class OkxGateway(BaseGateway):
     """
@@ -200,6 +203,10 @@ class OkxGateway(BaseGateway):
         """send order through private websocket."""
         return self.ws_private_api.send_order(req)
 
+    def send_orders(self, reqs: List[OrderRequest]) -> List[str]:
+        """send orders in batches through private websocket."""
+        return self.ws_private_api.send_orders(reqs)
+
     def query_order(self, req: OrderQueryRequest) -> None:
         """query order status, you can get the order status in on_order method"""
         self.rest_api.query_order(req)
@@ -208,6 +215,10 @@ class OkxGateway(BaseGateway):
         """cancel order through private websocket."""
         self.ws_private_api.cancel_order(req)
 
+    def cancel_orders(self, reqs: List[CancelRequest]) -> None:
+        """cancel orders in batches through private websocket."""
+        self.ws_private_api.cancel_orders(reqs)
+
     def query_account(self) -> None:
         """query account."""
         pass
@@ -908,11 +919,14 @@ class OkxWebsocketPrivateApi(WebsocketClient):
             "account": self.on_account,
             "positions": self.on_position,
             "order": self.on_send_order,
+            "batch-orders": self.on_batch_send_order,
             "cancel-order": self.on_cancel_order,
+            "batch-cancel-orders": self.on_batch_cancel_order,
             "error": self.on_api_error
         }
 
         self.reqid_order_map: Dict[str, OrderData] = {}
+        self.reqid_batch_map: Dict[str, List[OrderData]] = {}
 
     def connect(
         self,
@@ -1097,6 +1111,35 @@ class OkxWebsocketPrivateApi(WebsocketClient):
 
             self.gateway.write_log(f"send order failed, code: {code}, msg: {msg}")
 
+    def on_batch_send_order(self, packet: dict) -> None:
+        """on batch send order"""
+        data: list = packet.get("data", [])
+        if packet.get("code", None) != "0" and not data:
+            for order in self.reqid_batch_map.get(packet["id"], []):
+                order = copy(order)
+                order.status = Status.REJECTED
+                self.gateway.on_order(order)
+            return None
+
+        for d in data:
+            code: str = d.get("sCode", None)
+            if code == "0":
+                continue
+
+            orderid: str = d.get("clOrdId", "")
+            if not orderid:
+                orderid: str = d.get("ordId", "")
+
+            order: OrderData = copy(self.gateway.get_order(orderid))
+            msg: str = d.get("sMsg", "")
+
+            if order:
+                order.status = Status.REJECTED
+                order.rejected_reason = msg
+                self.gateway.on_order(order)
+
+            self.gateway.write_log(f"send order failed, code: {code}, msg: {msg}")
+
     def on_cancel_order(self, packet: dict) -> None:
         """on cancel order."""
         # print("on cancel the order")
@@ -1115,6 +1158,22 @@ class OkxWebsocketPrivateApi(WebsocketClient):
             msg: str = d["sMsg"]
             self.gateway.write_log(f"cancel order failed, code: {d['sCode']}, msg: {msg}")
 
+    def on_batch_cancel_order(self, packet: dict) -> None:
+        """on batch cancel order."""
+        data: list = packet.get("data", [])
+        if packet["code"] != "0" and not data:
+            code: str = packet.get("code", "")
+            msg: str = packet.get("msg", "")
+            self.gateway.write_log(f"cancel order failed, code: {code}, msg: {msg}")
+            return None
+
+        for d in data:
+            if d.get('sCode', "") == "0":
+                continue
+
+            msg: str = d["sMsg"]
+            self.gateway.write_log(f"cancel order failed, code: {d['sCode']}, msg: {msg}")
+
     def login(self) -> None:
         """login to private websocket channel."""
         now: float = time.time()
@@ -1159,14 +1218,67 @@ class OkxWebsocketPrivateApi(WebsocketClient):
 
     def send_order(self, req: OrderRequest) -> str:
         """send order"""
+        args: dict = self.create_order_args(req)
+        if not args:
+            return ""
+
+        self.reqid += 1
+        okx_req: dict = {
+            "id": str(self.reqid),
+            "op": "order",
+            "args": [args]
+        }
+        self.send_packet(okx_req)
+
+        order: OrderData = req.create_order_data(args["clOrdId"], self.gateway_name)
+        self.reqid_order_map[str(self.reqid)] = order
+        self.gateway.on_order(order)
+        return order.vt_orderid
+
+    def send_orders(self, reqs: List[OrderRequest]) -> List[str]:
+        """send orders, at most BATCH_ORDER_LIMIT orders per request"""
+        vt_orderids: List[str] = []
+        batch_args: List[dict] = []
+        batch_orders: List[OrderData] = []
+
+        for i, req in enumerate(reqs):
+            args: dict = self.create_order_args(req)
+            if args:
+                order: OrderData = req.create_order_data(args["clOrdId"], self.gateway_name)
+                batch_args.append(args)
+                batch_orders.append(order)
+                vt_orderids.append(order.vt_orderid)
+            else:
+                vt_orderids.append("")
+
+            if batch_args and (len(batch_args) == BATCH_ORDER_LIMIT or i == len(reqs) - 1):
+                self.reqid += 1
+                okx_req: dict = {
+                    "id": str(self.reqid),
+                    "op": "batch-orders",
+                    "args": batch_args
+                }
+                self.send_packet(okx_req)
+
+                self.reqid_batch_map[str(self.reqid)] = batch_orders
+                for order in batch_orders:
+                    self.gateway.on_order(order)
+
+                batch_args = []
+                batch_orders = []
+
+        return vt_orderids
+
+    def create_order_args(self, req: OrderRequest) -> dict:
+        """create okx order args from OrderRequest, empty dict if the request is invalid"""
         if req.type not in ORDERTYPE_VT2OKX:
             self.gateway.write_log(f"send order failed，order type: {req.type.value} unsupported")
-            return ""
+            return {}
 
         contract: ContractData = symbol_contract_map.get(req.symbol, None)
         if not contract:
             self.gateway.write_log(f"send order failed, trading symbol not found: {req.symbol}")
-            return ""
+            return {}
 
         self.order_count += 1
         count_str = str(self.order_count).rjust(6, "0")
@@ -1194,21 +1306,31 @@ class OkxWebsocketPrivateApi(WebsocketClient):
         else:
             args["tdMode"] = self.margin_mode  # cross 或 isolated
 
+        return args
+
+    def cancel_order(self, req: CancelRequest) -> None:
+        """cancel order"""
         self.reqid += 1
         okx_req: dict = {
             "id": str(self.reqid),
-            "op": "order",
-            "args": [args]
+            "op": "cancel-order",
+            "args": [self.create_cancel_args(req)]
         }
         self.send_packet(okx_req)
 
-        order: OrderData = req.create_order_data(orderid, self.gateway_name)
-        self.reqid_order_map[str(self.reqid)] = order
-        self.gateway.on_order(order)
-        return order.vt_orderid
+    def cancel_orders(self, reqs: List[CancelRequest]) -> None:
+        """cancel orders, at most BATCH_ORDER_LIMIT orders per request"""
+        for i in range(0, len(reqs), BATCH_ORDER_LIMIT):
+            self.reqid += 1
+            okx_req: dict = {
+                "id": str(self.reqid),
+                "op": "batch-cancel-orders",
+                "args": [self.create_cancel_args(req) for req in reqs[i:i + BATCH_ORDER_LIMIT]]
+            }
+            self.send_packet(okx_req)
 
-    def cancel_order(self, req: CancelRequest) -> None:
-        """cancel order"""
+    def create_cancel_args(self, req: CancelRequest) -> dict:
+        """create okx cancel args from CancelRequest"""
         args: dict = {"instId": req.symbol}
 
         if req.orderid in local_orderids:
@@ -1216,13 +1338,7 @@ class OkxWebsocketPrivateApi(WebsocketClient):
         else:
             args["ordId"] = req.orderid
 
-        self.reqid += 1
-        okx_req: dict = {
-            "id": str(self.reqid),
-            "op": "cancel-order",
-            "args": [args]
-        }
-        self.send_packet(okx_req)
+        return args
 
 
 def generate_signature(msg: str, secret_key: str) -> bytes:
@@ -190,6 +190,16 @@ class MainEngine:
         else:
             return ""
 
+    def send_orders(self, reqs: List[OrderRequest], gateway_name: str) -> List[str]:
+        """
+        Send a batch of new order requests to a specific gateway.
+        """
+        gateway: BaseGateway = self.get_gateway(gateway_name)
+        if gateway:
+            return gateway.send_orders(reqs)
+        else:
+            return ["" for _ in reqs]
+
     def cancel_order(self, req: CancelRequest, gateway_name: str) -> None:
         """
         Send cancel order request to a specific gateway.
@@ -198,6 +208,14 @@ class MainEngine:
         if gateway:
             gateway.cancel_order(req)
 
+    def cancel_orders(self, reqs: List[CancelRequest], gateway_name: str) -> None:
+        """
+        Send a batch of cancel order requests to a specific gateway.
+        """
+        gateway: BaseGateway = self.get_gateway(gateway_name)
+        if gateway:
+            gateway.cancel_orders(reqs)
+
     def query_order(self, req: OrderQueryRequest, gateway_name: str) -> None:
         gateway = self.get_gateway(gateway_name)
         if gateway and hasattr(gateway, 'query_order'):
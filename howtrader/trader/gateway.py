@@ -232,6 +232,27 @@ class BaseGateway(ABC):
         """
         pass
 
+    def send_orders(self, reqs: List[OrderRequest]) -> List[str]:
+        """
+        Send a batch of new orders to server.
+
+        Default implementation sends them one by one,
+        gateways with a batch endpoint should override it.
+
+        :return list of vt_orderid in the same order as reqs, "" for orders failed to send
+        """
+        return [self.send_order(req) for req in reqs]
+
+    def cancel_orders(self, reqs: List[CancelRequest]) -> None:
+        """
+        Cancel a batch of existing orders.
+
+        Default implementation cancels them one by one,
+        gateways with a batch endpoint should override it.
+        """
+        for req in reqs:
+            self.cancel_order(req)
+
     def send_quote(self, req: QuoteRequest) -> str:
         """
         Send a new two-sided quote to server.
@@ -16,15 +16,36 @@
 版本：v1.0
 """
 
+import io
+import os
+import re
+import sys
+import logging
 import time
 import json
+import queue
 import threading
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Pattern, Set, Tuple
 from decimal import Decimal
 from pathlib import Path
-from dataclasses import dataclass
-from enum import Enum
+from dataclasses import asdict, dataclass
+from functools import cached_property
+from enum import IntEnum
+
+import numpy as np
+
+try:
+    import orjson     # 可选依赖: C实现的JSON序列化，未安装时退回标准库json
+except ImportError:
+    orjson = None
+
+try:
+    import ijson      # 可选依赖: 流式JSON解析，只读取需要的顶层字段
+except ImportError:
+    ijson = None
 
 from howtrader.event import Event, EventEngine
 from howtrader.trader.engine import MainEngine
@@ -32,8 +53,8 @@ from howtrader.trader.object import (
     OrderData, TradeData, PositionData, ContractData,
     OrderRequest, CancelRequest, SubscribeRequest
 )
-from howtrader.trader.event import EVENT_ORDER, EVENT_TRADE, EVENT_POSITION
-from howtrader.trader.constant import Direction, Offset, Status, OrderType
+from howtrader.trader.event import EVENT_ORDER, EVENT_TRADE, EVENT_POSITION, EVENT_ACCOUNT, EVENT_TIMER
+from howtrader.trader.constant import Direction, Exchange, Offset, Status, OrderType
 from howtrader.trader.utility import extract_vt_symbol
 
 
@@ -43,26 +64,46 @@ from howtrader.trader.utility import extract_vt_symbol
 EVENT_TREND_SIGNAL = "eTrendSignal"           # 趋势信号事件
 EVENT_ACCOUNT_STATUS = "eAccountStatus"       # 账户状态事件
 EVENT_MARTIN_UPDATE = "eMartinUpdate"         # 马丁策略更新事件
+EVENT_MARTIN_CHECK = "eMartinCheck"           # 马丁策略合并检查事件 (执行器内部使用)
 
 
 # =============================================================================
 # 数据结构定义 - 更新马丁策略键值
 # =============================================================================
 
-class ExecutionMode(Enum):
-    """执行模式枚举"""
-    NORMAL = "normal"                    # 正常执行
-    POSITION_ONLY = "position_only"     # 仅管理现有仓位
-    EMERGENCY_EXIT = "emergency_exit"   # 紧急退出
-    SUSPENDED = "suspended"              # 暂停执行
+class ExecutionMode(IntEnum):
+    """执行模式枚举 (IntEnum, 比较走整数比较, 也可直接作为元组下标)"""
+    NORMAL = 0                           # 正常执行
+    POSITION_ONLY = 1                    # 仅管理现有仓位
+    EMERGENCY_EXIT = 2                   # 紧急退出
+    SUSPENDED = 3                        # 暂停执行
+
 
+class OrderCategory(IntEnum):
+    """订单类别枚举 (IntEnum, 可直接作为元组下标)"""
+    MARTIN = 0                           # 马丁策略订单
+    TREND = 1                            # 趋势策略订单
+    MANUAL = 2                           # 手动订单
+    UNKNOWN = 3                          # 未知订单
 
-class OrderCategory(Enum):
-    """订单类别枚举"""
-    MARTIN = "martin"                    # 马丁策略订单
-    TREND = "trend"                      # 趋势策略订单
-    MANUAL = "manual"                    # 手动订单
-    UNKNOWN = "unknown"                  # 未知订单
+
+# 枚举值 -> 文本名称 (日志、订单reference和持久化仍使用原来的字符串)
+EXECUTION_MODE_NAME: Tuple[str, ...] = ("normal", "position_only", "emergency_exit", "suspended")
+CATEGORY_NAME: Tuple[str, ...] = ("MARTIN", "TREND", "MANUAL", "UNKNOWN")
+
+# 马丁模式 -> 文本 / 策略键后缀 (1=做多, 2=做空)
+MODE_TEXT: Dict[int, str] = {1: "做多", 2: "做空"}
+MODE_SUFFIX: Dict[int, str] = {1: "M1", 2: "M2"}
+
+# 订单状态 -> 日志文本
+STATUS_TEXT: Dict[Status, str] = {
+    Status.SUBMITTING: "提交中",
+    Status.NOTTRADED: "未成交",
+    Status.PARTTRADED: "部分成交",
+    Status.ALLTRADED: "全部成交",
+    Status.CANCELLED: "已撤销",
+    Status.REJECTED: "已拒绝"
+}
 
 
 @dataclass
@@ -77,18 +118,54 @@ class TrendSignal:
     source: str
 
 
+class CoordinationDecision(NamedTuple):
+    """策略协调决策记录"""
+    timestamp: datetime
+    symbol: str
+    trend_direction: int
+    trend_strength: float
+    martin_mode: int
+    old_execution_mode: str
+    new_execution_mode: str
+    reason: str
+
+
 @dataclass
 class MartinState:
     """马丁策略状态"""
     symbol: str
     mode: int                           # 1=做多, 2=做空
-    avg_price: float                    # 平均成本价
+    total_cost: float                   # 持仓总成本 (sum(price * volume))
     position_size: float                # 仓位大小
     add_count: int                      # 加仓次数
     total_margin_used: float            # 已使用保证金
-    active_orders: List[str]            # 活跃订单ID列表
+    active_orders: Dict[str, None]      # 活跃订单ID (dict作有序集合，增删O(1))
     execution_mode: ExecutionMode       # 执行模式
     last_update: datetime
+    
+    __slots__ = (
+        'symbol', 'mode', 'total_cost', 'position_size', 'add_count',
+        'total_margin_used', 'active_orders', 'execution_mode', 'last_update'
+    )
+    
+    @property
+    def avg_price(self) -> float:
+        """平均成本价 (由总成本和仓位实时推导)"""
+        return self.total_cost / self.position_size if self.position_size > 0 else 0.0
+
+
+@dataclass
+class ExecutorStats:
+    """账户执行器统计信息"""
+    total_orders: int
+    total_trades: int
+    start_time: datetime
+    last_activity: datetime
+    
+    __slots__ = ('total_orders', 'total_trades', 'start_time', 'last_activity')
+    
+    # 持久化后可以恢复的累计计数
+    COUNTERS = ('total_orders', 'total_trades')
 
 
 # =============================================================================
@@ -105,16 +182,34 @@ class OrderManager:
     3. 订单ID生成和管理
     """
     
+    PREFIX_REORDER_INTERVAL = 10_000    # 每分类多少个订单重新排列一次前缀表
+    
     def __init__(self, account_id: str):
         self.account_id = account_id
         self.order_sequence = 0
         self.order_mapping: Dict[str, Dict] = {}  # order_id -> order_info
         self.symbol_orders: Dict[str, Set[str]] = {}  # symbol -> order_ids
-        self.category_orders: Dict[OrderCategory, Set[str]] = {}  # category -> order_ids
+        # category -> order_ids, 以OrderCategory整数值为下标
+        self.category_orders: Tuple[Set[str], ...] = tuple(set() for _ in OrderCategory)
+        
+        # 订单分类前缀表 (按命中次数排序，最常见的前缀最先匹配)
+        self._prefix_order: List[Tuple[str, OrderCategory]] = [
+            ('MARTIN_', OrderCategory.MARTIN),
+            ('TREND_', OrderCategory.TREND),
+            ('MANUAL_', OrderCategory.MANUAL),
+        ]
+        self._prefix_hits: Counter = Counter()
+        self._classify_count = 0
         
-        # 初始化类别集合
-        for category in OrderCategory:
-            self.category_orders[category] = set()
+        # 本账户马丁订单reference前缀，命中即可确定归属和分类
+        self.martin_ref_prefix = f"{CATEGORY_NAME[OrderCategory.MARTIN]}_{account_id}_"
+        
+        # reference动作: 生成reference时记录，发单注册时取出，不必再解析字符串
+        self._prefix_actions: Dict[str, str] = {}       # 前缀 -> 动作
+        self._reference_actions: Dict[str, str] = {}    # reference -> 动作 (已生成未发送)
+        
+        # 保护order_mapping的增删，保存时据此取一致快照
+        self._mapping_lock = threading.Lock()
     
     def generate_order_reference(self, symbol: str, category: OrderCategory, action: str) -> str:
         """
@@ -123,14 +218,56 @@ class OrderManager:
         格式: {category}_{account_id}_{symbol}_{action}_{sequence}
         示例: MARTIN_ACC001_BTCUSDT_OPEN_001
         """
-        self.order_sequence += 1
+        return self.next_reference(self.build_reference_prefix(symbol, category, action))
+    
+    def build_reference_prefix(self, symbol: str, category: OrderCategory, action: str) -> str:
+        """
+        生成reference前缀 (不含序号)
         
+        同一交易对、类别和动作的前缀固定不变，调用方可以缓存后配合next_reference使用
+        """
         # 清理symbol中的特殊字符
         clean_symbol = symbol.replace('-', '').replace('.', '').replace('_', '')
+        prefix = f"{CATEGORY_NAME[category]}_{self.account_id}_{clean_symbol}_{action}_"
+        self._prefix_actions[prefix] = action
+        return prefix
+    
+    def next_reference(self, prefix: str, action: Optional[str] = None) -> str:
+        """
+        在前缀后追加新的订单序号
+        
+        action为空时使用build_reference_prefix记录的前缀动作
+        """
+        self.order_sequence += 1
+        reference = f"{prefix}{self.order_sequence:04d}"
         
-        reference = f"{category.value.upper()}_{self.account_id}_{clean_symbol}_{action}_{self.order_sequence:04d}"
+        action = action or self._prefix_actions.get(prefix)
+        if action:
+            self._reference_actions[reference] = action
         return reference
     
+    def pop_reference_action(self, reference: str) -> str:
+        """取出reference对应的动作 (外部生成的reference退回字符串解析)"""
+        action = self._reference_actions.pop(reference, None)
+        if action is None:
+            action = reference.split('_')[-2] if '_' in reference else "UNKNOWN"
+        return action
+    
+    def discard_reference_action(self, reference: str) -> None:
+        """丢弃未发送成功的reference动作 (已取出时不做任何事)"""
+        self._reference_actions.pop(reference, None)
+    
+    def is_martin_reference(self, reference: str) -> bool:
+        """
+        reference是否为本账户的马丁订单
+        
+        账户ID本身可能含下划线，只比较前缀会把ID以本账户ID开头的其他账户 (如ACC001_B) 也算进来；
+        因此要求去掉序号后的完整前缀 (以下划线结尾) 是本账户生成过的前缀
+        """
+        if not reference.startswith(self.martin_ref_prefix):
+            return False
+        return reference[:reference.rfind('_') + 1] in self._prefix_actions
+    
     def register_order(self, order_id: str, symbol: str, category: OrderCategory, 
                       action: str, reference: str) -> None:
         """注册订单信息"""
@@ -144,7 +281,8 @@ class OrderManager:
             'status': 'registered'
         }
         
-        self.order_mapping[order_id] = order_info
+        with self._mapping_lock:
+            self.order_mapping[order_id] = order_info
         
         # 添加到对应集合
         if symbol not in self.symbol_orders:
@@ -152,16 +290,47 @@ class OrderManager:
         self.symbol_orders[symbol].add(order_id)
         self.category_orders[category].add(order_id)
     
+    def register_orders(self, orders: List[Tuple[str, str, OrderCategory, str, str]]) -> None:
+        """
+        批量注册订单信息
+        
+        参数：(order_id, symbol, category, action, reference) 元组列表
+        """
+        now = datetime.now()
+        order_mapping = self.order_mapping
+        symbol_orders = self.symbol_orders
+        category_orders = self.category_orders
+        for order_id, symbol, category, action, reference in orders:
+            order_info = {
+                'order_id': order_id,
+                'symbol': symbol,
+                'category': category,
+                'action': action,
+                'reference': reference,
+                'timestamp': now,
+                'status': 'registered'
+            }
+            with self._mapping_lock:
+                order_mapping[order_id] = order_info
+            symbol_orders.setdefault(symbol, set()).add(order_id)
+            category_orders[category].add(order_id)
+    
     def classify_order(self, order: OrderData) -> OrderCategory:
         """根据订单reference分类订单"""
-        if order.reference.startswith('MARTIN_'):
-            return OrderCategory.MARTIN
-        elif order.reference.startswith('TREND_'):
-            return OrderCategory.TREND
-        elif order.reference.startswith('MANUAL_'):
-            return OrderCategory.MANUAL
-        else:
-            return OrderCategory.UNKNOWN
+        self._classify_count += 1
+        if self._classify_count % self.PREFIX_REORDER_INTERVAL == 0:
+            self._reorder_prefixes()
+        
+        reference = order.reference
+        for prefix, category in self._prefix_order:
+            if reference.startswith(prefix):
+                self._prefix_hits[category] += 1
+                return category
+        return OrderCategory.UNKNOWN
+    
+    def _reorder_prefixes(self) -> None:
+        """按命中次数重新排列前缀表"""
+        self._prefix_order.sort(key=lambda item: self._prefix_hits[item[1]], reverse=True)
     
     def is_my_order(self, order: OrderData) -> bool:
         """判断是否是本账户的订单"""
@@ -180,10 +349,53 @@ class OrderManager:
             category = order_info['category']
             
             # 从各个集合中移除
-            del self.order_mapping[order_id]
+            with self._mapping_lock:
+                self.order_mapping.pop(order_id, None)
             if symbol in self.symbol_orders:
                 self.symbol_orders[symbol].discard(order_id)
             self.category_orders[category].discard(order_id)
+    
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        订单映射快照 (浅拷贝)
+        
+        只在复制时持锁，序列化快照不会阻塞事件线程增删订单
+        """
+        with self._mapping_lock:
+            return dict(self.order_mapping)
+
+
+class CancelRequestPool:
+    """
+    撤单请求对象池
+    
+    只回收同步消费的撤单请求 (网关在cancel_order返回前已读取完字段)，
+    请求会被网关排队或跨线程传递时不要release
+    """
+    
+    # cancel_order同步读取请求字段的网关
+    SYNC_GATEWAYS: Set[str] = {"OKX"}
+    
+    def __init__(self, max_size: int = 64):
+        self._free: Deque[CancelRequest] = deque(maxlen=max_size)
+    
+    def get(self, orderid: str, symbol: str, exchange: Exchange) -> CancelRequest:
+        """取出一个撤单请求，池为空时新建"""
+        try:
+            req = self._free.pop()
+        except IndexError:
+            return CancelRequest(orderid=orderid, symbol=symbol, exchange=exchange)
+        
+        req.orderid = orderid
+        req.symbol = symbol
+        req.exchange = exchange
+        req.vt_symbol = f"{symbol}.{exchange.value}"
+        return req
+    
+    def release(self, req: CancelRequest, gateway_name: str) -> None:
+        """归还撤单请求 (仅限同步网关)"""
+        if gateway_name in self.SYNC_GATEWAYS:
+            self._free.append(req)
 
 
 # =============================================================================
@@ -224,16 +436,25 @@ class MartinManager:
         self.state = MartinState(
             symbol=symbol,
             mode=self.mode,
-            avg_price=0.0,
+            total_cost=0.0,
             position_size=0.0,
             add_count=0,
             total_margin_used=0.0,
-            active_orders=[],
+            active_orders={},
             # 设置马丁策略的执行模式为正常模式（NORMAL）
             execution_mode=ExecutionMode.NORMAL,
             last_update=datetime.now()
         )
         
+        # 订单reference前缀 (交易对固定，只需在创建时生成一次)
+        self._ref_prefix_open = order_manager.build_reference_prefix(symbol, OrderCategory.MARTIN, "OPEN")
+        self._ref_prefix_profit = order_manager.build_reference_prefix(symbol, OrderCategory.MARTIN, "PROFIT")
+        self._ref_prefix_emergency = order_manager.build_reference_prefix(symbol, OrderCategory.MARTIN, "EMERGENCY_EXIT")
+        self._ref_prefix_add = order_manager.build_reference_prefix(symbol, OrderCategory.MARTIN, "ADD")
+        
+        # 交易所代码拆分结果 (构造OrderRequest时直接使用)
+        self._symbol, self._exchange = extract_vt_symbol(symbol)
+        
         # 合约信息
         self.contract: Optional[ContractData] = None
         self.price_tick = Decimal("0.01")
@@ -266,24 +487,18 @@ class MartinManager:
         """设置执行模式"""
         self.state.execution_mode = mode
         self.state.last_update = datetime.now()
-        print(f"[{self.symbol}] 马丁策略执行模式变更为: {mode.value}")
+        print(f"[{self.symbol}] 马丁策略执行模式变更为: {EXECUTION_MODE_NAME[mode]}")
     
-    def on_order_update(self, order: OrderData) -> None:
-        """处理订单更新"""
-        if not self.order_manager.is_my_order(order):
-            return
-        
-        category = self.order_manager.classify_order(order)
+    def on_order_update(self, order: OrderData, category: OrderCategory) -> None:
+        """处理订单更新 (category: 执行器在on_order中已判定的订单类别)"""
         if category != OrderCategory.MARTIN:
             return
         
         # 更新活跃订单列表
         if order.is_active():
-            if order.vt_orderid not in self.state.active_orders:
-                self.state.active_orders.append(order.vt_orderid)
+            self.state.active_orders[order.vt_orderid] = None
         else:
-            if order.vt_orderid in self.state.active_orders:
-                self.state.active_orders.remove(order.vt_orderid)
+            self.state.active_orders.pop(order.vt_orderid, None)
         
         # 处理订单成交
         if order.status == Status.ALLTRADED:
@@ -298,23 +513,24 @@ class MartinManager:
         self.state.last_update = datetime.now()
     
     def on_trade_update(self, trade: TradeData) -> None:
-        """处理成交更新"""
-        if trade.vt_symbol != self.symbol:
-            return
-        
+        """处理成交更新 (由执行器按交易对分发，只会收到本交易对的成交)"""
         if trade.direction == Direction.LONG:
-            # 买入成交，更新平均成本
+            # 买入成交，累加总成本 (平均成本价由total_cost/position_size推导)
+            volume = float(trade.volume)
             if self.state.position_size > 0:
-                total_cost = self.state.avg_price * self.state.position_size + float(trade.price) * float(trade.volume)
-                self.state.position_size += float(trade.volume)
-                self.state.avg_price = total_cost / self.state.position_size
+                self.state.total_cost += float(trade.price) * volume
+                self.state.position_size += volume
             else:
-                self.state.avg_price = float(trade.price)
-                self.state.position_size = float(trade.volume)
+                self.state.total_cost = float(trade.price) * volume
+                self.state.position_size = volume
         
         elif trade.direction == Direction.SHORT:
-            # 卖出成交，减少仓位
-            self.state.position_size -= float(trade.volume)
+            # 卖出成交，减少仓位，总成本按比例缩减以保持平均成本不变
+            old_size = self.state.position_size
+            new_size = old_size - float(trade.volume)
+            if old_size > 0:
+                self.state.total_cost *= max(new_size, 0.0) / old_size
+            self.state.position_size = new_size
             
             if self.state.position_size <= float(self.size_tick):
                 # 基本平完仓，重置马丁状态
@@ -357,11 +573,10 @@ class MartinManager:
         volume = self._round_to_size_tick(volume)
         
         # 生成订单reference
-        action = "OPEN"
-        reference = self.order_manager.generate_order_reference(self.symbol, OrderCategory.MARTIN, action)
+        reference = self.order_manager.next_reference(self._ref_prefix_open)
         
         # 创建订单请求
-        symbol, exchange = extract_vt_symbol(self.symbol)
+        symbol, exchange = self._symbol, self._exchange
         
         if self.mode == 1:  # 做多
             direction = Direction.LONG
@@ -401,18 +616,19 @@ class MartinManager:
     
     def _calculate_profit_order(self, current_price: float) -> Optional[OrderRequest]:
         """计算止盈订单"""
-        if self.state.avg_price <= 0 or self.state.position_size <= 0:
+        # 检查是否已有止盈单
+        if self.state.active_orders:
             return None
         
-        # 检查是否已有止盈单
-        if len(self.state.active_orders) > 0:
+        avg_price = self.state.avg_price
+        if avg_price <= 0:
             return None
         
         # 计算止盈价格
         if self.mode == 1:  # 做多
-            profit_price = self.state.avg_price * (1 + self.profit_target)
+            profit_price = avg_price * (1 + self.profit_target)
         else:  # 做空
-            profit_price = self.state.avg_price * (1 - self.profit_target)
+            profit_price = avg_price * (1 - self.profit_target)
         
         # 只有价格达到止盈条件时才挂单
         if self.mode == 1 and current_price < profit_price:
@@ -428,9 +644,8 @@ class MartinManager:
             return None
         
         # 生成订单
-        action = "PROFIT"
-        reference = self.order_manager.generate_order_reference(self.symbol, OrderCategory.MARTIN, action)
-        symbol, exchange = extract_vt_symbol(self.symbol)
+        reference = self.order_manager.next_reference(self._ref_prefix_profit)
+        symbol, exchange = self._symbol, self._exchange
         
         if self.mode == 1:  # 做多平仓
             direction = Direction.SHORT
@@ -455,19 +670,22 @@ class MartinManager:
     def _calculate_add_position_order(self, current_price: float, trend_signal: Optional[TrendSignal]) -> Optional[OrderRequest]:
         """计算加仓订单"""
         
+        # 所有拒绝条件都放在前面，确定下单后才生成reference和OrderRequest
         # 检查加仓条件
-        if (self.state.add_count >= self.adding_number or 
-            self.state.total_margin_used >= self.max_total_margin):
+        if self.state.add_count >= self.adding_number:
+            return None
+        if self.state.total_margin_used >= self.max_total_margin:
             return None
         
         # 检查价格偏离是否足够
-        if self.state.avg_price <= 0:
+        avg_price = self.state.avg_price
+        if avg_price <= 0:
             return None
         
         if self.mode == 1:  # 做多模式，价格下跌时加仓
-            price_deviation = (self.state.avg_price - current_price) / self.state.avg_price
+            price_deviation = (avg_price - current_price) / avg_price
         else:  # 做空模式，价格上涨时加仓
-            price_deviation = (current_price - self.state.avg_price) / self.state.avg_price
+            price_deviation = (current_price - avg_price) / avg_price
         
         if price_deviation < self.opp_ratio:
             return None
@@ -486,9 +704,8 @@ class MartinManager:
         add_volume = self._round_to_size_tick(add_volume)
         
         # 生成加仓订单
-        action = f"ADD_{self.state.add_count + 1}"
-        reference = self.order_manager.generate_order_reference(self.symbol, OrderCategory.MARTIN, action)
-        symbol, exchange = extract_vt_symbol(self.symbol)
+        reference = self.order_manager.next_reference(f"{self._ref_prefix_add}{self.state.add_count + 1}_", "ADD")
+        symbol, exchange = self._symbol, self._exchange
         
         if self.mode == 1:  # 做多加仓
             direction = Direction.LONG
@@ -530,9 +747,8 @@ class MartinManager:
         if self.state.position_size <= float(self.size_tick):
             return None
         
-        action = "EMERGENCY_EXIT"
-        reference = self.order_manager.generate_order_reference(self.symbol, OrderCategory.MARTIN, action)
-        symbol, exchange = extract_vt_symbol(self.symbol)
+        reference = self.order_manager.next_reference(self._ref_prefix_emergency)
+        symbol, exchange = self._symbol, self._exchange
         
         if self.mode == 1:  # 做多紧急平仓
             direction = Direction.SHORT
@@ -557,7 +773,7 @@ class MartinManager:
     
     def _reset_martin_state(self) -> None:
         """重置马丁策略状态"""
-        self.state.avg_price = 0.0
+        self.state.total_cost = 0.0
         self.state.position_size = 0.0
         self.state.add_count = 0
         self.state.total_margin_used = 0.0
@@ -573,6 +789,87 @@ class MartinManager:
         """获取策略状态"""
         return self.state
 
+# =============================================================================
+# 马丁策略批量评估器
+# =============================================================================
+
+class MartinBatchEvaluator:
+    """
+    马丁策略批量评估器
+    
+    将多个马丁管理器的状态保存为并行的NumPy数组，一次向量化计算
+    所有策略的开仓/止盈/加仓条件，只有命中条件的策略才交给
+    calculate_next_action 逐个构造订单；可只同步、评估部分策略 (按下标)
+    """
+    
+    def __init__(self, martin_managers: List[MartinManager]):
+        self.managers: List[MartinManager] = list(martin_managers)
+        self.index: Dict[Tuple[str, int], int] = {(m.symbol, m.mode): i for i, m in enumerate(self.managers)}
+        
+        # 策略参数 (创建后不变)
+        self.mode_sign = np.array([1.0 if m.mode == 1 else -1.0 for m in self.managers])
+        self.opp_ratio = np.array([m.opp_ratio for m in self.managers], dtype=np.float64)
+        self.profit_target = np.array([m.profit_target for m in self.managers], dtype=np.float64)
+        self.adding_number = np.array([m.adding_number for m in self.managers], dtype=np.int64)
+        self.max_total_margin = np.array([m.max_total_margin for m in self.managers], dtype=np.float64)
+        self.size_tick = np.array([float(m.size_tick) for m in self.managers], dtype=np.float64)
+        
+        # 策略状态 (每次评估前同步)
+        n = len(self.managers)
+        self.avg_price = np.zeros(n)
+        self.position_size = np.zeros(n)
+        self.add_count = np.zeros(n, dtype=np.int64)
+        self.total_margin_used = np.zeros(n)
+        self.suspended = np.zeros(n, dtype=bool)
+        self.emergency = np.zeros(n, dtype=bool)
+    
+    def refresh(self, indices: Optional[Iterable[int]] = None) -> None:
+        """从马丁管理器同步最新状态 (indices: 只同步这些下标)"""
+        managers = self.managers
+        for i in (range(len(managers)) if indices is None else indices):
+            state = managers[i].state
+            self.avg_price[i] = state.avg_price
+            self.position_size[i] = state.position_size
+            self.add_count[i] = state.add_count
+            self.total_margin_used[i] = state.total_margin_used
+            self.suspended[i] = state.execution_mode == ExecutionMode.SUSPENDED
+            self.emergency[i] = state.execution_mode == ExecutionMode.EMERGENCY_EXIT
+    
+    def evaluate(self, current_prices: np.ndarray, indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        向量化评估策略
+        
+        参数:
+        - current_prices: 当前价格，缺失价格用NaN；indices为空时与managers一一对应，否则与indices一一对应
+        - indices: 只评估这些下标的策略
+        
+        返回: 需要进一步计算订单的策略下标
+        """
+        sel = slice(None) if indices is None else indices
+        avg_price = self.avg_price[sel]
+        mode_sign = self.mode_sign[sel]
+        
+        has_position = np.abs(self.position_size[sel]) > self.size_tick[sel]
+        has_cost = has_position & (avg_price > 0)
+        safe_avg = np.where(avg_price > 0, avg_price, 1.0)
+        
+        # 做多: (avg - price) / avg, 做空: (price - avg) / avg
+        deviation = mode_sign * (avg_price - current_prices) / safe_avg
+        needs_add = (
+            has_cost
+            & (deviation >= self.opp_ratio[sel])
+            & (self.add_count[sel] < self.adding_number[sel])
+            & (self.total_margin_used[sel] < self.max_total_margin[sel])
+        )
+        
+        # 做多: price >= 止盈价, 做空: price <= 止盈价
+        profit_price = avg_price * (1 + mode_sign * self.profit_target[sel])
+        needs_profit = has_cost & (mode_sign * (current_prices - profit_price) >= 0)
+        
+        needs_action = (~has_position | needs_add | needs_profit | self.emergency[sel]) & ~self.suspended[sel]
+        hits = np.flatnonzero(needs_action)
+        return hits if indices is None else indices[hits]
+
 '''
 # =============================================================================
 # 策略协调器
@@ -588,8 +885,9 @@ class StrategyCoordinator:
     3. 管理策略优先级
     """
     
-    def __init__(self):
-        self.coordination_history: List[Dict] = []
+    def __init__(self, max_history: int = 10_000):
+        # 环形缓冲区，超出容量自动丢弃最早的记录
+        self.coordination_history: Deque[CoordinationDecision] = deque(maxlen=max_history)
     
     def coordinate_strategies(self, symbol: str, trend_signal: TrendSignal, 
                             martin_manager: MartinManager) -> None:
@@ -609,19 +907,19 @@ class StrategyCoordinator:
             martin_manager.set_execution_mode(new_mode)
             
             # 记录协调决策
-            decision = {
-                'timestamp': datetime.now(),
-                'symbol': symbol,
-                'trend_direction': trend_signal.overall_direction,
-                'trend_strength': trend_signal.overall_strength,
-                'martin_mode': martin_manager.mode,
-                'old_execution_mode': old_mode.value,
-                'new_execution_mode': new_mode.value,
-                'reason': self._get_coordination_reason(trend_signal, martin_manager, new_mode)
-            }
+            decision = CoordinationDecision(
+                timestamp=datetime.now(),
+                symbol=symbol,
+                trend_direction=trend_signal.overall_direction,
+                trend_strength=trend_signal.overall_strength,
+                martin_mode=martin_manager.mode,
+                old_execution_mode=EXECUTION_MODE_NAME[old_mode],
+                new_execution_mode=EXECUTION_MODE_NAME[new_mode],
+                reason=self._get_coordination_reason(trend_signal, martin_manager, new_mode)
+            )
             
             self.coordination_history.append(decision)
-            print(f"[策略协调] {symbol}: {old_mode.value} -> {new_mode.value} | 原因: {decision['reason']}")
+            print(f"[策略协调] {symbol}: {EXECUTION_MODE_NAME[old_mode]} -> {EXECUTION_MODE_NAME[new_mode]} | 原因: {decision.reason}")
     
     def _calculate_execution_mode(self, trend_signal: TrendSignal, martin_manager: MartinManager) -> ExecutionMode:
         """计算执行模式"""
@@ -666,7 +964,7 @@ class StrategyCoordinator:
         
         direction_text = "上涨" if trend_direction > 0 else ("下跌" if trend_direction < 0 else "震荡")
         strength_text = "强" if trend_strength > 0.8 else ("中" if trend_strength > 0.5 else "弱")
-        mode_text = "做多" if martin_mode == 1 else "做空"
+        mode_text = MODE_TEXT[martin_mode]
         
         if new_mode == ExecutionMode.NORMAL:
             return f"趋势{direction_text}({strength_text})，与{mode_text}马丁策略匹配，正常执行"
@@ -682,6 +980,37 @@ class StrategyCoordinator:
 # 马丁策略状态恢复器 - 基于交易所数据的混合恢复方案
 # =============================================================================
 
+# 恢复流程日志 (参数延迟格式化，未启用的级别不会构造字符串)
+logger = logging.getLogger('howtrader.martin_recovery')
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter('[马丁恢复] %(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+class OrderAnalysis(NamedTuple):
+    """马丁订单历史分析结果"""
+    add_count: int                      # 加仓次数 (不含首次开仓)
+    buy_orders: int                     # 买单数量
+    sell_orders: int                    # 卖单数量
+    total_volume: float                 # 已成交开仓/加仓买单总量
+    orders: Tuple[OrderData, ...] = ()  # 匹配到的马丁订单
+
+
+EMPTY_ORDER_ANALYSIS = OrderAnalysis(add_count=0, buy_orders=0, sell_orders=0, total_volume=0.0)
+
+
+class ValidationResult(NamedTuple):
+    """恢复数据验证结果"""
+    has_position: bool
+    has_orders: bool
+    has_order_history: bool
+    position_order_consistent: bool
+    direction_consistent: bool
+    overall_valid: bool
+
+
 @dataclass
 class MartinRecoveryState:
     """马丁策略恢复状态"""
@@ -694,7 +1023,62 @@ class MartinRecoveryState:
     recovery_action: str                # 建议恢复动作
     confidence: float                   # 恢复可信度 0-1
     exchange_verified: bool             # 是否经过交易所验证
-    analysis_details: Dict              # 分析详情
+    # 分析详情
+    exchange_position: Optional[Dict]   # 交易所仓位数据
+    order_analysis: OrderAnalysis       # 订单历史分析结果
+    validation: ValidationResult        # 数据验证结果
+    
+    __slots__ = (
+        'symbol', 'mode', 'total_position', 'avg_cost_price', 'add_count', 'active_orders',
+        'recovery_action', 'confidence', 'exchange_verified', 'exchange_position',
+        'order_analysis', 'validation'
+    )
+
+
+def _build_recovery_action_table() -> Tuple[Tuple[str, float, float], ...]:
+    """
+    预先计算恢复动作表
+    
+    下标: (方向一致 << 3) | (仓位订单一致 << 2) | (有仓位 << 1) | 有活跃订单
+    内容: (恢复动作, 置信度, 交易所查询数据时的置信度)
+    """
+    table = []
+    for bits in range(16):
+        direction_consistent = bool(bits & 0b1000)
+        position_order_consistent = bool(bits & 0b0100)
+        has_position = bool(bits & 0b0010)
+        has_orders = bool(bits & 0b0001)
+        
+        if not direction_consistent:
+            table.append(("INVALID_DIRECTION", 0.1, 0.1))
+            continue
+        
+        if has_position and not has_orders:
+            # 有仓位但没有活跃订单，需要重新挂卖单
+            action, factor = "RESET_SELL", 1.0
+        elif has_position and has_orders:
+            # 有仓位也有订单，继续当前策略
+            action, factor = "CONTINUE", 1.0
+        elif has_orders:
+            # 无仓位但有订单，可能需要取消订单或等待成交
+            action, factor = "CANCEL_ORDERS", 0.8
+        else:
+            # 无仓位无订单，准备新周期
+            action, factor = "NEW_CYCLE", 1.0
+        
+        confidences = []
+        for from_query in (False, True):
+            confidence = 0.5                # 基础置信度
+            if from_query:
+                confidence += 0.3           # 交易所验证数据
+            if position_order_consistent:
+                confidence += 0.2           # 数据一致性
+            confidence = min(1.0, confidence)
+            confidences.append(confidence * factor)
+        
+        table.append((action, confidences[0], confidences[1]))
+    
+    return tuple(table)
 
 
 class MartinStateRecovery:
@@ -708,11 +1092,47 @@ class MartinStateRecovery:
     4. 智能决策恢复动作
     """
     
+    # 恢复动作查找表，见 _build_recovery_action_table
+    _ACTION_TABLE: Tuple[Tuple[str, float, float], ...] = _build_recovery_action_table()
+    
+    # 策略数量达到该值时使用向量化批量验证
+    BATCH_VALIDATE_MIN = 8
+    
+    # 并行恢复的最大线程数
+    MAX_RECOVERY_WORKERS = 16
+    
+    # 订单reference特征位
+    REF_MARTIN = 0b0001                 # 包含MARTIN (不区分大小写)
+    REF_MODE_BITS = {1: 0b0010, 2: 0b0100}   # 包含 M1 / M2
+    REF_ENTRY = 0b1000                  # 开仓/加仓单 (包含 ADD_ 或 OPEN)
+    
+    _MARTIN_REF_PATTERN: Pattern = re.compile(r'MARTIN', re.IGNORECASE)
+    _ENTRY_REF_PATTERN: Pattern = re.compile(r'ADD_|OPEN')
+    
     def __init__(self, main_engine: MainEngine, account_id: str):
         self.main_engine = main_engine
         self.account_id = account_id
         self.gateway_name = "OKX"  # 可以根据需要配置
         
+        # 主引擎接口只探测一次，不存在的接口为None
+        me = self.main_engine
+        self._get_gateway = getattr(me, 'get_gateway', None)
+        self._get_position = getattr(me, 'get_position', None)
+        self._get_all_positions = getattr(me, 'get_all_positions', None)
+        self._get_all_orders = getattr(me, 'get_all_orders', None)
+        self._get_all_active_orders = getattr(me, 'get_all_active_orders', None)
+        
+        # 订单索引 (每次恢复流程开始时重建，之后各交易对/模式共用)
+        self._orders_by_symbol: Optional[Dict[str, List[OrderData]]] = None      # 按datetime升序
+        self._order_ts_by_symbol: Dict[str, np.ndarray] = {}                     # 与上面平行的POSIX时间戳 (升序)
+        self._active_orders_by_symbol: Optional[Dict[str, List[OrderData]]] = None
+        self._ref_flags: Dict[str, int] = {}                                    # vt_orderid -> reference特征位
+        self._analysis_cache: Dict[Tuple[str, int, float], OrderAnalysis] = {}  # 订单历史分析结果缓存
+        
+        # 仓位索引 (每次恢复流程刷新交易所数据后重建)
+        self._position_index: Dict[str, PositionData] = {}
+        self._position_misses: Set[str] = set()     # 已确认无仓位的交易对，多个模式之间复用
+        
     def recover_martin_strategies(self, symbols: List[str], modes: Optional[List[int]] = None, 
                                 lookback_hours: int = 24) -> Dict[str, MartinRecoveryState]:
         """
@@ -725,92 +1145,284 @@ class MartinStateRecovery:
         
         返回: {strategy_key: MartinRecoveryState}
         """
-        print(f"[马丁恢复] 开始恢复马丁策略状态...")
-        print(f"[马丁恢复] 交易对: {symbols}")
-        print(f"[马丁恢复] 回看时间: {lookback_hours}小时")
+        logger.info("开始恢复马丁策略状态...")
+        logger.info("交易对: %s", symbols)
+        logger.info("回看时间: %s小时", lookback_hours)
         
         recovery_results = {}
         
         # 1. 主动查询交易所最新数据
         self._refresh_exchange_data()
         
-        for symbol in symbols:
-            if modes is None:
-                # 尝试恢复所有模式
-                test_modes = [1, 2]  # 做多和做空
-            else:
-                test_modes = modes
-            
-            for mode in test_modes:
+        # 2. 建立仓位和订单索引，所有交易对和模式共用
+        self._build_position_index()
+        self._build_order_index()
+        
+        # 3. 订单历史回看起点，本次恢复只计算一次
+        cutoff_ts = (datetime.now() - timedelta(hours=lookback_hours)).timestamp()
+        
+        # 如果modes为None则尝试恢复所有模式 (做多和做空)
+        test_modes = [1, 2] if modes is None else modes
+        strategies = [(symbol, mode) for symbol in symbols for mode in test_modes]
+        
+        if len(strategies) >= self.BATCH_VALIDATE_MIN:
+            # 策略较多时，先收集全部数据再向量化验证
+            self._recover_strategies_batch(strategies, cutoff_ts, recovery_results)
+        else:
+            results = self._map_strategies(self._recover_single_strategy, strategies, cutoff_ts)
+            for symbol, mode, recovery_state, error in results:
                 strategy_key = f"{symbol}_M{mode}"
                 
-                try:
-                    recovery_state = self._recover_single_strategy(symbol, mode, lookback_hours)
-                    if recovery_state:
-                        recovery_results[strategy_key] = recovery_state
-                        print(f"[马丁恢复] ✅ {strategy_key} 恢复成功")
-                    else:
-                        print(f"[马丁恢复] ⚠️ {strategy_key} 无需恢复或数据不足")
-                        
-                except Exception as e:
-                    print(f"[马丁恢复] ❌ {strategy_key} 恢复失败: {e}")
+                if error is not None:
+                    logger.error("❌ %s 恢复失败: %s", strategy_key, error)
+                else:
+                    self._record_recovery_result(strategy_key, recovery_state, recovery_results)
         
-        print(f"[马丁恢复] 恢复完成，成功恢复 {len(recovery_results)} 个策略")
+        logger.info("恢复完成，成功恢复 %d 个策略", len(recovery_results))
         return recovery_results
     
     def _refresh_exchange_data(self) -> None:
         """刷新交易所数据"""
         try:
-            print("[马丁恢复] 刷新交易所数据...")
+            logger.info("刷新交易所数据...")
+            
+            gw_caps = self._gw_caps
+            if not gw_caps:
+                # 网关可能稍后才添加，下次恢复时重新探测
+                self.__dict__.pop('_gateways', None)
+                self.__dict__.pop('_gw_caps', None)
+                logger.warning("未找到可用网关，跳过交易所数据刷新")
+                return
+            
+            # 收到仓位和账户推送后立即结束等待，最多等待2秒
+            expected = {EVENT_POSITION, EVENT_ACCOUNT}
+            received: Set[str] = set()
+            completion_event = threading.Event()
+            
+            def on_data(event: Event) -> None:
+                received.add(event.type)
+                if expected <= received:
+                    completion_event.set()
+            
+            event_engine = getattr(self.main_engine, 'event_engine', None)
+            if event_engine:
+                for event_type in expected:
+                    event_engine.register(event_type, on_data)
             
-            # 使用更安全的方法查询数据
             try:
-                # 通过主引擎的网关查询
-                for gateway_name in ['OKX', 'BINANCE']:
-                    if hasattr(self.main_engine, 'get_gateway'):
-                        gateway = self.main_engine.get_gateway(gateway_name)
-                        if gateway:
-                            # 查询仓位
-                            if hasattr(gateway, 'query_position'):
-                                gateway.query_position()
-                            # 查询账户
-                            if hasattr(gateway, 'query_account'):
-                                gateway.query_account()
-                            break  # 找到有效网关就退出
-            except Exception:
-                # 如果网关方法失败，跳过
-                pass
-            
-            # 等待数据更新
-            import time
-            time.sleep(2)
-            
-            print("[马丁恢复] 交易所数据刷新完成")
+                # 所有网关同时发起查询
+                with ThreadPoolExecutor(max_workers=len(gw_caps)) as pool:
+                    for _, query_position, query_account in gw_caps:
+                        pool.submit(self._query_gateway, query_position, query_account)
+                
+                if event_engine:
+                    completion_event.wait(timeout=2.0)
+                else:
+                    time.sleep(2)
+            finally:
+                if event_engine:
+                    for event_type in expected:
+                        event_engine.unregister(event_type, on_data)
+            
+            logger.info("交易所数据刷新完成")
             
         except Exception as e:
-            print(f"[马丁恢复] 刷新交易所数据失败: {e}")
+            logger.error("刷新交易所数据失败: %s", e)
+    
+    @cached_property
+    def _gateways(self) -> list:
+        """已添加到主引擎的网关 (只探测一次)"""
+        if not self._get_gateway:
+            return []
+        gateways = []
+        for gateway_name in ('OKX', 'BINANCE'):
+            gateway = self._get_gateway(gateway_name)
+            if gateway:
+                gateways.append(gateway)
+        return gateways
+    
+    @cached_property
+    def _gw_caps(self) -> List[Tuple[object, Optional[Callable[[], None]], Optional[Callable[[], None]]]]:
+        """各网关支持的查询方法: (gateway, query_position, query_account)"""
+        return [
+            (gateway, getattr(gateway, 'query_position', None), getattr(gateway, 'query_account', None))
+            for gateway in self._gateways
+        ]
+    
+    def _query_gateway(self, query_position: Optional[Callable[[], None]],
+                       query_account: Optional[Callable[[], None]]) -> None:
+        """查询单个网关的仓位和账户"""
+        try:
+            # 查询仓位
+            if query_position:
+                query_position()
+            # 查询账户
+            if query_account:
+                query_account()
+        except Exception:
+            # 如果网关方法失败，跳过
+            pass
+    
+    def _build_position_index(self) -> None:
+        """建立 vt_symbol -> 有效仓位 的索引"""
+        self._position_index = {}
+        self._position_misses = set()
+        
+        if self._get_all_positions:
+            for pos in self._get_all_positions() or []:
+                if abs(pos.volume) > 1e-8:
+                    self._position_index.setdefault(pos.vt_symbol, pos)
+    
+    def _build_order_index(self) -> None:
+        """扫描一次全部订单，按交易对建立索引"""
+        self._orders_by_symbol = None
+        self._order_ts_by_symbol = {}
+        self._analysis_cache = {}
+        self._active_orders_by_symbol = None
+        self._ref_flags = {}
+        ref_flags = self._ref_flags
+        
+        if self._get_all_orders:
+            orders_by_symbol: Dict[str, List[OrderData]] = defaultdict(list)
+            for order in self._get_all_orders():
+                if order.datetime is not None:
+                    orders_by_symbol[order.vt_symbol].append(order)
+                    ref_flags[order.vt_orderid] = self._reference_flags(order)
+            
+            self._orders_by_symbol = {}
+            for symbol, orders in orders_by_symbol.items():
+                timestamps = np.fromiter((o.datetime.timestamp() for o in orders), dtype=np.float64, count=len(orders))
+                order_idx = np.argsort(timestamps, kind='stable')
+                self._orders_by_symbol[symbol] = [orders[i] for i in order_idx]
+                self._order_ts_by_symbol[symbol] = timestamps[order_idx]
+        
+        if self._get_all_active_orders:
+            active_by_symbol: Dict[str, List[OrderData]] = defaultdict(list)
+            for order in self._get_all_active_orders():
+                active_by_symbol[order.vt_symbol].append(order)
+                if order.vt_orderid not in ref_flags:
+                    ref_flags[order.vt_orderid] = self._reference_flags(order)
+            self._active_orders_by_symbol = dict(active_by_symbol)
+    
+    def _reference_flags(self, order: OrderData) -> int:
+        """把订单reference归纳为特征位，订单创建后reference不变，每次恢复只计算一次"""
+        reference = getattr(order, 'reference', '') or ''
+        if not reference:
+            return 0
+        
+        flags = 0
+        if self._MARTIN_REF_PATTERN.search(reference):
+            flags |= self.REF_MARTIN
+        for mode, bit in self.REF_MODE_BITS.items():
+            if f"M{mode}" in reference:
+                flags |= bit
+        if self._ENTRY_REF_PATTERN.search(reference):
+            flags |= self.REF_ENTRY
+        return flags
+    
+    def _martin_ref_mask(self, mode: int) -> int:
+        """返回模式对应的特征位掩码 (flags & mask == mask 即为该模式的马丁订单)"""
+        return self.REF_MARTIN | self.REF_MODE_BITS[mode]
+    
+    def _record_recovery_result(self, strategy_key: str, recovery_state: Optional[MartinRecoveryState],
+                                recovery_results: Dict[str, MartinRecoveryState]) -> None:
+        """记录单个策略的恢复结果"""
+        if recovery_state:
+            recovery_results[strategy_key] = recovery_state
+            logger.info("✅ %s 恢复成功", strategy_key)
+        else:
+            logger.info("⚠️ %s 无需恢复或数据不足", strategy_key)
     
-    def _recover_single_strategy(self, symbol: str, mode: int, lookback_hours: int) -> Optional[MartinRecoveryState]:
-        """恢复单个马丁策略"""
-        mode_text = "做多" if mode == 1 else "做空"
-        print(f"[马丁恢复] 分析 {symbol} {mode_text} 策略...")
+    def _map_strategies(self, func: Callable[[str, int, float], Any], strategies: List[Tuple[str, int]],
+                        cutoff_ts: float) -> List[Tuple[str, int, Any, Optional[BaseException]]]:
+        """
+        在线程池中对每个(symbol, mode)调用func
         
-        # 1. 获取交易所仓位数据 (最权威)
-        exchange_position = self._get_exchange_position(symbol)
+        索引在调用前已建立完毕，之后只读，各线程无需加锁
+        返回按strategies顺序排列的 (symbol, mode, 结果, 异常)
+        """
+        if not strategies:
+            return []
         
-        # 2. 分析订单历史
-        order_analysis = self._analyze_martin_orders(symbol, mode, lookback_hours)
+        with ThreadPoolExecutor(max_workers=min(self.MAX_RECOVERY_WORKERS, len(strategies))) as pool:
+            futures = [pool.submit(func, symbol, mode, cutoff_ts) for symbol, mode in strategies]
+        
+        results = []
+        for (symbol, mode), future in zip(strategies, futures):
+            error = future.exception()
+            results.append((symbol, mode, None if error is not None else future.result(), error))
+        return results
+    
+    def _recover_strategies_batch(self, strategies: List[Tuple[str, int]], cutoff_ts: float,
+                                  recovery_results: Dict[str, MartinRecoveryState]) -> None:
+        """批量恢复: 先收集所有策略的数据，再一次性向量化验证"""
+        gathered = []
+        for symbol, mode, data, error in self._map_strategies(self._collect_strategy_data, strategies, cutoff_ts):
+            if error is not None:
+                logger.error("❌ %s_M%s 恢复失败: %s", symbol, mode, error)
+            elif data is None:
+                self._record_recovery_result(f"{symbol}_M{mode}", None, recovery_results)
+            else:
+                gathered.append((symbol, mode, *data))
         
-        # 3. 获取活跃订单
-        active_orders = self._get_active_martin_orders(symbol, mode)
+        validations = self._validate_recovery_batch(gathered)
+        
+        for (symbol, mode, exchange_position, order_analysis, active_orders), validation_result in zip(gathered, validations):
+            strategy_key = f"{symbol}_M{mode}"
+            try:
+                recovery_state = self._build_recovery_state(
+                    symbol, mode, exchange_position, order_analysis, active_orders, validation_result
+                )
+                self._record_recovery_result(strategy_key, recovery_state, recovery_results)
+            except Exception as e:
+                logger.error("❌ %s 恢复失败: %s", strategy_key, e)
+    
+    def _recover_single_strategy(self, symbol: str, mode: int, cutoff_ts: float) -> Optional[MartinRecoveryState]:
+        """恢复单个马丁策略 (cutoff_ts: 订单历史回看起点的POSIX时间戳)"""
+        data = self._collect_strategy_data(symbol, mode, cutoff_ts)
+        if data is None:
+            return None
+        exchange_position, order_analysis, active_orders = data
         
         # 4. 数据验证和一致性检查
         validation_result = self._validate_recovery_data(
             symbol, mode, exchange_position, order_analysis, active_orders
         )
         
+        return self._build_recovery_state(
+            symbol, mode, exchange_position, order_analysis, active_orders, validation_result
+        )
+    
+    def _collect_strategy_data(self, symbol: str, mode: int,
+                               cutoff_ts: float) -> Optional[Tuple[Optional[Dict], OrderAnalysis, List[str]]]:
+        """
+        收集单个策略的恢复数据: (交易所仓位, 订单历史分析, 活跃订单)
+        
+        无仓位且无活跃订单时直接返回None，不再分析订单历史
+        """
+        logger.debug("分析 %s %s 策略...", symbol, MODE_TEXT[mode])
+        
+        # 1. 获取交易所仓位数据 (最权威)
+        exchange_position = self._get_exchange_position(symbol)
+        
+        # 2. 获取活跃订单
+        active_orders = self._get_active_martin_orders(symbol, mode)
+        
+        if exchange_position is None and not active_orders:
+            # 无仓位无订单，不需要恢复
+            return None
+        
+        # 3. 分析订单历史
+        order_analysis = self._analyze_martin_orders(symbol, mode, cutoff_ts)
+        
+        return exchange_position, order_analysis, active_orders
+    
+    def _build_recovery_state(self, symbol: str, mode: int, exchange_position: Optional[Dict],
+                              order_analysis: OrderAnalysis, active_orders: List[str],
+                              validation_result: ValidationResult) -> Optional[MartinRecoveryState]:
+        """根据验证结果决策恢复动作并构建恢复状态"""
         # 5. 决策恢复动作
-        if not validation_result['has_position'] and not validation_result['has_orders']:
+        if not validation_result.has_position and not validation_result.has_orders:
             # 无仓位无订单，不需要恢复
             return None
         
@@ -824,16 +1436,14 @@ class MartinStateRecovery:
             mode=mode,
             total_position=exchange_position['volume'] if exchange_position else 0.0,
             avg_cost_price=exchange_position['avg_price'] if exchange_position else 0.0,
-            add_count=order_analysis['add_count'],
+            add_count=order_analysis.add_count,
             active_orders=active_orders,
             recovery_action=recovery_action,
             confidence=confidence,
             exchange_verified=exchange_position is not None,
-            analysis_details={
-                'exchange_position': exchange_position,
-                'order_analysis': order_analysis,
-                'validation': validation_result
-            }
+            exchange_position=exchange_position,
+            order_analysis=order_analysis,
+            validation=validation_result
         )
         
         self._log_recovery_details(recovery_state)
@@ -842,17 +1452,30 @@ class MartinStateRecovery:
     def _get_exchange_position(self, symbol: str) -> Optional[Dict]:
         """从交易所获取仓位数据"""
         try:
-            # 尝试多种方式获取仓位
-            position_keys = [
-                f"{symbol}.NET",  # 净持仓模式
-                f"{symbol}.{Direction.NET.value}",
-                symbol
-            ]
-            
-            for key in position_keys:
-                # 使用getattr安全调用可能不存在的方法
-                get_position = getattr(self.main_engine, 'get_position', None)
-                if get_position:
+            # 同一交易对的另一个模式已确认无仓位
+            if symbol in self._position_misses:
+                return None
+            
+            # 优先使用本次恢复建立的仓位索引
+            pos = self._position_index.get(symbol)
+            if pos:
+                return {
+                    'volume': float(pos.volume),
+                    'avg_price': float(pos.price) if pos.price > 0 else 0.0,
+                    'pnl': float(getattr(pos, 'pnl', 0.0)),
+                    'source': 'exchange_query'
+                }
+            
+            # 索引中没有时，尝试多种键值从缓存获取仓位
+            get_position = self._get_position
+            if get_position:
+                position_keys = [
+                    f"{symbol}.NET",  # 净持仓模式
+                    f"{symbol}.{Direction.NET.value}",
+                    symbol
+                ]
+                
+                for key in position_keys:
                     position = get_position(key)
                     if position and abs(position.volume) > 1e-8:  # 有效仓位
                         return {
@@ -862,116 +1485,113 @@ class MartinStateRecovery:
                             'source': 'exchange_cache'
                         }
             
-            # 如果缓存中没有，尝试查询所有仓位
-            get_all_positions = getattr(self.main_engine, 'get_all_positions', None)
-            if get_all_positions:
-                all_positions = get_all_positions()
-                for pos in all_positions:
-                    if pos.vt_symbol == symbol and abs(pos.volume) > 1e-8:
-                        return {
-                            'volume': float(pos.volume),
-                            'avg_price': float(pos.price) if pos.price > 0 else 0.0,
-                            'pnl': float(getattr(pos, 'pnl', 0.0)),
-                            'source': 'exchange_query'
-                        }
-            
+            self._position_misses.add(symbol)
             return None
             
         except Exception as e:
-            print(f"[马丁恢复] 获取交易所仓位失败 {symbol}: {e}")
+            logger.error("获取交易所仓位失败 %s: %s", symbol, e)
             return None
     
-    def _analyze_martin_orders(self, symbol: str, mode: int, lookback_hours: int) -> Dict:
+    def _analyze_martin_orders(self, symbol: str, mode: int, cutoff_ts: float) -> OrderAnalysis:
+        """分析马丁策略订单历史 (只统计cutoff_ts之后的订单，同一次恢复内结果缓存)"""
+        cache_key = (symbol, mode, cutoff_ts)
+        analysis = self._analysis_cache.get(cache_key)
+        if analysis is None:
+            analysis = self._analyze_martin_orders_uncached(symbol, mode, cutoff_ts)
+            self._analysis_cache[cache_key] = analysis
+        return analysis
+    
+    def _analyze_martin_orders_uncached(self, symbol: str, mode: int, cutoff_ts: float) -> OrderAnalysis:
         """分析马丁策略订单历史"""
         try:
-            cutoff_time = datetime.now() - timedelta(hours=lookback_hours)
-            mode_suffix = f"M{mode}"
-            
-            # 获取所有订单
-            get_all_orders = getattr(self.main_engine, 'get_all_orders', None)
-            if not get_all_orders:
-                print("[马丁恢复] 警告: 无法获取订单历史")
-                return {'add_count': 0, 'buy_orders': [], 'sell_orders': [], 'total_volume': 0.0}
-            
-            all_orders = get_all_orders()
+            # 使用恢复流程开始时建立的订单索引
+            if self._orders_by_symbol is None:
+                logger.warning("警告: 无法获取订单历史")
+                return EMPTY_ORDER_ANALYSIS
+            
+            orders = self._orders_by_symbol.get(symbol, [])
+            timestamps = self._order_ts_by_symbol.get(symbol)
+            start = int(np.searchsorted(timestamps, cutoff_ts)) if timestamps is not None else 0
+            
+            # 循环内用到的方法和常量提前取出
+            mask = self._martin_ref_mask(mode)
+            entry_bit = self.REF_ENTRY
+            get_flags = self._ref_flags.get
+            direction_long = Direction.LONG
+            direction_short = Direction.SHORT
+            status_alltraded = Status.ALLTRADED
+            
+            # 一次遍历完成筛选和统计 (只遍历回看时间之后的部分)
             martin_orders = []
-            
-            # 筛选马丁策略相关订单
-            for order in all_orders:
-                if (order.vt_symbol == symbol and 
-                    order.datetime >= cutoff_time and
-                    hasattr(order, 'reference') and
-                    mode_suffix in order.reference and
-                    'MARTIN' in order.reference.upper()):
-                    martin_orders.append(order)
-            
-            # 分析订单
-            buy_orders = [o for o in martin_orders if o.direction == Direction.LONG]
-            sell_orders = [o for o in martin_orders if o.direction == Direction.SHORT]
-            
-            # 计算加仓次数 (只计算成交的买单)
+            buy_count = 0
+            sell_count = 0
             add_count = 0
             total_buy_volume = 0.0
             
-            for order in buy_orders:
-                if order.status == Status.ALLTRADED:
-                    # 从reference判断是否为加仓单
-                    if any(action in order.reference for action in ['ADD_', 'OPEN']):
+            for order in orders[start:]:
+                flags = get_flags(order.vt_orderid, 0)
+                if flags & mask != mask:
+                    continue
+                martin_orders.append(order)
+                
+                direction = order.direction
+                if direction == direction_long:
+                    buy_count += 1
+                    # 计算加仓次数 (只计算成交的买单，从reference判断是否为加仓单)
+                    if order.status == status_alltraded and flags & entry_bit:
                         add_count += 1
                         total_buy_volume += float(order.traded)
-            
-            return {
-                'add_count': max(0, add_count - 1),  # 减去首次开仓
-                'buy_orders': len(buy_orders),
-                'sell_orders': len(sell_orders),
-                'total_volume': total_buy_volume,
-                'orders': martin_orders
-            }
+                elif direction == direction_short:
+                    sell_count += 1
+            
+            return OrderAnalysis(
+                add_count=max(0, add_count - 1),  # 减去首次开仓
+                buy_orders=buy_count,
+                sell_orders=sell_count,
+                total_volume=total_buy_volume,
+                orders=tuple(martin_orders)
+            )
             
         except Exception as e:
-            print(f"[马丁恢复] 分析订单历史失败 {symbol} M{mode}: {e}")
-            return {'add_count': 0, 'buy_orders': 0, 'sell_orders': 0, 'total_volume': 0.0}
+            logger.error("分析订单历史失败 %s M%s: %s", symbol, mode, e)
+            return EMPTY_ORDER_ANALYSIS
     
     def _get_active_martin_orders(self, symbol: str, mode: int) -> List[str]:
         """获取活跃的马丁策略订单"""
         try:
-            mode_suffix = f"M{mode}"
             active_orders = []
             
-            # 获取活跃订单
-            get_all_active_orders = getattr(self.main_engine, 'get_all_active_orders', None)
-            if get_all_active_orders:
-                all_active = get_all_active_orders()
+            # 使用恢复流程开始时建立的活跃订单索引
+            if self._active_orders_by_symbol is not None:
+                mask = self._martin_ref_mask(mode)
+                get_flags = self._ref_flags.get
                 
-                for order in all_active:
-                    if (order.vt_symbol == symbol and
-                        hasattr(order, 'reference') and
-                        mode_suffix in order.reference and
-                        'MARTIN' in order.reference.upper()):
+                for order in self._active_orders_by_symbol.get(symbol, []):
+                    if get_flags(order.vt_orderid, 0) & mask == mask:
                         active_orders.append(order.vt_orderid)
             
             return active_orders
             
         except Exception as e:
-            print(f"[马丁恢复] 获取活跃订单失败 {symbol} M{mode}: {e}")
+            logger.error("获取活跃订单失败 %s M%s: %s", symbol, mode, e)
             return []
     
     def _validate_recovery_data(self, symbol: str, mode: int, exchange_position: Optional[Dict], 
-                              order_analysis: Dict, active_orders: List[str]) -> Dict:
+                              order_analysis: OrderAnalysis, active_orders: List[str]) -> ValidationResult:
         """验证恢复数据的一致性"""
-        has_position = exchange_position and abs(exchange_position['volume']) > 1e-8
+        has_position = bool(exchange_position) and abs(exchange_position['volume']) > 1e-8
         has_orders = len(active_orders) > 0
-        has_order_history = order_analysis['total_volume'] > 0
+        has_order_history = order_analysis.total_volume > 0
         
         # 一致性检查
         position_order_consistent = True
         if has_position and has_order_history and exchange_position:
             pos_volume = abs(exchange_position['volume'])
-            order_volume = order_analysis['total_volume']
+            order_volume = order_analysis.total_volume
             # 允许10%的差异（可能有其他订单）
             if abs(pos_volume - order_volume) / max(pos_volume, order_volume) > 0.1:
                 position_order_consistent = False
-                print(f"[马丁恢复] ⚠️ 仓位与订单不一致: 仓位={pos_volume}, 订单={order_volume}")
+                logger.warning("⚠️ 仓位与订单不一致: 仓位=%s, 订单=%s", pos_volume, order_volume)
         
         # 方向一致性检查
         direction_consistent = True
@@ -979,71 +1599,100 @@ class MartinStateRecovery:
             pos_direction = 1 if exchange_position['volume'] > 0 else 2
             if pos_direction != mode:
                 direction_consistent = False
-                print(f"[马丁恢复] ⚠️ 仓位方向与策略模式不符: 仓位方向={pos_direction}, 策略模式={mode}")
-        
-        return {
-            'has_position': has_position,
-            'has_orders': has_orders,
-            'has_order_history': has_order_history,
-            'position_order_consistent': position_order_consistent,
-            'direction_consistent': direction_consistent,
-            'overall_valid': (has_position or has_orders) and direction_consistent
-        }
+                logger.warning("⚠️ 仓位方向与策略模式不符: 仓位方向=%s, 策略模式=%s", pos_direction, mode)
+        
+        return ValidationResult(
+            has_position=has_position,
+            has_orders=has_orders,
+            has_order_history=has_order_history,
+            position_order_consistent=position_order_consistent,
+            direction_consistent=direction_consistent,
+            overall_valid=(has_position or has_orders) and direction_consistent
+        )
     
-    def _determine_recovery_action(self, symbol: str, mode: int, exchange_position: Optional[Dict],
-                                 order_analysis: Dict, active_orders: List[str], 
-                                 validation: Dict) -> Tuple[str, float]:
-        """确定恢复动作和置信度"""
-        
-        has_position = validation['has_position']
-        has_orders = validation['has_orders'] 
-        direction_consistent = validation['direction_consistent']
-        
-        # 计算置信度
-        confidence = 0.5  # 基础置信度
+    def _validate_recovery_batch(self, gathered: List[Tuple[str, int, Optional[Dict], OrderAnalysis, List[str]]]) -> List[ValidationResult]:
+        """
+        向量化验证多个策略的恢复数据
         
-        if exchange_position and exchange_position.get('source') == 'exchange_query':
-            confidence += 0.3  # 交易所验证数据
+        与 _validate_recovery_data 的判断规则相同，所有策略的数值检查一次完成
+        """
+        n = len(gathered)
+        if n == 0:
+            return []
         
-        if validation['position_order_consistent']:
-            confidence += 0.2  # 数据一致性
+        pos_volume = np.fromiter((p['volume'] if p else 0.0 for _, _, p, _, _ in gathered), dtype=np.float64, count=n)
+        order_volume = np.fromiter((a.total_volume for _, _, _, a, _ in gathered), dtype=np.float64, count=n)
+        active_count = np.fromiter((len(active) for _, _, _, _, active in gathered), dtype=np.int64, count=n)
+        mode_arr = np.fromiter((mode for _, mode, _, _, _ in gathered), dtype=np.int64, count=n)
         
-        confidence = min(1.0, confidence)
+        abs_pos = np.abs(pos_volume)
+        has_position = abs_pos > 1e-8
+        has_orders = active_count > 0
+        has_order_history = order_volume > 0
         
-        # 决策恢复动作
-        if not direction_consistent:
-            return "INVALID_DIRECTION", 0.1
+        # 一致性检查，允许10%的差异（可能有其他订单）
+        both = has_position & has_order_history
+        denom = np.where(both, np.maximum(abs_pos, order_volume), 1.0)
+        position_order_consistent = ~both | (np.abs(abs_pos - order_volume) / denom <= 0.1)
         
-        if has_position and not has_orders:
-            # 有仓位但没有活跃订单，需要重新挂卖单
-            return "RESET_SELL", confidence
+        # 方向一致性检查
+        pos_direction = np.where(pos_volume > 0, 1, 2)
+        direction_consistent = ~has_position | (pos_direction == mode_arr)
         
-        elif has_position and has_orders:
-            # 有仓位也有订单，继续当前策略
-            return "CONTINUE", confidence
+        overall_valid = (has_position | has_orders) & direction_consistent
         
-        elif not has_position and has_orders:
-            # 无仓位但有订单，可能需要取消订单或等待成交
-            return "CANCEL_ORDERS", confidence * 0.8
+        results = []
+        for i in range(n):
+            if not position_order_consistent[i]:
+                logger.warning("⚠️ 仓位与订单不一致: 仓位=%s, 订单=%s", abs_pos[i], order_volume[i])
+            if not direction_consistent[i]:
+                logger.warning("⚠️ 仓位方向与策略模式不符: 仓位方向=%s, 策略模式=%s", pos_direction[i], mode_arr[i])
+            
+            results.append(ValidationResult(
+                has_position=bool(has_position[i]),
+                has_orders=bool(has_orders[i]),
+                has_order_history=bool(has_order_history[i]),
+                position_order_consistent=bool(position_order_consistent[i]),
+                direction_consistent=bool(direction_consistent[i]),
+                overall_valid=bool(overall_valid[i])
+            ))
         
-        elif not has_position and not has_orders:
-            # 无仓位无订单，准备新周期
-            return "NEW_CYCLE", confidence
+        return results
+    
+    def _determine_recovery_action(self, symbol: str, mode: int, exchange_position: Optional[Dict],
+                                 order_analysis: OrderAnalysis, active_orders: List[str], 
+                                 validation: ValidationResult) -> Tuple[str, float]:
+        """确定恢复动作和置信度"""
+        bits = (
+            (validation.direction_consistent << 3)
+            | (validation.position_order_consistent << 2)
+            | (validation.has_position << 1)
+            | validation.has_orders
+        )
+        from_query = bool(exchange_position) and exchange_position.get('source') == 'exchange_query'
         
-        else:
-            return "UNKNOWN", 0.1
+        action, confidence, query_confidence = self._ACTION_TABLE[bits]
+        return action, query_confidence if from_query else confidence
     
     def _log_recovery_details(self, state: MartinRecoveryState) -> None:
         """记录恢复详情"""
-        mode_text = "做多" if state.mode == 1 else "做空"
-        print(f"[马丁恢复] === {state.symbol} {mode_text} 恢复详情 ===")
-        print(f"  仓位: {state.total_position:.6f}")
-        print(f"  成本价: {state.avg_cost_price:.6f}")
-        print(f"  加仓次数: {state.add_count}")
-        print(f"  活跃订单: {len(state.active_orders)}")
-        print(f"  恢复动作: {state.recovery_action}")
-        print(f"  置信度: {state.confidence:.2f}")
-        print(f"  交易所验证: {'是' if state.exchange_verified else '否'}")
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
+        logger.info(
+            "=== %s %s 恢复详情 ===\n"
+            "  仓位: %.6f\n"
+            "  成本价: %.6f\n"
+            "  加仓次数: %d\n"
+            "  活跃订单: %d\n"
+            "  恢复动作: %s\n"
+            "  置信度: %.2f\n"
+            "  交易所验证: %s",
+            state.symbol, MODE_TEXT[state.mode],
+            state.total_position, state.avg_cost_price, state.add_count,
+            len(state.active_orders), state.recovery_action, state.confidence,
+            '是' if state.exchange_verified else '否'
+        )
 
 
 # =============================================================================
@@ -1061,6 +1710,10 @@ class PersistenceManager:
     4. 数据完整性验证
     """
     
+    # 旧版文件末尾的校验码行: b"\n#" + blake2b(内容).hexdigest()，读取时去掉
+    LEGACY_CHECKSUM_MARKER = b"\n#"
+    LEGACY_CHECKSUM_LEN = 16
+    
     def __init__(self, account_id: str):
         self.account_id = account_id
         self.data_dir = Path(f"./data/{account_id}")
@@ -1072,95 +1725,394 @@ class PersistenceManager:
         self.order_mapping_file = self.data_dir / "order_mapping.json"
         self.coordination_history_file = self.data_dir / "coordination_history.json"
         
+        # 合并状态文件: 执行器状态/马丁快照/订单映射一次原子写入 (仍可读取旧版分文件)
+        self.account_state_file = self.data_dir / "account_state.json"
+        self._sections: Optional[Dict[str, Any]] = None     # 最近写入的各部分，部分更新时复用
+        self._sections_lock = threading.Lock()
+        
+        # 马丁状态增量日志: 每次变化追加一行，超过阈值后合并进快照 (martin_states.json)
+        self.martin_delta_log = self.data_dir / "martin_states.log"
+        self._martin_log_lock = threading.Lock()
+        self._delta_bytes = self.martin_delta_log.stat().st_size if self.martin_delta_log.exists() else 0
+        self._delta_lines = 0
+        self._compact_requested = False
+        
         # 持久化控制
-        self.last_critical_save = datetime.now()
+        self.last_critical_save = time.monotonic()     # 单调时钟，不受系统时间调整影响
         self.critical_save_interval = 60  # 关键变化最小间隔60秒
         self.dirty_flags = {
             'executor': False,
             'martin': False,
             'orders': False
         }
+        
+        # 后台写入线程: 关键变化只入队，由写入线程按最小间隔合并后统一保存
+        self._savers: Dict[str, Callable[[], None]] = {}     # category -> 保存函数
+        self._save_queue: "queue.Queue[str]" = queue.Queue()
+        self._pending: Set[str] = set()                       # 已入队的类别 (去重)
+        self._pending_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._drain_loop, daemon=True)
+        self._writer.start()
+    
+    def register_saver(self, category: str, saver: Callable[[], None]) -> None:
+        """注册某一类别的保存函数，由后台写入线程调用"""
+        self._savers[category] = saver
+    
+    @staticmethod
+    def _json_default(obj):
+        """标准库json无法序列化的类型"""
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return str(obj)
+    
+    def _dump_json(self, data: dict) -> bytes:
+        """序列化为JSON字节串 (优先使用orjson)"""
+        if orjson is not None:
+            return orjson.dumps(
+                data,
+                default=str,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            )
+        return json.dumps(data, indent=2, ensure_ascii=False, default=self._json_default).encode('utf-8')
+    
+    def _dump_json_line(self, data: dict) -> bytes:
+        """序列化为单行JSON字节串 (不缩进)"""
+        if orjson is not None:
+            return orjson.dumps(data, default=str)
+        return json.dumps(data, ensure_ascii=False, default=self._json_default).encode('utf-8')
+    
+    def _write_json_atomic(self, path: Path, data: dict) -> None:
+        """先写临时文件再重命名 (os.replace为原子操作)，避免写入中途崩溃损坏原文件"""
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        tmp_path.write_bytes(self._dump_json(data))
+        os.replace(tmp_path, path)
+    
+    def _read_json_payload(self, path: Path) -> bytes:
+        """读取文件内容 (空文件视为损坏；旧版文件末尾的校验码行会被去掉)"""
+        payload = path.read_bytes()
+        if not payload.strip():
+            raise ValueError(f"{path.name} 为空文件，可能写入不完整")
+        
+        idx = payload.rfind(self.LEGACY_CHECKSUM_MARKER)
+        if idx >= 0 and len(payload) - idx - len(self.LEGACY_CHECKSUM_MARKER) == self.LEGACY_CHECKSUM_LEN:
+            payload = payload[:idx]
+        return payload
+    
+    def _load_json_key(self, path: Path, key: str, default: Any) -> Any:
+        """读取JSON文件中的单个顶层字段"""
+        return self._load_json_keys(path, {key: default})[key]
+    
+    def _load_json_keys(self, path: Path, defaults: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        读取JSON文件中的多个顶层字段 (defaults: {字段名: 缺失时的默认值})
+        
+        文件只读取一次；安装了ijson时流式解析，只构造这些字段对应的对象，
+        否则整体解析一次后取出各字段
+        """
+        payload = self._read_json_payload(path)
+        
+        if ijson is not None:
+            return {
+                key: next(ijson.items(io.BytesIO(payload), key, use_float=True), default)
+                for key, default in defaults.items()
+            }
+        
+        loads = orjson.loads if orjson is not None else json.loads
+        data = loads(payload)
+        return {key: data.get(key, default) for key, default in defaults.items()}
     
-    def mark_critical_change(self, category: str) -> None:
-        """标记关键变化"""
-        self.dirty_flags[category] = True
+    def mark_critical_change(self, category: str, key: Optional[str] = None,
+                             state: Optional[MartinState] = None) -> None:
+        """
+        标记关键变化 (只入队，不在调用线程中写盘)
         
-        # 如果距离上次关键保存超过间隔，立即保存
-        if (datetime.now() - self.last_critical_save).seconds >= self.critical_save_interval:
+        马丁状态传入key和state时，直接向增量日志追加一行，不再重写整个快照
+        """
+        if category == 'martin' and key is not None and state is not None:
+            self.append_martin_delta(key, state)
+            return
+        
+        self.dirty_flags[category] = True
+        self._enqueue(category)
+    
+    def _enqueue(self, category: str) -> None:
+        """把类别交给后台写入线程 (已在队列中的不重复入队)"""
+        with self._pending_lock:
+            if category in self._pending:
+                return
+            self._pending.add(category)
+        self._save_queue.put_nowait(category)
+    
+    def mark_saved(self) -> None:
+        """全部数据已由调用方保存，清除脏标记"""
+        with self._pending_lock:
+            self.last_critical_save = time.monotonic()
+            for key in self.dirty_flags:
+                self.dirty_flags[key] = False
+    
+    def _drain_loop(self) -> None:
+        """后台写入循环: 等待关键变化，距上次保存满最小间隔后合并写入一次"""
+        while True:
+            self._save_queue.get()
+            
+            # 等到距离上次保存满最小间隔，期间到达的变化一起合并
+            elapsed = time.monotonic() - self.last_critical_save
+            if elapsed < self.critical_save_interval:
+                time.sleep(self.critical_save_interval - elapsed)
+            
+            while True:
+                try:
+                    self._save_queue.get_nowait()
+                except queue.Empty:
+                    break
+            
             self._save_critical_data()
+            
+            if self._compact_requested:
+                self.compact_martin_log()
     
     def _save_critical_data(self) -> None:
         """保存关键数据"""
         try:
-            if self.dirty_flags['martin']:
-                # 这里会在AccountExecutor中调用
-                pass  
-            
-            self.last_critical_save = datetime.now()
-            # 重置脏标记
-            for key in self.dirty_flags:
-                self.dirty_flags[key] = False
+            with self._pending_lock:
+                categories = [key for key, dirty in self.dirty_flags.items() if dirty]
+                self._pending.clear()
+                # 重置脏标记
+                for key in self.dirty_flags:
+                    self.dirty_flags[key] = False
+                self.last_critical_save = time.monotonic()
+            
+            for category in categories:
+                saver = self._savers.get(category)
+                if saver:
+                    saver()
                 
         except Exception as e:
             print(f"[持久化] 保存关键数据失败: {e}")
     
+    # 马丁状态按行保存，每行字段顺序如下 (第一列为strategy_key)
+    MARTIN_STATE_FIELDS: Tuple[str, ...] = (
+        'strategy_key', 'symbol', 'mode', 'avg_price', 'position_size', 'add_count',
+        'total_margin_used', 'active_orders', 'execution_mode', 'last_update'
+    )
+    
+    # 增量日志超过任一阈值时合并进快照
+    MARTIN_LOG_MAX_BYTES = 1024 * 1024
+    MARTIN_LOG_MAX_LINES = 10_000
+    
+    @staticmethod
+    def _martin_state_values(state: MartinState) -> tuple:
+        """马丁状态的行数据 (不含strategy_key，顺序同MARTIN_STATE_FIELDS[1:])"""
+        return (
+            state.symbol,
+            state.mode,
+            state.avg_price,
+            state.position_size,
+            state.add_count,
+            state.total_margin_used,
+            list(state.active_orders),
+            EXECUTION_MODE_NAME[state.execution_mode],
+            state.last_update
+        )
+    
+    def _martin_rows(self, martin_states: Dict[str, MartinState]) -> List[tuple]:
+        """每个策略一行，字段名只在文件中保存一次"""
+        return [
+            (strategy_key, *self._martin_state_values(state))
+            for strategy_key, state in martin_states.items()
+        ]
+    
+    def _write_martin_snapshot(self, rows: List[tuple]) -> None:
+        """写入马丁状态快照，并清空已被快照包含的增量日志 (调用方持有_martin_log_lock)"""
+        self._write_sections(martin_fields=self.MARTIN_STATE_FIELDS, martin_states=rows)
+        self._truncate_martin_log()
+    
+    def _truncate_martin_log(self) -> None:
+        """快照已包含所有状态，清空增量日志"""
+        with open(self.martin_delta_log, 'wb'):
+            pass
+        self._delta_bytes = 0
+        self._delta_lines = 0
+    
     def save_martin_states(self, martin_states: Dict[str, MartinState]) -> None:
-        """保存马丁策略状态"""
+        """保存马丁策略状态 (完整快照)"""
         try:
-            states_data = {}
-            for strategy_key, state in martin_states.items():
-                states_data[strategy_key] = {
-                    'symbol': state.symbol,
-                    'mode': state.mode,
-                    'avg_price': state.avg_price,
-                    'position_size': state.position_size,
-                    'add_count': state.add_count,
-                    'total_margin_used': state.total_margin_used,
-                    'active_orders': state.active_orders,
-                    'execution_mode': state.execution_mode.value,
-                    'last_update': state.last_update.isoformat()
-                }
-            
-            save_data = {
-                'account_id': self.account_id,
-                'timestamp': datetime.now().isoformat(),
-                'martin_states': states_data,
-                'recovery_note': 'Use exchange data for primary recovery'
-            }
-            
-            with open(self.martin_states_file, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, indent=2, ensure_ascii=False)
+            rows = self._martin_rows(martin_states)
+            with self._martin_log_lock:
+                self._write_martin_snapshot(rows)
                 
         except Exception as e:
             print(f"保存马丁策略状态失败: {e}")
     
+    def append_martin_delta(self, strategy_key: str, state: MartinState) -> None:
+        """向增量日志追加单个策略的最新状态 (一次追加写)"""
+        try:
+            entry = {'ts': datetime.now(), 'k': strategy_key, 'v': self._martin_state_values(state)}
+            line = self._dump_json_line(entry) + b"\n"
+            
+            with self._martin_log_lock:
+                fd = os.open(self.martin_delta_log, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+                
+                self._delta_bytes += len(line)
+                self._delta_lines += 1
+                need_compact = (self._delta_bytes >= self.MARTIN_LOG_MAX_BYTES or
+                                self._delta_lines >= self.MARTIN_LOG_MAX_LINES)
+            
+            if need_compact and not self._compact_requested:
+                self._compact_requested = True
+                self._enqueue('compact')
+                
+        except Exception as e:
+            print(f"追加马丁状态日志失败: {e}")
+    
+    def compact_martin_log(self) -> None:
+        """把增量日志合并进快照"""
+        try:
+            with self._martin_log_lock:
+                self._compact_requested = False
+                states = self._read_martin_states()
+                fields = self.MARTIN_STATE_FIELDS[1:]
+                rows = [
+                    (strategy_key, *(state.get(field) for field in fields))
+                    for strategy_key, state in states.items()
+                ]
+                self._write_martin_snapshot(rows)
+                
+        except Exception as e:
+            print(f"[持久化] 合并马丁状态日志失败: {e}")
+    
+    def _read_martin_snapshot(self) -> Dict[str, dict]:
+        """读取马丁状态快照 (不含增量日志)"""
+        result: Dict[str, dict] = {}
+        
+        if self.account_state_file.exists():
+            path, fields_key = self.account_state_file, 'martin_fields'
+        elif self.martin_states_file.exists():
+            path, fields_key = self.martin_states_file, 'fields'
+        else:
+            return result
+        
+        data = self._load_json_keys(path, {'martin_states': {}, fields_key: self.MARTIN_STATE_FIELDS})
+        states = data['martin_states']
+        if isinstance(states, dict):
+            # 旧格式: {strategy_key: {...}}
+            result.update(states)
+        else:
+            # 按行保存的格式
+            fields = data[fields_key]
+            for row in states:
+                state = dict(zip(fields, row))
+                result[state.pop('strategy_key')] = state
+        
+        return result
+    
+    def _read_martin_states(self) -> Dict[str, dict]:
+        """读取快照并重放增量日志"""
+        result = self._read_martin_snapshot()
+        
+        if self.martin_delta_log.exists():
+            loads = orjson.loads if orjson is not None else json.loads
+            fields = self.MARTIN_STATE_FIELDS[1:]
+            with open(self.martin_delta_log, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = loads(line)
+                    except ValueError:
+                        # 崩溃时可能留下不完整的最后一行
+                        continue
+                    result[entry['k']] = dict(zip(fields, entry['v']))
+        
+        return result
+    
     def load_martin_states(self) -> Dict[str, dict]:
         """加载马丁策略状态 (仅作为备份参考)"""
         try:
-            if not self.martin_states_file.exists():
-                return {}
-                
-            with open(self.martin_states_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            states = self._read_martin_states()
+            if states:
                 print("[持久化] 注意: 本地状态仅作为参考，实际恢复将基于交易所数据")
-                return data.get('martin_states', {})
+            return states
                 
         except Exception as e:
             print(f"加载马丁策略状态失败: {e}")
             return {}
     
-    def save_executor_state(self, executor_state: dict) -> None:
-        """保存执行器状态"""
-        try:
-            state_data = {
+    # =========================================================================
+    # 合并状态文件
+    # =========================================================================
+    
+    def _source_file(self, legacy_path: Path) -> Optional[Path]:
+        """优先读取合并状态文件，不存在时退回旧版分文件"""
+        if self.account_state_file.exists():
+            return self.account_state_file
+        if legacy_path.exists():
+            return legacy_path
+        return None
+    
+    def _load_sections(self) -> Dict[str, Any]:
+        """从磁盘读取当前各部分内容，作为部分更新的基础"""
+        fields = self.MARTIN_STATE_FIELDS[1:]
+        return {
+            'executor': self.load_executor_state(),
+            'martin_fields': self.MARTIN_STATE_FIELDS,
+            'martin_states': [
+                (strategy_key, *(state.get(field) for field in fields))
+                for strategy_key, state in self._read_martin_snapshot().items()
+            ],
+            'order_mapping': self.load_order_mapping(),
+        }
+    
+    def _write_sections(self, **sections: Any) -> None:
+        """更新给定部分，其余部分沿用上次内容，整个文件一次原子写入"""
+        with self._sections_lock:
+            if self._sections is None:
+                self._sections = self._load_sections()
+            self._sections.update(sections)
+            
+            save_data = {
                 'account_id': self.account_id,
-                'timestamp': datetime.now().isoformat(),
-                'version': '2.0',  # 新版本标记
-                'state': executor_state
+                'timestamp': datetime.now(),
+                'version': '3.0',
+                **self._sections
             }
+            self._write_json_atomic(self.account_state_file, save_data)
+    
+    def save_all(self, executor_state: Optional[dict] = None,
+                 martin_states: Optional[Dict[str, MartinState]] = None,
+                 order_mapping: Optional[dict] = None) -> None:
+        """
+        一次写入执行器状态、马丁快照和订单映射
+        
+        传None的部分保持不变；写入马丁快照时同时清空增量日志
+        """
+        try:
+            sections: Dict[str, Any] = {}
+            if executor_state is not None:
+                sections['executor'] = executor_state
+            if order_mapping is not None:
+                sections['order_mapping'] = order_mapping
+            
+            if martin_states is None:
+                if sections:
+                    self._write_sections(**sections)
+                return
             
-            with open(self.state_file, 'w', encoding='utf-8') as f:
-                json.dump(state_data, f, indent=2, ensure_ascii=False, default=str)
+            sections['martin_fields'] = self.MARTIN_STATE_FIELDS
+            sections['martin_states'] = self._martin_rows(martin_states)
+            with self._martin_log_lock:
+                self._write_sections(**sections)
+                self._truncate_martin_log()
+                
+        except Exception as e:
+            print(f"保存账户状态失败: {e}")
+    
+    def save_executor_state(self, executor_state: dict) -> None:
+        """保存执行器状态"""
+        try:
+            self._write_sections(executor=executor_state)
                 
         except Exception as e:
             print(f"保存执行器状态失败: {e}")
@@ -1168,12 +2120,11 @@ class PersistenceManager:
     def load_executor_state(self) -> Optional[dict]:
         """加载执行器状态"""
         try:
-            if not self.state_file.exists():
-                return None
-                
-            with open(self.state_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('state')
+            if self.account_state_file.exists():
+                return self._load_json_key(self.account_state_file, 'executor', None)
+            if self.state_file.exists():
+                return self._load_json_key(self.state_file, 'state', None)
+            return None
                 
         except Exception as e:
             print(f"加载执行器状态失败: {e}")
@@ -1182,14 +2133,7 @@ class PersistenceManager:
     def save_order_mapping(self, order_mapping: dict) -> None:
         """保存订单映射关系"""
         try:
-            save_data = {
-                'account_id': self.account_id,
-                'timestamp': datetime.now().isoformat(),
-                'order_mapping': order_mapping
-            }
-            
-            with open(self.order_mapping_file, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, indent=2, ensure_ascii=False, default=str)
+            self._write_sections(order_mapping=order_mapping)
                 
         except Exception as e:
             print(f"保存订单映射失败: {e}")
@@ -1197,16 +2141,31 @@ class PersistenceManager:
     def load_order_mapping(self) -> dict:
         """加载订单映射关系"""
         try:
-            if not self.order_mapping_file.exists():
+            path = self._source_file(self.order_mapping_file)
+            if path is None:
                 return {}
                 
-            with open(self.order_mapping_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('order_mapping', {})
+            return self._load_json_key(path, 'order_mapping', {})
                 
         except Exception as e:
             print(f"加载订单映射失败: {e}")
             return {}
+    
+    def iter_order_mapping(self) -> Iterator[Tuple[str, dict]]:
+        """逐个读取订单映射 (order_id, order_info)，不必一次加载整个映射"""
+        try:
+            path = self._source_file(self.order_mapping_file)
+            if path is None:
+                return
+            
+            if ijson is not None:
+                payload = self._read_json_payload(path)
+                yield from ijson.kvitems(io.BytesIO(payload), 'order_mapping', use_float=True)
+            else:
+                yield from self.load_order_mapping().items()
+                
+        except Exception as e:
+            print(f"读取订单映射失败: {e}")
 
 
 # =============================================================================
@@ -1245,10 +2204,37 @@ class AccountExecutor:
         self.main_engine = main_engine
         self.event_engine = event_engine
         
+        # 按账户区分的日志，%-风格参数只在对应级别启用时才格式化
+        self._prefix = f"[{account_id}]"
+        self.log = logging.getLogger(f"howtrader.executor.{account_id}")
+        if not self.log.handlers:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter(f"{self._prefix} %(message)s"))
+            self.log.addHandler(handler)
+            self.log.setLevel(logging.INFO)
+            self.log.propagate = False
+        
+        # 引擎查询方法只绑定一次，避免每次调用都getattr
+        self._get_contract = getattr(main_engine, 'get_contract', None) or (lambda vt_symbol: None)
+        self._get_tick = getattr(main_engine, 'get_tick', None) or (lambda vt_symbol: None)
+        self._get_order = getattr(main_engine, 'get_order', None)
+        self._send_orders = getattr(main_engine, 'send_orders', None)
+        self._cancel_orders = getattr(main_engine, 'cancel_orders', None)
+        
+        # 合约缓存 {vt_symbol: ContractData}，会话期间合约不变
+        self._contract_cache: Dict[str, ContractData] = {}
+        
+        # 撤单请求对象池
+        self.cancel_request_pool = CancelRequestPool()
+        
         # 组件初始化
         self.order_manager = OrderManager(account_id)
+        self._is_martin_reference = self.order_manager.is_martin_reference    # 本账户马丁订单reference判断
         #self.strategy_coordinator = StrategyCoordinator()   未来策略优化后可能启动
         self.persistence_manager = PersistenceManager(account_id)
+        self.persistence_manager.register_saver('executor', self._save_executor_state)
+        self.persistence_manager.register_saver('martin', self._save_martin_states)
+        self.persistence_manager.register_saver('orders', self._save_order_mapping)
         
         # 马丁策略恢复器
         self.martin_recovery = MartinStateRecovery(main_engine, account_id)
@@ -1258,6 +2244,34 @@ class AccountExecutor:
         # M1=做多马丁, M2=做空马丁
         self.martin_managers: Dict[str, MartinManager] = {}
         
+        # 管理器快照，只在添加/移除策略时(持锁)重建，定时器等读取方直接遍历元组
+        self._managers_lock = threading.Lock()
+        self._managers_snapshot: Tuple[Tuple[str, MartinManager], ...] = ()
+        
+        # 增量保存：只保存变化过的策略/订单映射/统计
+        self._dirty_lock = threading.Lock()
+        self._dirty_managers: Set[str] = set()
+        self._dirty_orders = False
+        self._martin_full_save = False          # 移除策略后需要重写完整快照
+        self._saved_counters: Optional[tuple] = None
+        
+        # 待检查的策略 {(symbol, mode): None}，同一批事件内只检查一次
+        self._pending_checks: Dict[Tuple[str, int], None] = {}
+        self._pending_checks_lock = threading.Lock()
+        
+        # 策略键值缓存 {(symbol, mode): strategy_key}
+        self._strategy_key_cache: Dict[Tuple[str, int], str] = {}
+        
+        # 交易对 -> 马丁管理器列表 (一个交易对最多做多/做空两个)
+        self.managers_by_symbol: Dict[str, List[MartinManager]] = defaultdict(list)
+        
+        # 按交易对分发的回调 {vt_symbol: [handler, ...]}，事件只投递给对应交易对的马丁管理器
+        self._trade_handlers: Dict[str, List[Callable[[TradeData], None]]] = {}
+        self._order_handlers: Dict[str, List[Callable[[OrderData, OrderCategory], None]]] = {}
+        
+        # 批量评估器，策略集合变化时重建
+        self._batch_evaluator: Optional[MartinBatchEvaluator] = None
+        
         # 趋势信号缓存 {symbol: TrendSignal} - 暂时注释
         # self.trend_signals: Dict[str, TrendSignal] = {}
         
@@ -1266,17 +2280,18 @@ class AccountExecutor:
         self.supported_symbols: Set[str] = set()  # 支持的交易对
         self.last_heartbeat = datetime.now()
         
-        # 定时器
-        self.timer_thread: Optional[threading.Thread] = None
+        # 定时任务 (由事件引擎的EVENT_TIMER驱动，每秒一次)
         self.timer_interval = 30  # 30秒定时任务
+        self._timer_ticks = 0
+        self._save_requested = False  # 立即保存请求，下一个EVENT_TIMER执行
         
         # 统计信息
-        self.stats = {
-            'total_orders': 0,
-            'total_trades': 0,
-            'start_time': datetime.now(),
-            'last_activity': datetime.now()
-        }
+        self.stats = ExecutorStats(
+            total_orders=0,
+            total_trades=0,
+            start_time=self.last_heartbeat,
+            last_activity=self.last_heartbeat
+        )
         
         print(f"账户执行器 {account_id} 初始化完成")
     
@@ -1291,21 +2306,24 @@ class AccountExecutor:
         4. 智能决策恢复动作
         """
         try:
-            print(f"[{self.account_id}] 开始智能状态恢复...")
+            self.log.info("开始智能状态恢复...")
             
             # 1. 恢复执行器基础状态
             executor_state = self.persistence_manager.load_executor_state()
             if executor_state:
                 self.supported_symbols = set(executor_state.get('supported_symbols', []))
                 if 'stats' in executor_state:
-                    self.stats.update(executor_state['stats'])
-                print(f"[{self.account_id}] 执行器基础状态已恢复")
+                    # 只恢复累计计数，start_time保持本次启动时间
+                    for key, value in executor_state['stats'].items():
+                        if key in ExecutorStats.COUNTERS:
+                            setattr(self.stats, key, value)
+                self.log.info("执行器基础状态已恢复")
             
             # 2. 恢复订单映射关系
             order_mapping = self.persistence_manager.load_order_mapping()
             if order_mapping:
                 self.order_manager.order_mapping = order_mapping
-                print(f"[{self.account_id}] 订单映射已恢复: {len(order_mapping)}个订单")
+                self.log.info("订单映射已恢复: %s个订单", len(order_mapping))
             
             # 3. 智能恢复马丁策略状态
             if self.supported_symbols:
@@ -1319,106 +2337,117 @@ class AccountExecutor:
                 # 4. 应用恢复结果
                 self._apply_recovery_results(recovery_results)
             
-            print(f"[{self.account_id}] 智能状态恢复完成")
+            self.log.info("智能状态恢复完成")
             
         except Exception as e:
-            print(f"[{self.account_id}] 状态恢复失败: {e}")
-            print(f"[{self.account_id}] 将以全新状态启动")
+            self.log.error("状态恢复失败: %s", e)
+            self.log.info("将以全新状态启动")
     
     def _apply_recovery_results(self, recovery_results: Dict[str, MartinRecoveryState]) -> None:
-        """应用恢复结果到马丁管理器"""
+        """
+        应用恢复结果到马丁管理器
+        
+        先逐个更新策略状态，需要的挂单/撤单收集起来，最后各用一次批量调用发给网关；
+        恢复日志合并成一条输出
+        """
+        now = datetime.now()
+        sell_orders: List[Tuple[MartinManager, OrderRequest]] = []
+        cancel_ids: List[str] = []
+        lines: List[str] = []
+        
         for strategy_key, recovery_state in recovery_results.items():
-            
             # 检查是否已有对应的马丁管理器
-            if strategy_key in self.martin_managers:
-                martin_manager = self.martin_managers[strategy_key]
-                
-                # 更新马丁状态
-                martin_manager.state.avg_price = recovery_state.avg_cost_price
-                martin_manager.state.position_size = recovery_state.total_position
-                martin_manager.state.add_count = recovery_state.add_count
-                martin_manager.state.active_orders = recovery_state.active_orders.copy()
-                martin_manager.state.last_update = datetime.now()
-                
-                # 根据恢复动作设置执行模式
-                if recovery_state.recovery_action == "RESET_SELL":
-                    martin_manager.state.execution_mode = ExecutionMode.NORMAL
-                    # 需要重新挂卖单
-                    self._place_recovery_sell_order(martin_manager, recovery_state)
-                    
-                elif recovery_state.recovery_action == "CONTINUE":
-                    martin_manager.state.execution_mode = ExecutionMode.NORMAL
-                    
-                elif recovery_state.recovery_action == "CANCEL_ORDERS":
-                    martin_manager.state.execution_mode = ExecutionMode.POSITION_ONLY
-                    # 取消无用订单
-                    self._cancel_recovery_orders(martin_manager, recovery_state)
-                    
-                elif recovery_state.recovery_action == "NEW_CYCLE":
-                    martin_manager.state.execution_mode = ExecutionMode.NORMAL
-                    # 重置状态准备新周期
-                    martin_manager._reset_martin_state()
-                
-                mode_text = "做多" if recovery_state.mode == 1 else "做空"
-                print(f"[{self.account_id}] ✅ {recovery_state.symbol} {mode_text} 策略已恢复")
-                print(f"  仓位: {recovery_state.total_position:.6f}")
-                print(f"  成本: {recovery_state.avg_cost_price:.6f}")
-                print(f"  加仓次数: {recovery_state.add_count}")
-                print(f"  恢复动作: {recovery_state.recovery_action}")
-                print(f"  置信度: {recovery_state.confidence:.2f}")
-            else:
-                print(f"[{self.account_id}] ⚠️ 未找到对应的马丁管理器: {strategy_key}")
-    
-    def _place_recovery_sell_order(self, martin_manager: MartinManager, recovery_state: MartinRecoveryState) -> None:
-        """放置恢复卖单"""
-        try:
-            if recovery_state.total_position <= 0:
-                return
-            
-            # 获取当前价格
-            tick = getattr(self.main_engine, 'get_tick', lambda x: None)(martin_manager.symbol)
-            if not tick or not tick.last_price:
-                print(f"[{self.account_id}] 无法获取 {martin_manager.symbol} 当前价格，暂缓挂卖单")
-                return
+            martin_manager = self.martin_managers.get(strategy_key)
+            if martin_manager is None:
+                self.log.warning("⚠️ 未找到对应的马丁管理器: %s", strategy_key)
+                continue
             
-            current_price = float(tick.last_price)
+            try:
+                self._apply_one_recovery(martin_manager, recovery_state, now, sell_orders, cancel_ids)
+            except Exception as e:
+                self.log.error("应用恢复结果失败 %s: %s", strategy_key, e)
+                continue
+            self._mark_dirty(strategy_key)
+            
+            lines.append(
+                f"✅ {recovery_state.symbol} {MODE_TEXT[recovery_state.mode]} 策略已恢复\n"
+                f"  仓位: {recovery_state.total_position:.6f}\n"
+                f"  成本: {recovery_state.avg_cost_price:.6f}\n"
+                f"  加仓次数: {recovery_state.add_count}\n"
+                f"  恢复动作: {recovery_state.recovery_action}\n"
+                f"  置信度: {recovery_state.confidence:.2f}"
+            )
+        
+        if lines:
+            self.log.info("\n".join(lines))
+        
+        # 取消无用订单
+        if cancel_ids:
+            try:
+                cancelled = self._cancel_active_orders(cancel_ids)
+                if cancelled:
+                    self.log.info("已取消无用订单: %s", ", ".join(cancelled))
+            except Exception as e:
+                self.log.error("取消恢复订单过程失败: %s", e)
+        
+        # 恢复卖单
+        if sell_orders:
+            try:
+                vt_orderids = self._send_order_batch([order_req for _, order_req in sell_orders])
+                for (martin_manager, _), vt_orderid in zip(sell_orders, vt_orderids):
+                    if vt_orderid:
+                        martin_manager.state.active_orders[vt_orderid] = None
+                        self.log.info("恢复卖单已挂出: %s", vt_orderid)
+            except Exception as e:
+                self.log.error("放置恢复卖单失败: %s", e)
+    
+    def _apply_one_recovery(self, martin_manager: MartinManager, recovery_state: MartinRecoveryState,
+                            now: datetime, sell_orders: List[Tuple[MartinManager, OrderRequest]],
+                            cancel_ids: List[str]) -> None:
+        """更新单个策略的状态，需要发给网关的挂单/撤单追加到sell_orders/cancel_ids"""
+        state = martin_manager.state
+        state.position_size = recovery_state.total_position
+        state.total_cost = recovery_state.avg_cost_price * recovery_state.total_position
+        state.add_count = recovery_state.add_count
+        state.active_orders = dict.fromkeys(recovery_state.active_orders)
+        state.last_update = now
+        
+        # 根据恢复动作设置执行模式
+        action = recovery_state.recovery_action
+        if action == "RESET_SELL":
+            state.execution_mode = ExecutionMode.NORMAL
+            # 需要重新挂卖单
+            order_req = self._build_recovery_sell_order(martin_manager, recovery_state)
+            if order_req:
+                sell_orders.append((martin_manager, order_req))
             
-            # 计算止盈价格
-            if martin_manager.mode == 1:  # 做多
-                profit_price = recovery_state.avg_cost_price * (1 + martin_manager.profit_target)
-            else:  # 做空
-                profit_price = recovery_state.avg_cost_price * (1 - martin_manager.profit_target)
+        elif action == "CONTINUE":
+            state.execution_mode = ExecutionMode.NORMAL
             
-            # 创建止盈订单
-            order_req = martin_manager._calculate_profit_order(current_price)
-            if order_req:
-                vt_orderid = self._send_order(order_req, martin_manager.symbol)
-                if vt_orderid:
-                    martin_manager.state.active_orders.append(vt_orderid)
-                    print(f"[{self.account_id}] 恢复卖单已挂出: {vt_orderid}")
+        elif action == "CANCEL_ORDERS":
+            state.execution_mode = ExecutionMode.POSITION_ONLY
+            # 取消无用订单
+            cancel_ids.extend(recovery_state.active_orders)
             
-        except Exception as e:
-            print(f"[{self.account_id}] 放置恢复卖单失败: {e}")
+        elif action == "NEW_CYCLE":
+            state.execution_mode = ExecutionMode.NORMAL
+            # 重置状态准备新周期
+            martin_manager._reset_martin_state()
     
-    def _cancel_recovery_orders(self, martin_manager: MartinManager, recovery_state: MartinRecoveryState) -> None:
-        """取消恢复过程中的无用订单"""
-        try:
-            for order_id in recovery_state.active_orders:
-                try:
-                    # 使用getattr安全调用
-                    get_order = getattr(self.main_engine, 'get_order', None)
-                    if get_order:
-                        order = get_order(order_id)
-                        if order and order.is_active():
-                            cancel_req = order.create_cancel_request()
-                            gateway_name = getattr(order, 'gateway_name', 'OKX')
-                            self.main_engine.cancel_order(cancel_req, gateway_name)
-                            print(f"[{self.account_id}] 已取消无用订单: {order_id}")
-                except Exception as e:
-                    print(f"[{self.account_id}] 取消订单失败 {order_id}: {e}")
-                    
-        except Exception as e:
-            print(f"[{self.account_id}] 取消恢复订单过程失败: {e}")
+    def _build_recovery_sell_order(self, martin_manager: MartinManager,
+                                   recovery_state: MartinRecoveryState) -> Optional[OrderRequest]:
+        """生成恢复卖单 (止盈单)"""
+        if recovery_state.total_position <= 0:
+            return None
+        
+        # 获取当前价格
+        tick = self._get_tick(martin_manager.symbol)
+        if not tick or not tick.last_price:
+            self.log.warning("无法获取 %s 当前价格，暂缓挂卖单", martin_manager.symbol)
+            return None
+        
+        # 创建止盈订单
+        return martin_manager._calculate_profit_order(float(tick.last_price))
     
     def start(self) -> None:
         """启动账户执行器"""
@@ -1434,9 +2463,7 @@ class AccountExecutor:
         # 智能恢复状态
         self._recover_state()
         
-        # 启动定时器
-        self._start_timer()
-        
+        self._timer_ticks = 0
         self.active = True
         self.last_heartbeat = datetime.now()
         
@@ -1449,15 +2476,12 @@ class AccountExecutor:
         
         print(f"停止账户执行器 {self.account_id}")
         
-        # 保存状态
-        self._save_state()
-        
-        # 停止定时器
-        self._stop_timer()
-        
-        # 注销事件监听
+        # 注销事件监听 (同时停止定时任务)
         self._unregister_events()
         
+        # 保存状态
+        self._save_state(force=True)
+        
         self.active = False
         
         print(f"账户执行器 {self.account_id} 已停止")
@@ -1475,12 +2499,11 @@ class AccountExecutor:
         """
         # 创建唯一的策略键值：symbol + mode
         # M1=做多马丁, M2=做空马丁
-        mode_suffix = "M1" if mode == 1 else "M2"
-        strategy_key = f"{symbol}_{mode_suffix}"
+        strategy_key = self._strategy_key(symbol, mode)
         
         if strategy_key in self.martin_managers:
-            mode_text = "做多" if mode == 1 else "做空"
-            print(f"交易对 {symbol} 的 {mode_text} 马丁策略已存在")
+            mode_text = MODE_TEXT[mode]
+            self.log.warning("交易对 %s 的 %s 马丁策略已存在", symbol, mode_text)
             return False
         
         try:
@@ -1494,155 +2517,303 @@ class AccountExecutor:
                 main_engine=self.main_engine
             )
             
-            self.martin_managers[strategy_key] = martin_manager
-            self.supported_symbols.add(symbol)
-            
-            mode_text = "做多" if mode == 1 else "做空"
-            print(f"成功添加马丁策略: {symbol} {mode_text} 模式")
+            with self._managers_lock:
+                self.martin_managers[strategy_key] = martin_manager
+                self.managers_by_symbol[symbol].append(martin_manager)
+                self.supported_symbols.add(symbol)
+                self.register_trade_handler(symbol, martin_manager.on_trade_update)
+                self.register_order_handler(symbol, martin_manager.on_order_update)
+                self._managers_snapshot = tuple(self.martin_managers.items())
+                self._batch_evaluator = None
+            self._mark_dirty(strategy_key)
+            
+            mode_text = MODE_TEXT[mode]
+            self.log.info("成功添加马丁策略: %s %s 模式", symbol, mode_text)
             return True
             
         except Exception as e:
-            mode_text = "做多" if mode == 1 else "做空"
-            print(f"添加马丁策略失败 {symbol} {mode_text}: {e}")
+            mode_text = MODE_TEXT[mode]
+            self.log.error("添加马丁策略失败 %s %s: %s", symbol, mode_text, e)
             return False
     
+    def _strategy_key(self, symbol: str, mode: int) -> str:
+        """获取策略键值 (symbol_M1 / symbol_M2)，按(symbol, mode)缓存"""
+        strategy_key = self._strategy_key_cache.get((symbol, mode))
+        if strategy_key is None:
+            strategy_key = f"{symbol}_{MODE_SUFFIX[mode]}"
+            self._strategy_key_cache[(symbol, mode)] = strategy_key
+        return strategy_key
+    
     def remove_martin_strategy(self, symbol: str, mode: int) -> bool:
         """移除指定模式的马丁策略 - 使用安全方法"""
-        mode_suffix = "M1" if mode == 1 else "M2"
-        strategy_key = f"{symbol}_{mode_suffix}"
+        strategy_key = self._strategy_key(symbol, mode)
         
-        mode_text = "做多" if mode == 1 else "做空"
+        mode_text = MODE_TEXT[mode]
         if strategy_key not in self.martin_managers:
-            print(f"交易对 {symbol} 的 {mode_text} 马丁策略不存在")
+            self.log.warning("交易对 %s 的 %s 马丁策略不存在", symbol, mode_text)
             return False
         
         try:
             # 取消该策略的所有活跃订单
             martin_manager = self.martin_managers[strategy_key]
-            for order_id in martin_manager.state.active_orders:
-                try:
-                    # 使用安全方法获取订单
-                    get_order = getattr(self.main_engine, 'get_order', None)
-                    if get_order:
-                        order = get_order(order_id)
-                        if order and order.is_active():
-                            cancel_req = order.create_cancel_request()
-                            gateway_name = getattr(order, 'gateway_name', 'OKX')
-                            self.main_engine.cancel_order(cancel_req, gateway_name)
-                except Exception as e:
-                    print(f"取消订单失败 {order_id}: {e}")
+            self._cancel_active_orders(tuple(martin_manager.state.active_orders))
             
             # 移除管理器
-            del self.martin_managers[strategy_key]
-            
-            # 检查symbol是否还在使用
-            symbol_still_used = any(key.startswith(f"{symbol}_") for key in self.martin_managers.keys())
-            if not symbol_still_used:
-                self.supported_symbols.discard(symbol)
-            
-            print(f"成功移除马丁策略: {symbol} {mode_text} 模式")
+            with self._managers_lock:
+                del self.martin_managers[strategy_key]
+                self._strategy_key_cache.pop((symbol, mode), None)
+                # managers_by_symbol的列表长度即symbol的引用计数，清空时symbol不再使用
+                managers = self.managers_by_symbol.get(symbol)
+                if managers is not None:
+                    managers.remove(martin_manager)
+                    if not managers:
+                        del self.managers_by_symbol[symbol]
+                        self.supported_symbols.discard(symbol)
+                self.unregister_trade_handler(symbol, martin_manager.on_trade_update)
+                self.unregister_order_handler(symbol, martin_manager.on_order_update)
+                self._managers_snapshot = tuple(self.martin_managers.items())
+                self._batch_evaluator = None
+            
+            with self._dirty_lock:
+                self._dirty_managers.discard(strategy_key)
+                self._martin_full_save = True
+            
+            self.log.info("成功移除马丁策略: %s %s 模式", symbol, mode_text)
             return True
             
         except Exception as e:
-            print(f"移除马丁策略失败 {symbol} {mode_text}: {e}")
+            self.log.error("移除马丁策略失败 %s %s: %s", symbol, mode_text, e)
             return False
     
+    # 回调列表写时复制：事件线程遍历的旧列表不会被原地修改
+    
+    def register_trade_handler(self, vt_symbol: str, handler: Callable[[TradeData], None]) -> None:
+        """按交易对注册成交回调"""
+        handlers = self._trade_handlers.get(vt_symbol, [])
+        if handler not in handlers:
+            self._trade_handlers[vt_symbol] = handlers + [handler]
+    
+    def unregister_trade_handler(self, vt_symbol: str, handler: Callable[[TradeData], None]) -> None:
+        """注销交易对成交回调"""
+        handlers = self._trade_handlers.get(vt_symbol)
+        if handlers and handler in handlers:
+            handlers = [h for h in handlers if h != handler]
+            if handlers:
+                self._trade_handlers[vt_symbol] = handlers
+            else:
+                del self._trade_handlers[vt_symbol]
+    
+    def register_order_handler(self, vt_symbol: str, handler: Callable[[OrderData, OrderCategory], None]) -> None:
+        """按交易对注册订单回调"""
+        handlers = self._order_handlers.get(vt_symbol, [])
+        if handler not in handlers:
+            self._order_handlers[vt_symbol] = handlers + [handler]
+    
+    def unregister_order_handler(self, vt_symbol: str, handler: Callable[[OrderData, OrderCategory], None]) -> None:
+        """注销交易对订单回调"""
+        handlers = self._order_handlers.get(vt_symbol)
+        if handlers and handler in handlers:
+            handlers = [h for h in handlers if h != handler]
+            if handlers:
+                self._order_handlers[vt_symbol] = handlers
+            else:
+                del self._order_handlers[vt_symbol]
+    
     def batch_send_orders(self, order_requests: List[OrderRequest]) -> List[str]:
-        """批量发送马丁策略订单"""
-        vt_orderids = []
-        for order_req in order_requests:
-            vt_orderid = self._send_order(order_req, order_req.symbol)
-            if vt_orderid:
-                vt_orderids.append(vt_orderid)  
+        """
+        批量发送马丁策略订单
+        
+        按网关分组，每个网关只调用一次send_orders (OKX每批最多20个订单)
+        
+        返回：发送成功的订单ID
+        """
+        return [vt_orderid for vt_orderid in self._send_order_batch(order_requests) if vt_orderid]
+    
+    def _send_order_batch(self, order_requests: List[OrderRequest]) -> List[str]:
+        """批量发送并注册订单，返回与order_requests一一对应的订单ID (失败为空字符串)"""
+        # 按网关分组，记录原始位置
+        groups: Dict[str, List[Tuple[int, OrderRequest]]] = defaultdict(list)
+        for i, order_req in enumerate(order_requests):
+            vt_symbol = order_req.vt_symbol
+            contract = self._get_cached_contract(vt_symbol)
+            if not contract:
+                self.log.warning("无法获取合约信息: %s", vt_symbol)
+                continue
+            groups[contract.gateway_name].append((i, order_req))
+        
+        vt_orderids = [""] * len(order_requests)
+        registrations = []
+        try:
+            for gateway_name, items in groups.items():
+                reqs = [order_req for _, order_req in items]
+                try:
+                    if self._send_orders:
+                        results = self._send_orders(reqs, gateway_name)
+                    else:
+                        results = [self.main_engine.send_order(req, gateway_name) for req in reqs]
+                except Exception as e:
+                    self.log.error("批量发送订单异常 %s: %s", gateway_name, e)
+                    continue
+            
+                for (i, order_req), vt_orderid in zip(items, results):
+                    if not vt_orderid:
+                        self.log.error("发送订单失败: %s %s", order_req.vt_symbol, order_req.reference)
+                        continue
+                    action = self.order_manager.pop_reference_action(order_req.reference)
+                    registrations.append(
+                        (vt_orderid, order_req.vt_symbol, OrderCategory.MARTIN, action, order_req.reference)
+                    )
+                    vt_orderids[i] = vt_orderid
+        finally:
+            # 缺少合约、发送失败或异常的订单也取出reference动作，避免残留
+            for order_req in order_requests:
+                self.order_manager.discard_reference_action(order_req.reference)
+        
+        # 一次性注册全部订单
+        self.order_manager.register_orders(registrations)
+        if registrations:
+            self._mark_dirty(orders=True)
+        self.log.info("批量发送订单: %s/%s 成功", len(registrations), len(order_requests))
         return vt_orderids
     
-    def _start_timer(self) -> None:
-        """启动定时任务"""
-        if self.timer_thread and self.timer_thread.is_alive():
+    def request_save(self) -> None:
+        """请求在下一个定时事件 (1秒内) 立即保存一次状态"""
+        self._save_requested = True
+    
+    def _on_timer(self, event: Event) -> None:
+        """定时任务: 每timer_interval个EVENT_TIMER执行一次，request_save时提前保存"""
+        if not self.active:
             return
         
-        self.timer_thread = threading.Thread(target=self._timer_loop, daemon=True)
-        self.timer_thread.start()
-        print(f"[{self.account_id}] 定时器已启动")
-    
-    def _stop_timer(self) -> None:
-        """停止定时任务"""
-        # 定时器线程会在active=False时自动退出
-        if self.timer_thread and self.timer_thread.is_alive():
-            self.timer_thread.join(timeout=5)
-        print(f"[{self.account_id}] 定时器已停止")
-    
-    def _timer_loop(self) -> None:
-        """定时任务循环"""
-        while self.active:
-            try:
-                # 更新心跳
-                self.last_heartbeat = datetime.now()
-                
-                # 定期保存状态
-                self._save_state()
-                
-                # 健康检查
-                self._health_check()
-                
-                # 等待下一次执行
-                time.sleep(self.timer_interval)
-                
-            except Exception as e:
-                print(f"[{self.account_id}] 定时任务异常: {e}")
-                time.sleep(5)  # 异常时短暂等待
+        self._timer_ticks += 1
+        periodic = self._timer_ticks >= self.timer_interval
+        if not periodic and not self._save_requested:
+            return
+        
+        self._save_requested = False
+        try:
+            # 更新心跳 (本轮定时任务共用同一个时间)
+            now = datetime.now()
+            self.last_heartbeat = now
+            
+            # 保存状态
+            self._save_state()
+            
+            # 定期健康检查 (立即保存请求不做)
+            if periodic:
+                self._timer_ticks = 0
+                self._health_check(now)
+            
+        except Exception as e:
+            self.log.error("定时任务异常: %s", e)
     
-    def _health_check(self) -> None:
+    def _health_check(self, now: Optional[datetime] = None) -> None:
         """健康检查"""
         try:
+            if now is None:
+                now = datetime.now()
+            
             # 检查各个马丁管理器状态
-            for strategy_key, martin_manager in self.martin_managers.items():
+            for strategy_key, martin_manager in self._managers_snapshot:
                 state = martin_manager.get_state()
                 
                 # 检查状态是否正常
                 if state.execution_mode == ExecutionMode.EMERGENCY_EXIT:
-                    print(f"[{self.account_id}] 警告: {strategy_key} 马丁策略处于紧急退出模式")
+                    self.log.warning("%s 马丁策略处于紧急退出模式", strategy_key)
                 
                 # 检查最后更新时间
-                if (datetime.now() - state.last_update).seconds > 300:  # 5分钟无更新
-                    print(f"[{self.account_id}] 警告: {strategy_key} 马丁策略长时间无更新")
+                if (now - state.last_update).total_seconds() > 300:  # 5分钟无更新
+                    self.log.warning("%s 马丁策略长时间无更新", strategy_key)
             
             # 打印运行状态
-            uptime = datetime.now() - self.stats['start_time']
-            print(f"[{self.account_id}] 运行状态: 正常 | 运行时间: {uptime} | "
-                  f"总订单: {self.stats['total_orders']} | 总成交: {self.stats['total_trades']}")
+            uptime = now - self.stats.start_time
+            self.log.info("运行状态: 正常 | 运行时间: %s | 总订单: %s | 总成交: %s",
+                          uptime, self.stats.total_orders, self.stats.total_trades)
                   
         except Exception as e:
-            print(f"[{self.account_id}] 健康检查失败: {e}")
+            self.log.error("健康检查失败: %s", e)
     
-    def _save_state(self) -> None:
-        """保存状态 - 优化版本"""
+    def _mark_dirty(self, strategy_key: Optional[str] = None, orders: bool = False) -> None:
+        """标记需要保存的马丁策略/订单映射"""
+        with self._dirty_lock:
+            if strategy_key is not None:
+                self._dirty_managers.add(strategy_key)
+            if orders:
+                self._dirty_orders = True
+    
+    def _save_state(self, force: bool = False) -> None:
+        """
+        保存状态 - 增量版本
+        
+        只保存上次保存后变化过的部分，无变化时不写盘：
+        - 马丁策略: 变化的策略追加到增量日志，移除过策略时重写完整快照
+        - 订单映射: 有订单注册/移除时才保存
+        - 执行器状态: 统计计数或交易对集合变化时才保存
+        
+        force=True时全部保存 (停止执行器时使用)
+        """
         try:
-            # 保存执行器状态
-            executor_state = {
-                'active': self.active,
-                'supported_symbols': list(self.supported_symbols),
-                'stats': self.stats,
-                'last_heartbeat': self.last_heartbeat.isoformat()
-            }
-            self.persistence_manager.save_executor_state(executor_state)
-            
-            # 保存马丁策略状态
-            martin_states = {}
-            for strategy_key, martin_manager in self.martin_managers.items():
-                martin_states[strategy_key] = martin_manager.get_state()
-            
-            if martin_states:
-                self.persistence_manager.save_martin_states(martin_states)
-            
-            # 保存订单映射
-            self.persistence_manager.save_order_mapping(self.order_manager.order_mapping)
+            with self._dirty_lock:
+                dirty_managers = self._dirty_managers
+                self._dirty_managers = set()
+                dirty_orders = self._dirty_orders or force
+                self._dirty_orders = False
+                full_save = self._martin_full_save or force
+                self._martin_full_save = False
+            
+            martin_states = None
+            if full_save:
+                martin_states = {key: manager.get_state() for key, manager in self._managers_snapshot}
+            else:
+                for strategy_key in dirty_managers:
+                    martin_manager = self.martin_managers.get(strategy_key)
+                    if martin_manager:
+                        self.persistence_manager.append_martin_delta(strategy_key, martin_manager.get_state())
+            
+            executor_state = None
+            counters = (self.stats.total_orders, self.stats.total_trades, frozenset(self.supported_symbols))
+            if force or counters != self._saved_counters:
+                executor_state = self._build_executor_state()
+                self._saved_counters = counters
+            
+            # 变化的部分合并成一次原子写入
+            self.persistence_manager.save_all(
+                executor_state=executor_state,
+                martin_states=martin_states,
+                order_mapping=self.order_manager.snapshot() if dirty_orders else None
+            )
             
             # 标记已保存
-            self.persistence_manager.mark_critical_change('martin')
+            self.persistence_manager.mark_saved()
             
         except Exception as e:
-            print(f"[{self.account_id}] 保存状态失败: {e}")
+            self.log.error("保存状态失败: %s", e)
+    
+    def _build_executor_state(self) -> dict:
+        """执行器状态数据"""
+        return {
+            'active': self.active,
+            'supported_symbols': list(self.supported_symbols),
+            'stats': asdict(self.stats),
+            'last_heartbeat': self.last_heartbeat.isoformat()
+        }
+    
+    def _save_executor_state(self) -> None:
+        """保存执行器状态"""
+        self.persistence_manager.save_executor_state(self._build_executor_state())
+    
+    def _save_martin_states(self) -> None:
+        """保存马丁策略状态"""
+        martin_states = {}
+        for strategy_key, martin_manager in self._managers_snapshot:
+            martin_states[strategy_key] = martin_manager.get_state()
+        
+        if martin_states:
+            self.persistence_manager.save_martin_states(martin_states)
+    
+    def _save_order_mapping(self) -> None:
+        """保存订单映射"""
+        self.persistence_manager.save_order_mapping(self.order_manager.snapshot())
     
     def _register_events(self) -> None:
         """注册事件监听"""
@@ -1650,11 +2821,13 @@ class AccountExecutor:
         self.event_engine.register(EVENT_ORDER, self.on_order)
         self.event_engine.register(EVENT_TRADE, self.on_trade)
         self.event_engine.register(EVENT_POSITION, self.on_position)
+        self.event_engine.register(EVENT_MARTIN_CHECK, self._on_martin_check)
+        self.event_engine.register(EVENT_TIMER, self._on_timer)
         
         # 监听趋势信号事件
         #self.event_engine.register(EVENT_TREND_SIGNAL, self.on_trend_signal)
         
-        print(f"[{self.account_id}] 事件监听已注册")
+        self.log.info("事件监听已注册")
     
     def _unregister_events(self) -> None:
         """注销事件监听"""
@@ -1662,10 +2835,12 @@ class AccountExecutor:
             self.event_engine.unregister(EVENT_ORDER, self.on_order)
             self.event_engine.unregister(EVENT_TRADE, self.on_trade)
             self.event_engine.unregister(EVENT_POSITION, self.on_position)
+            self.event_engine.unregister(EVENT_MARTIN_CHECK, self._on_martin_check)
+            self.event_engine.unregister(EVENT_TIMER, self._on_timer)
             #self.event_engine.unregister(EVENT_TREND_SIGNAL, self.on_trend_signal)
-            print(f"[{self.account_id}] 事件监听已注销")
+            self.log.info("事件监听已注销")
         except Exception as e:
-            print(f"[{self.account_id}] 注销事件监听失败: {e}")
+            self.log.error("注销事件监听失败: %s", e)
     
     def on_order(self, event: Event) -> None:
         """
@@ -1677,49 +2852,47 @@ class AccountExecutor:
         3. 触发马丁策略更新
         """
         order: OrderData = event.data
-        print(f"[{self.account_id}] 收到订单事件: {order.vt_symbol} {order.vt_orderid} {order.status}")
-        # 只处理本账户的订单
-        if not self.order_manager.is_my_order(order):
+        self.log.debug("收到订单事件: %s %s %s", order.vt_symbol, order.vt_orderid, order.status)
+        
+        # 只处理本账户的订单: 带本账户马丁前缀的直接确认，其余(如无reference)再查订单映射
+        reference = order.reference
+        is_martin = bool(reference) and self._is_martin_reference(reference)
+        if not is_martin and not self.order_manager.is_my_order(order):
             return
         
         try:
             # 更新统计信息
-            self.stats['total_orders'] += 1
-            self.stats['last_activity'] = datetime.now()
+            self.stats.total_orders += 1
+            self.stats.last_activity = datetime.now()
             
             # 分类订单
-            category = self.order_manager.classify_order(order)
+            category = OrderCategory.MARTIN if is_martin else self.order_manager.classify_order(order)
             
             # 更新订单管理器
             # 这句代码的作用是：当订单已经不是活跃状态（比如已成交、已撤销等），并且该订单ID在订单管理器的记录中时，
             # 就把这个订单从订单管理器的映射（order_mapping）里移除，避免无效订单一直占用内存。
             if not order.is_active() and order.vt_orderid in self.order_manager.order_mapping:
                 self.order_manager.remove_order(order.vt_orderid)
-            
-            # 如果是马丁策略订单，通知对应的马丁管理器
-            if category == OrderCategory.MARTIN and order.vt_symbol in self.supported_symbols:
-                # 查找对应的马丁管理器（可能有多个模式）
-                for strategy_key, martin_manager in self.martin_managers.items():
-                    if martin_manager.symbol == order.vt_symbol:
-                        martin_manager.on_order_update(order)
-                        # 检查是否需要生成新的订单
-                        self._check_generate_orders(martin_manager.symbol, martin_manager.mode)
+                self._mark_dirty(orders=True)
+            
+            # 如果是马丁策略订单，只通知该交易对注册的马丁管理器（可能有多个模式）
+            if category == OrderCategory.MARTIN:
+                handlers = self._order_handlers.get(order.vt_symbol)
+                if handlers:
+                    for handler in handlers:
+                        handler(order, category)
+                    for martin_manager in self.managers_by_symbol.get(order.vt_symbol, ()):
+                        self._mark_dirty(self._strategy_key(order.vt_symbol, martin_manager.mode))
+                    # 检查是否需要生成新的订单
+                    self._check_symbol_orders(order.vt_symbol)
             
             # 打印订单更新日志
-            status_text = {
-                Status.SUBMITTING: "提交中",
-                Status.NOTTRADED: "未成交", 
-                Status.PARTTRADED: "部分成交",
-                Status.ALLTRADED: "全部成交",
-                Status.CANCELLED: "已撤销",
-                Status.REJECTED: "已拒绝"
-            }.get(order.status, str(order.status))
-            
-            print(f"[{self.account_id}] 订单更新: {order.vt_symbol} {category.value} {status_text} "
-                  f"价格={order.price} 数量={order.volume}")
+            self.log.debug("订单更新: %s %s %s 价格=%s 数量=%s",
+                           order.vt_symbol, CATEGORY_NAME[category],
+                           STATUS_TEXT.get(order.status, order.status), order.price, order.volume)
                   
         except Exception as e:
-            print(f"[{self.account_id}] 处理订单事件失败: {e}")
+            self.log.error("处理订单事件失败: %s", e)
     
     def on_trade(self, event: Event) -> None:
         """
@@ -1732,29 +2905,35 @@ class AccountExecutor:
         """
         trade: TradeData = event.data
         
-        # 只处理支持的交易对
-        if trade.vt_symbol not in self.supported_symbols:
+        # 只处理注册了回调的交易对
+        handlers = self._trade_handlers.get(trade.vt_symbol)
+        if not handlers:
             return
         
         try:
             # 更新统计信息
-            self.stats['total_trades'] += 1
-            self.stats['last_activity'] = datetime.now()
+            self.stats.total_trades += 1
+            self.stats.last_activity = datetime.now()
             
-            # 通知所有相关的马丁管理器
-            for strategy_key, martin_manager in self.martin_managers.items():
-                if martin_manager.symbol == trade.vt_symbol:
-                    martin_manager.on_trade_update(trade)
-                    # 检查是否需要生成新的订单
-                    self._check_generate_orders(martin_manager.symbol, martin_manager.mode)
+            # 通知该交易对的马丁管理器
+            for handler in handlers:
+                handler(trade)
+            
+            # 成交改变了马丁状态，追加到增量日志
+            for martin_manager in self.managers_by_symbol.get(trade.vt_symbol, ()):
+                strategy_key = self._strategy_key(trade.vt_symbol, martin_manager.mode)
+                self.persistence_manager.mark_critical_change('martin', strategy_key, martin_manager.state)
+            
+            # 检查是否需要生成新的订单
+            self._check_symbol_orders(trade.vt_symbol)
             
             # 打印成交日志
             direction_text = "买入" if trade.direction == Direction.LONG else "卖出"
-            print(f"[{self.account_id}] 成交通知: {trade.vt_symbol} {direction_text} "
-                  f"价格={trade.price} 数量={trade.volume}")
+            self.log.info("成交通知: %s %s 价格=%s 数量=%s",
+                          trade.vt_symbol, direction_text, trade.price, trade.volume)
                   
         except Exception as e:
-            print(f"[{self.account_id}] 处理成交事件失败: {e}")
+            self.log.error("处理成交事件失败: %s", e)
     
     def on_position(self, event: Event) -> None:
         """
@@ -1765,7 +2944,7 @@ class AccountExecutor:
         position: PositionData = event.data
         
         if position.vt_symbol in self.supported_symbols:
-            print(f"[{self.account_id}] 仓位更新: {position.vt_symbol} 数量={position.volume}")
+            self.log.debug("仓位更新: %s 数量=%s", position.vt_symbol, position.volume)
     '''
     def on_trend_signal(self, event: Event) -> None:
         """
@@ -1798,24 +2977,87 @@ class AccountExecutor:
             self.trend_signals[trend_signal.symbol] = trend_signal
             
             # 对所有相关的马丁策略进行协调
-            for strategy_key, martin_manager in self.martin_managers.items():
-                if martin_manager.symbol == trend_signal.symbol:
-                    # 策略协调
-                    self.strategy_coordinator.coordinate_strategies(
-                        symbol=trend_signal.symbol,
-                        trend_signal=trend_signal,
-                        martin_manager=martin_manager
-                    )
-                    
-                    # 检查是否需要生成新的订单
-                    self._check_generate_orders(trend_signal.symbol, martin_manager.mode)
+            for martin_manager in self.managers_by_symbol.get(trend_signal.symbol, ()):
+                # 策略协调
+                self.strategy_coordinator.coordinate_strategies(
+                    symbol=trend_signal.symbol,
+                    trend_signal=trend_signal,
+                    martin_manager=martin_manager
+                )
+                
+                # 检查是否需要生成新的订单
+                self._check_generate_orders(trend_signal.symbol, martin_manager.mode)
             
-            print(f"[{self.account_id}] 收到趋势信号: {trend_signal.symbol} "
-                  f"方向={trend_signal.overall_direction} 强度={trend_signal.overall_strength:.2f}")
+            self.log.info("收到趋势信号: %s 方向=%s 强度=%.2f",
+                          trend_signal.symbol, trend_signal.overall_direction, trend_signal.overall_strength)
                   
         except Exception as e:
-            print(f"[{self.account_id}] 处理趋势信号失败: {e}")
+            self.log.error("处理趋势信号失败: %s", e)
     '''
+    def check_all_strategies(self, pending: Optional[Iterable[Tuple[str, int]]] = None) -> None:
+        """
+        批量检查马丁策略
+        
+        先用MartinBatchEvaluator向量化筛选出满足开仓/止盈/加仓条件的策略，
+        只对这些策略执行逐个的订单计算；pending不为空时只同步、评估其中登记的 (symbol, mode)，
+        单个交易对成交时的开销与策略总数无关
+        """
+        if not self.martin_managers:
+            return
+        
+        if self._batch_evaluator is None:
+            self._batch_evaluator = MartinBatchEvaluator([m for _, m in self._managers_snapshot])
+        evaluator = self._batch_evaluator
+        
+        if pending is None:
+            indices = np.arange(len(evaluator.managers))
+        else:
+            index = evaluator.index
+            indices = np.array([index[key] for key in pending if key in index], dtype=np.intp)
+            if not indices.size:
+                return
+        evaluator.refresh(indices)
+        
+        get_tick = self._get_tick
+        managers = evaluator.managers
+        current_prices = np.full(len(indices), np.nan)
+        for j, i in enumerate(indices):
+            tick = get_tick(managers[i].symbol)
+            if tick and tick.last_price:
+                current_prices[j] = float(tick.last_price)
+        
+        for i in evaluator.evaluate(current_prices, indices):
+            martin_manager = managers[i]
+            self._check_generate_orders(martin_manager.symbol, martin_manager.mode)
+    
+    def _check_symbol_orders(self, symbol: str) -> None:
+        """
+        登记交易对下所有模式的马丁策略待检查
+        
+        第一次登记时向事件引擎投递一个合并检查事件，排在已到达的订单/成交事件之后处理，
+        连续成交时同一策略只计算一次
+        """
+        managers = self.managers_by_symbol.get(symbol)
+        if not managers:
+            return
+        
+        with self._pending_checks_lock:
+            schedule = not self._pending_checks
+            for martin_manager in managers:
+                self._pending_checks[(symbol, martin_manager.mode)] = None
+        
+        if schedule:
+            self.event_engine.put(Event(EVENT_MARTIN_CHECK))
+    
+    def _on_martin_check(self, event: Event) -> None:
+        """合并检查事件处理器: 对登记过的策略批量评估，命中条件的各检查一次"""
+        with self._pending_checks_lock:
+            pending = self._pending_checks
+            self._pending_checks = {}
+        
+        if pending:
+            self.check_all_strategies(pending)
+    
     def _check_generate_orders(self, symbol: str, mode: int) -> None:
         """
         检查是否需要生成新订单
@@ -1824,17 +3066,16 @@ class AccountExecutor:
         1. 根据马丁策略状态,决定是否发送新订单
         2. 使用安全的价格获取方法
         """
-        mode_suffix = "M1" if mode == 1 else "M2"
-        strategy_key = f"{symbol}_{mode_suffix}"
-        
-        if strategy_key not in self.martin_managers:
+        # 未缓存键值说明该策略从未添加过
+        strategy_key = self._strategy_key_cache.get((symbol, mode))
+        if strategy_key is None or strategy_key not in self.martin_managers:
             return
         
         try:
             martin_manager = self.martin_managers[strategy_key]
             
             # 获取当前价格 - 使用安全方法
-            tick = getattr(self.main_engine, 'get_tick', lambda x: None)(symbol)
+            tick = self._get_tick(symbol)
             if not tick or not tick.last_price:
                 return
             
@@ -1852,8 +3093,8 @@ class AccountExecutor:
                 self._send_order(order_req, symbol)
                 
         except Exception as e:
-            mode_text = "做多" if mode == 1 else "做空"
-            print(f"[{self.account_id}] 检查生成订单失败 {symbol} {mode_text}: {e}")
+            mode_text = MODE_TEXT[mode]
+            self.log.error("检查生成订单失败 %s %s: %s", symbol, mode_text, e)
     
     def _send_order(self, order_req: OrderRequest, symbol: str) -> Optional[str]:
         """
@@ -1862,10 +3103,10 @@ class AccountExecutor:
         返回：订单ID或None
         """
         try:
-            # 获取合约信息 - 使用安全方法
-            contract = getattr(self.main_engine, 'get_contract', lambda x: None)(symbol)
+            # 获取合约信息 (缓存)
+            contract = self._get_cached_contract(symbol)
             if not contract:
-                print(f"无法获取合约信息: {symbol}")
+                self.log.warning("无法获取合约信息: %s", symbol)
                 return None
             
             # 向交易所发送订单
@@ -1874,7 +3115,7 @@ class AccountExecutor:
             if vt_orderid:
                 # 注册订单
                 category = OrderCategory.MARTIN  # 暂时只支持马丁订单
-                action = order_req.reference.split('_')[-2] if '_' in order_req.reference else "UNKNOWN"
+                action = self.order_manager.pop_reference_action(order_req.reference)
                 
                 self.order_manager.register_order(
                     order_id=vt_orderid,
@@ -1883,40 +3124,77 @@ class AccountExecutor:
                     action=action,
                     reference=order_req.reference  #订单标识reference="MARTIN_ACC001_BTCUSDT_OPEN_001"
                 )
+                self._mark_dirty(orders=True)
                 
-                print(f"[{self.account_id}] 发送订单成功: {symbol} {order_req.reference} ID={vt_orderid}")
+                self.log.info("发送订单成功: %s %s ID=%s", symbol, order_req.reference, vt_orderid)
                 return vt_orderid
             else:
-                print(f"[{self.account_id}] 发送订单失败: {symbol} {order_req.reference}")
+                self.log.error("发送订单失败: %s %s", symbol, order_req.reference)
                 return None
                 
         except Exception as e:
-            print(f"[{self.account_id}] 发送订单异常: {e}")
+            self.log.error("发送订单异常: %s", e)
             return None
+        finally:
+            # 发送失败时reference动作不会被注册取出，这里统一丢弃
+            self.order_manager.discard_reference_action(order_req.reference)
+    
+    def _get_cached_contract(self, vt_symbol: str) -> Optional[ContractData]:
+        """获取合约信息，查询到后缓存"""
+        contract = self._contract_cache.get(vt_symbol)
+        if contract is None:
+            contract = self._get_contract(vt_symbol)
+            if contract:
+                self._contract_cache[vt_symbol] = contract
+        return contract
+    
+    def _cancel_active_orders(self, order_ids: Iterable[str]) -> List[str]:
+        """
+        批量撤销仍然活跃的订单
+        
+        按网关分组，每个网关调用一次cancel_orders (OKX每批最多20个)，
+        撤单请求取自对象池。撤单结果通过订单事件回报
+        
+        返回：已提交撤单的订单ID
+        """
+        if not self._get_order:
+            return []
+        
+        pool = self.cancel_request_pool
+        groups: Dict[str, List[CancelRequest]] = defaultdict(list)
+        cancelled = []
+        for order_id in order_ids:
+            order = self._get_order(order_id)
+            if order and order.is_active():
+                gateway_name = getattr(order, 'gateway_name', 'OKX')
+                groups[gateway_name].append(pool.get(order.orderid, order.symbol, order.exchange))
+                cancelled.append(order_id)
+        
+        for gateway_name, reqs in groups.items():
+            try:
+                if self._cancel_orders:
+                    self._cancel_orders(reqs, gateway_name)
+                else:
+                    for req in reqs:
+                        self.main_engine.cancel_order(req, gateway_name)
+            except Exception as e:
+                self.log.error("批量撤单失败 %s: %s", gateway_name, e)
+            finally:
+                for req in reqs:
+                    pool.release(req, gateway_name)
+        
+        return cancelled
     
     def _cancel_symbol_orders(self, symbol: str) -> None:
-        """取消指定交易对的所有活跃订单 - 使用安全方法"""
+        """取消指定交易对的所有活跃订单"""
         try:
             active_orders = self.order_manager.get_active_orders_by_symbol(symbol)
-            
-            for order_id in active_orders:
-                try:
-                    # 获取订单信息 - 使用安全方法
-                    get_order = getattr(self.main_engine, 'get_order', None)
-                    if get_order:
-                        order = get_order(order_id)
-                        if order and order.is_active():
-                            # 创建撤单请求
-                            cancel_req = order.create_cancel_request()
-                            gateway_name = getattr(order, 'gateway_name', 'OKX')
-                            self.main_engine.cancel_order(cancel_req, gateway_name)
-                            print(f"[{self.account_id}] 撤销订单: {order_id}")
-                        
-                except Exception as e:
-                    print(f"[{self.account_id}] 撤销订单失败 {order_id}: {e}")
+            cancelled = self._cancel_active_orders(active_orders)
+            if cancelled:
+                self.log.info("撤销订单: %s", ", ".join(cancelled))
                     
         except Exception as e:
-            print(f"[{self.account_id}] 取消交易对订单失败 {symbol}: {e}")
+            self.log.error("取消交易对订单失败 %s: %s", symbol, e)
     
     def get_status(self) -> dict:
         """
@@ -1926,16 +3204,16 @@ class AccountExecutor:
         """
         try:
             martin_status = {}
-            for strategy_key, martin_manager in self.martin_managers.items():
+            for strategy_key, martin_manager in self._managers_snapshot:
                 state = martin_manager.get_state()
                 martin_status[strategy_key] = {
                     'symbol': state.symbol,
-                    'mode': '做多' if state.mode == 1 else '做空',
+                    'mode': MODE_TEXT[state.mode],
                     'avg_price': state.avg_price,
                     'position_size': state.position_size,
                     'add_count': state.add_count,
                     'total_margin_used': state.total_margin_used,
-                    'execution_mode': state.execution_mode.value,
+                    'execution_mode': EXECUTION_MODE_NAME[state.execution_mode],
                     'active_orders_count': len(state.active_orders),
                     'last_update': state.last_update.isoformat()
                 }
@@ -1955,7 +3233,7 @@ class AccountExecutor:
                 'account_id': self.account_id,
                 'active': self.active,
                 'supported_symbols': list(self.supported_symbols),
-                'stats': self.stats,
+                'stats': asdict(self.stats),
                 'last_heartbeat': self.last_heartbeat.isoformat(),
                 'martin_strategies': martin_status,
                 'trend_signals': trend_signals_status,
@@ -1964,26 +3242,29 @@ class AccountExecutor:
             }
             
         except Exception as e:
-            print(f"[{self.account_id}] 获取状态失败: {e}")
+            self.log.error("获取状态失败: %s", e)
             return {'error': str(e)}
     
     def emergency_stop(self) -> None:
         """紧急停止"""
-        print(f"[{self.account_id}] 执行紧急停止...")
+        self.log.info("执行紧急停止...")
         
         try:
             # 设置所有马丁策略为紧急退出模式
-            for strategy_key, martin_manager in self.martin_managers.items():
+            for strategy_key, martin_manager in self._managers_snapshot:
                 martin_manager.set_execution_mode(ExecutionMode.EMERGENCY_EXIT)
             
-            # 取消所有活跃订单
-            for symbol in self.supported_symbols:
-                self._cancel_symbol_orders(symbol)
+            # 收集所有交易对的活跃订单，一次批量撤销
+            order_ids = []
+            for symbol in list(self.supported_symbols):
+                order_ids.extend(self.order_manager.get_active_orders_by_symbol(symbol))
+            cancelled = self._cancel_active_orders(order_ids)
+            self.log.info("已提交撤单: %s个订单", len(cancelled))
             
-            print(f"[{self.account_id}] 紧急停止执行完成")
+            self.log.info("紧急停止执行完成")
             
         except Exception as e:
-            print(f"[{self.account_id}] 紧急停止失败: {e}")
+            self.log.error("紧急停止失败: %s", e)
 
 
 # =============================================================================
@@ -10,7 +10,7 @@
 - 配置隔离：独立的API配置和交易对设置
 - 网关隔离：独立的网关连接和认证
 - 日志隔离：独立的日志输出，便于问题排查
-- 状态隔离：独立的内存状态，无持久化依赖
+- 状态隔离：独立的内存状态，无持久化依赖 (可选Redis缓存仅用于热启动，不可用时从交易所重建)
 
 马丁策略逻辑：
 - 首次开仓：市价开仓 → 挂10个买单 + 1个卖单
@@ -23,16 +23,40 @@
 - 买单队列管理：自动补充成交的买单
 - 三层职责分离：订单管理 | 策略管理 | 执行器
 
+使用示例：examples/account_executor_demo.py
+
 版本：v3.0 (买单队列直接操作版)
 """
 
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
 import time
 import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Set
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
 from decimal import Decimal
-from dataclasses import dataclass
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from enum import Enum
+from functools import partial
+from logging.handlers import QueueHandler, QueueListener
+
+import numpy as np
+
+try:
+    from numba import njit    # 可选依赖: 马丁价格计算JIT编译，未安装时按普通Python/numpy执行
+except ImportError:
+    njit = None
+
+try:
+    import redis      # 可选依赖: 策略状态热启动缓存，未安装时不启用
+except ImportError:
+    redis = None
 
 from howtrader.event import Event, EventEngine
 from howtrader.trader.engine import MainEngine
@@ -40,7 +64,7 @@ from howtrader.trader.object import (
     OrderData, TradeData, PositionData, ContractData,
     OrderRequest, CancelRequest, SubscribeRequest
 )
-from howtrader.trader.event import EVENT_ORDER, EVENT_TRADE, EVENT_POSITION
+from howtrader.trader.event import EVENT_ORDER, EVENT_TRADE, EVENT_POSITION, EVENT_TIMER
 from howtrader.trader.constant import Direction, Offset, Status, OrderType, Exchange
 from howtrader.trader.utility import extract_vt_symbol
 
@@ -49,16 +73,42 @@ from howtrader.trader.utility import extract_vt_symbol
 # 数据结构定义
 # =============================================================================
 
+class StrategyKey(NamedTuple):
+    """策略键 (交易对, 模式)，按元组哈希；只在日志/缓存键中格式化为 {symbol}_M{mode}"""
+    symbol: str
+    mode: int
+    
+    def __str__(self) -> str:
+        return f"{self.symbol}_M{self.mode}"
+    
+    @classmethod
+    def make(cls, symbol: str, mode: int) -> "StrategyKey":
+        """创建策略键，交易对字符串驻留以便各处共用同一对象"""
+        return cls(sys.intern(symbol), mode)
+    
+    @classmethod
+    def parse(cls, text: str) -> "StrategyKey":
+        """从 {symbol}_M{mode} 解析策略键"""
+        symbol, mode = text.rsplit("_M", 1)
+        return cls.make(symbol, int(mode))
+
+
 @dataclass
 class BuyOrderInfo:
-    """买单信息"""
+    """买单信息 (StrategyOrderTable中一行的视图)"""
     order_id: str
     price: float
     volume: float
-    level: int                    # 价格层级 (1-10)
+    avg_price: float              # 该单成交后的持仓均价
+    total_volume: float           # 该单成交后的总仓位
     add_sequence: int             # 🎯 NEW: 加仓序号
-    created_time: datetime
-    is_filled: bool = False
+    created_ns: int               # 创建时间 (time.monotonic_ns)
+    is_filled: bool               # 是否已成交
+    
+    # Python 3.9的dataclass不支持slots=True，手写__slots__ (带默认值的字段与__slots__冲突，因此不设默认值)
+    __slots__ = (
+        'order_id', 'price', 'volume', 'avg_price', 'total_volume', 'add_sequence', 'created_ns', 'is_filled'
+    )
 
 
 @dataclass
@@ -72,8 +122,13 @@ class MartinState:
     max_add_count: int                  # 最大加仓次数
     total_margin_used: float            # 已使用保证金
     execution_mode: str                 # 执行模式 ("normal", "suspended", etc.)
-    last_update: datetime
-    is_active: bool = True              # 是否活跃
+    last_update_ns: int                 # 最后更新时间 (time.monotonic_ns)
+    is_active: bool                     # 是否活跃
+    
+    __slots__ = (
+        'symbol', 'mode', 'avg_price', 'position_size', 'add_count', 'max_add_count',
+        'total_margin_used', 'execution_mode', 'last_update_ns', 'is_active'
+    )
 
 
 @dataclass
@@ -86,6 +141,249 @@ class AccountConfig:
     gateway_name: str                   # 网关名称 (如: "OKX")
     test_mode: bool = True              # 是否测试模式
     supported_symbols: Optional[List[str]] = None # 支持的交易对列表
+    redis_url: Optional[str] = None     # 状态缓存Redis地址 (可选，如 redis://localhost:6379/0)
+
+
+# 所有账户执行器共用的IO线程池 (并行下单、预取价格等)，线程数与账户数量无关
+_IO_POOL = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4), thread_name_prefix="exec-io")
+atexit.register(_IO_POOL.shutdown, wait=False)
+
+
+def _fmt_ts(ns: int) -> str:
+    """把time.monotonic_ns()时间戳转换为本地时间ISO字符串 (仅用于展示)"""
+    elapsed = (time.monotonic_ns() - ns) / 1e9
+    return (datetime.now() - timedelta(seconds=elapsed)).isoformat()
+
+
+# =============================================================================
+# 异步日志 - 事件线程只入队，所有日志由同一个后台线程按入队顺序写出
+# =============================================================================
+
+_log_q: "queue.Queue[logging.LogRecord]" = queue.Queue()
+_log_listener: Optional[QueueListener] = None
+_log_lock = threading.Lock()
+_martin_logger: Optional[logging.Logger] = None
+
+
+def _get_queue_logger(name: str, prefix: str = "") -> logging.Logger:
+    """
+    获取经共享队列输出的logger
+    
+    %-风格参数只在对应级别启用时才格式化；记录经QueueHandler入队，
+    由唯一的QueueListener线程写到stdout，事件线程不等待输出，各来源的日志保持先后顺序
+    """
+    global _log_listener
+    logger = logging.getLogger(name)
+    if logger.handlers:
+        return logger
+    
+    with _log_lock:
+        if _log_listener is None:
+            _log_listener = QueueListener(_log_q, logging.StreamHandler(sys.stdout))
+            _log_listener.start()
+            atexit.register(_log_listener.stop)     # 退出时写完队列中剩余的日志
+        
+        if not logger.handlers:
+            handler = QueueHandler(_log_q)
+            handler.setFormatter(logging.Formatter(f"{prefix}%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+    return logger
+
+
+def _get_executor_logger(account_id: str) -> logging.Logger:
+    """账户执行器日志 (自动加账户前缀)"""
+    return _get_queue_logger(f"howtrader.executor.{account_id}", f"[{account_id}] ")
+
+
+def _log(message: str) -> None:
+    """管理器日志 (消息自带账户前缀)，与执行器日志共用同一队列和写出线程"""
+    global _martin_logger
+    if _martin_logger is None:
+        _martin_logger = _get_queue_logger("howtrader.executor.martin")
+    _martin_logger.info(message)
+
+
+# =============================================================================
+# 马丁价格计算 - 纯数值函数 (numba可用时JIT编译)
+# =============================================================================
+
+def _jit(**options):
+    """numba可用时以cache=True编译，否则原样返回函数"""
+    if njit is None:
+        return lambda func: func
+    return njit(cache=True, **options)
+
+
+@_jit(inline='always')
+def _round_volume(volume: float, min_size: float, inv_min_size: float) -> float:
+    """调整到合约最小单位 (inv_min_size = 1/min_size，乘法代替除法)"""
+    return max(min_size, round(volume * inv_min_size) * min_size)
+
+
+@_jit(inline='always')
+def _profit_target(add_count: int) -> float:
+    """根据加仓次数计算止盈比例"""
+    if add_count <= 3:
+        return 0.01      # 1%
+    elif add_count <= 6:
+        return 0.012     # 1.2%
+    elif add_count <= 10:
+        return 0.015     # 1.5%
+    elif add_count <= 15:
+        return 0.02      # 2%
+    else:
+        return 0.025     # 2.5%
+
+
+@_jit(fastmath=True)
+def _calc_queue(sign: float, base_price: float, opp_ratio: float, price_factors: np.ndarray,
+                first_margin_add: float, margin_factors: np.ndarray, lever: float, contract_size: float,
+                min_size: float, inv_min_size: float, init_avg: float, init_pos: float):
+    """
+    计算买单队列，返回(prices, vols, avg_prices, total_vols)
+    
+    price_factors/margin_factors为price_multiple**i、amount_multiplier**i，长度即挂单数量
+    第i单价格 = base_price * ∏(1 - sign*opp_ratio*price_multiple**k), k=0..i
+    第i单保证金 = first_margin_add * amount_multiplier**i
+    """
+    prices = base_price * np.cumprod(1.0 - sign * opp_ratio * price_factors)
+    margins = first_margin_add * margin_factors
+    vols_raw = margins * lever / (prices * contract_size)
+    vols = np.maximum(min_size, np.round(vols_raw * inv_min_size) * min_size)
+    
+    # 累计成本/仓位得到每一层挂单成交后的均价
+    total_vols = init_pos + np.cumsum(vols)
+    avg_prices = (init_avg * init_pos + np.cumsum(margins * lever)) / total_vols
+    return prices, vols, avg_prices, total_vols
+
+
+def warmup_jit() -> None:
+    """预先编译价格计算函数，避免首笔成交时承担JIT延迟 (cache=True时后续进程直接读缓存)"""
+    if njit is None:
+        return
+    factors = np.ones(2)
+    _calc_queue(1.0, 100.0, 0.01, factors, 10.0, factors, 10.0, 1.0, 0.001, 1000.0, 0.0, 0.0)
+    _round_volume(1.0, 0.001, 1000.0)
+    _profit_target(0)
+
+
+# =============================================================================
+# 策略买单表 - 结构数组
+# =============================================================================
+
+class StrategyOrderTable:
+    """
+    单个策略的活跃买单表
+    
+    每个字段一个数组，以整数槽位为下标；order_id -> 槽位只查一次字典，
+    成交/撤单只需把active置为False并回收槽位
+    """
+    
+    def __init__(self, capacity: int = 16):
+        self.order_ids: List[Optional[str]] = [None] * capacity
+        self.price = np.zeros(capacity, dtype=np.float64)
+        self.volume = np.zeros(capacity, dtype=np.float64)
+        self.avg_price = np.zeros(capacity, dtype=np.float64)
+        self.total_volume = np.zeros(capacity, dtype=np.float64)
+        self.add_seq = np.zeros(capacity, dtype=np.int32)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.created_ns = np.zeros(capacity, dtype=np.int64)
+        
+        self.free_slots: List[int] = list(range(capacity - 1, -1, -1))  # 空闲槽位栈
+        self.id_to_slot: Dict[str, int] = {}
+        self._max_add_seq = 0   # 活跃买单最大加仓序号缓存
+    
+    def __len__(self) -> int:
+        return len(self.id_to_slot)
+    
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self.id_to_slot
+    
+    def _grow(self) -> None:
+        """容量翻倍"""
+        capacity = len(self.order_ids)
+        self.order_ids.extend([None] * capacity)
+        for name in ('price', 'volume', 'avg_price', 'total_volume', 'add_seq', 'active', 'created_ns'):
+            old = getattr(self, name)
+            new = np.zeros(capacity * 2, dtype=old.dtype)
+            new[:capacity] = old
+            setattr(self, name, new)
+        self.free_slots.extend(range(capacity * 2 - 1, capacity - 1, -1))
+    
+    def add(self, order_id: str, price: float, volume: float, avg_price: float,
+            total_volume: float, add_sequence: int, created_ns: int) -> int:
+        """写入一行，返回槽位"""
+        if not self.free_slots:
+            self._grow()
+        slot = self.free_slots.pop()
+        
+        self.order_ids[slot] = order_id
+        self.price[slot] = price
+        self.volume[slot] = volume
+        self.avg_price[slot] = avg_price
+        self.total_volume[slot] = total_volume
+        self.add_seq[slot] = add_sequence
+        self.active[slot] = True
+        self.created_ns[slot] = created_ns
+        self.id_to_slot[order_id] = slot
+        if add_sequence > self._max_add_seq:
+            self._max_add_seq = add_sequence
+        return slot
+    
+    def view(self, slot: int, buy_info: Optional[BuyOrderInfo] = None) -> BuyOrderInfo:
+        """按需生成槽位的BuyOrderInfo视图，传入buy_info时复用该对象"""
+        if buy_info is None:
+            return BuyOrderInfo(
+                order_id=self.order_ids[slot],
+                price=float(self.price[slot]),
+                volume=float(self.volume[slot]),
+                avg_price=float(self.avg_price[slot]),
+                total_volume=float(self.total_volume[slot]),
+                add_sequence=int(self.add_seq[slot]),
+                created_ns=int(self.created_ns[slot]),
+                is_filled=not self.active[slot]
+            )
+        
+        buy_info.order_id = self.order_ids[slot]
+        buy_info.price = float(self.price[slot])
+        buy_info.volume = float(self.volume[slot])
+        buy_info.avg_price = float(self.avg_price[slot])
+        buy_info.total_volume = float(self.total_volume[slot])
+        buy_info.add_sequence = int(self.add_seq[slot])
+        buy_info.created_ns = int(self.created_ns[slot])
+        buy_info.is_filled = not self.active[slot]
+        return buy_info
+    
+    def remove(self, order_id: str) -> Optional[int]:
+        """移除订单并回收槽位，返回原槽位"""
+        slot = self.id_to_slot.pop(order_id, None)
+        if slot is None:
+            return None
+        self.active[slot] = False
+        self.order_ids[slot] = None
+        self.free_slots.append(slot)
+        
+        # 只有移除的正好是最大序号时才重新计算
+        if self.add_seq[slot] == self._max_add_seq:
+            self._max_add_seq = int(self.add_seq[self.active].max()) if self.id_to_slot else 0
+        return slot
+    
+    def clear(self) -> List[str]:
+        """清空全部买单，返回被清除的订单ID"""
+        order_ids = list(self.id_to_slot)
+        capacity = len(self.order_ids)
+        self.order_ids = [None] * capacity
+        self.active[:] = False
+        self.free_slots = list(range(capacity - 1, -1, -1))
+        self.id_to_slot.clear()
+        self._max_add_seq = 0
+        return order_ids
+    
+    def max_add_sequence(self) -> int:
+        """活跃买单中最大的加仓序号"""
+        return self._max_add_seq
 
 
 # =============================================================================
@@ -95,6 +393,8 @@ class AccountConfig:
 class MartinOrderManager:
     """马丁订单管理器 - 专注买单队列和订单分类"""
     
+    _SYMBOL_TRANS = str.maketrans('', '', '-._')   # reference中去掉交易对的分隔符
+    
     def __init__(self, account_id: str):
         self.account_id = account_id
         self.order_sequence = 0
@@ -102,137 +402,221 @@ class MartinOrderManager:
         # 基础订单管理
         self.order_references: Dict[str, str] = {}          # order_id -> reference
         
-        # 🎯 按策略分类的活跃订单
-        self.strategy_buy_orders: Dict[str, Dict[str, BuyOrderInfo]] = {}  # strategy_key -> {order_id: BuyOrderInfo}
-        self.strategy_sell_orders: Dict[str, Set[str]] = {}                # strategy_key -> {order_ids}
-        self.order_strategy_mapping: Dict[str, str] = {}                   # order_id -> strategy_key
+        # 逐单日志只在设置MARTIN_DEBUG环境变量时输出 (汇总日志由执行器输出)
+        self._debug_log = bool(os.getenv('MARTIN_DEBUG'))
+        
+        # 策略整数ID: strategy_key只在对外接口处转换一次，内部容器按ID下标访问
+        self._strategy_ids: Dict[StrategyKey, int] = {}     # strategy_key -> 策略ID
+        self._strategy_keys: List[StrategyKey] = []         # 策略ID -> strategy_key
+        
+        # 🎯 按策略分类的活跃订单 (以策略ID为下标)
+        self.strategy_buy_orders: List[StrategyOrderTable] = []   # 策略ID -> 买单表
+        self.strategy_sell_orders: List[Set[str]] = []            # 策略ID -> {order_ids}
+        self.order_strategy_mapping: Dict[str, int] = {}          # order_id -> 策略ID
 
         # 🎯 NEW: 加仓序号管理
-        self.strategy_add_sequence: Dict[str, int] = {}  # strategy_key -> 下一个加仓序号
+        self.strategy_add_sequence: List[int] = []  # 策略ID -> 下一个加仓序号
         
         # 买单队列配置
         self.target_buy_orders_count = 10                   # 目标买单数量
+        
+        # BuyOrderInfo对象池: 成交视图用完后回收复用
+        self._buyinfo_pool: List[BuyOrderInfo] = []
+        self._buyinfo_pool_limit = 4 * self.target_buy_orders_count
+    
+    def strategy_id(self, strategy_key: StrategyKey) -> int:
+        """获取策略ID，首次出现时分配"""
+        strategy_id = self._strategy_ids.get(strategy_key)
+        if strategy_id is None:
+            strategy_id = len(self._strategy_keys)
+            self._strategy_ids[strategy_key] = strategy_id
+            self._strategy_keys.append(strategy_key)
+            self.strategy_buy_orders.append(StrategyOrderTable())
+            self.strategy_sell_orders.append(set())
+            self.strategy_add_sequence.append(1)
+        return strategy_id
     
     # 🎯 NEW: 分配加仓序号
-    def allocate_add_sequence(self, strategy_key: str) -> int:
+    def allocate_add_sequence(self, strategy_key: StrategyKey) -> int:
         """为策略分配下一个加仓序号"""
-        if strategy_key not in self.strategy_add_sequence:
-            self.strategy_add_sequence[strategy_key] = 1
-        
-        sequence = self.strategy_add_sequence[strategy_key]
-        self.strategy_add_sequence[strategy_key] += 1
+        strategy_id = self.strategy_id(strategy_key)
+        sequence = self.strategy_add_sequence[strategy_id]
+        self.strategy_add_sequence[strategy_id] += 1
         return sequence
 
-    def generate_order_reference(self, symbol: str, action: str, direction: str = "LONG") -> str:
+    @classmethod
+    def reference_prefix(cls, symbol: str, direction: str) -> str:
+        """策略的reference前缀 MARTIN_{方向}_{交易对}_ (创建策略时计算一次)"""
+        return f"MARTIN_{direction}_{symbol.translate(cls._SYMBOL_TRANS)}_"
+    
+    def generate_order_reference(self, ref_prefix: str, action: str) -> str:
         """
         生成订单reference - 包含多空方向信息
         
         Args:
-            symbol: 交易对
+            ref_prefix: 策略的reference前缀 (SimpleMartinManager.ref_prefix)
             action: 操作类型 (OPEN, BUY_L1, PROFIT, REFILL_L1等)
-            direction: 多空方向 ("LONG" 或 "SHORT")
         """
         self.order_sequence += 1
-        clean_symbol = symbol.replace('-', '').replace('.', '').replace('_', '')
-        return f"MARTIN_{direction}_{clean_symbol}_{action}_{self.order_sequence:04d}"
+        return f"{ref_prefix}{action}_{self.order_sequence:04d}"
     
-    def register_strategy_buy_order(self, strategy_key: str, order_id: str, 
-                                  reference: str, price: float, avg_price: float, volume: float, total_volume: float, add_sequence: int) -> None:
-        """注册策略买单"""
-        self.order_references[order_id] = reference
-        self.order_strategy_mapping[order_id] = strategy_key
+    def register_strategy_buy_order(self, strategy_key: StrategyKey, order_id: str, reference: str,
+                                    price: float, avg_price: float, volume: float, total_volume: float,
+                                    add_sequence: int) -> None:
+        """
+        注册策略买单
         
-        # 初始化策略订单容器
-        if strategy_key not in self.strategy_buy_orders:
-            self.strategy_buy_orders[strategy_key] = {}
+        Args:
+            price/volume: 挂单价格和数量 (可为Decimal)
+            avg_price/total_volume: 该单成交后的持仓均价和总仓位
+            add_sequence: 加仓序号
+        """
+        strategy_id = self.strategy_id(strategy_key)
+        self.order_references[order_id] = reference
+        self.order_strategy_mapping[order_id] = strategy_id
         
-        # 添加买单信息
-        buy_info = BuyOrderInfo(
-            order_id=order_id,
-            price=price,
-            avg_price=avg_price,
-            volume=volume,
-            total_volume=total_volume,
-            add_sequence=add_sequence,  # 🎯 第几次买单
-            created_time=datetime.now()
-        )
-        self.strategy_buy_orders[strategy_key][order_id] = buy_info
+        # 添加买单信息 (add_sequence: 🎯 第几次买单)，下单价格/数量可能是Decimal，表内统一存float
+        self.strategy_buy_orders[strategy_id].add(order_id, float(price), float(volume), avg_price, total_volume, add_sequence, time.monotonic_ns())
         
-        print(f"[{self.account_id}] 注册买单: {strategy_key} 第几张挂单{add_sequence} 价格={price:.10f}")
+        if self._debug_log:
+            _log(f"[{self.account_id}] 注册买单: {strategy_key} 第几张挂单{add_sequence} 价格={price:.10f}")
     
-    def register_strategy_sell_order(self, strategy_key: str, order_id: str, reference: str) -> None:
+    def register_strategy_sell_order(self, strategy_key: StrategyKey, order_id: str, reference: str) -> None:
         """注册策略卖单"""
+        strategy_id = self.strategy_id(strategy_key)
         self.order_references[order_id] = reference
-        self.order_strategy_mapping[order_id] = strategy_key
-        
-        if strategy_key not in self.strategy_sell_orders:
-            self.strategy_sell_orders[strategy_key] = set()
-        
-        self.strategy_sell_orders[strategy_key].add(order_id)
-        print(f"[{self.account_id}] 注册卖单: {strategy_key}")
+        self.order_strategy_mapping[order_id] = strategy_id
+        self.strategy_sell_orders[strategy_id].add(order_id)
+        if self._debug_log:
+            _log(f"[{self.account_id}] 注册卖单: {strategy_key}")
     
-    def mark_buy_order_filled(self, order_id: str, strategy_key: str) -> Optional[tuple]:
+    def mark_buy_order_filled(self, order_id: str, strategy_key: StrategyKey) -> Optional[tuple]:
         """标记买单成交，返回(strategy_key, buy_info)"""
         
-        if strategy_key and order_id in self.strategy_buy_orders.get(strategy_key, {}):
-            # 从买单映射列表中移除该买单信息，并返回对应的buy_info
-            buy_info = self.strategy_buy_orders[strategy_key].pop(order_id)
+        strategy_id = self._strategy_ids.get(strategy_key)
+        if strategy_id is None:
+            return None
+        
+        table = self.strategy_buy_orders[strategy_id]
+        if order_id in table:
+            # 从买单表中移除该买单，并返回对应的buy_info视图
+            pool = self._buyinfo_pool
+            buy_info = table.view(table.id_to_slot[order_id], pool.pop() if pool else None)
             buy_info.is_filled = True
+            table.remove(order_id)
             self.order_references.pop(order_id, None)
             self.order_strategy_mapping.pop(order_id, None)
 
-            # �� 获取加仓信息
-            max_add_sequence = 0
-            for buy_info in self.strategy_buy_orders[strategy_key].values():
-                max_add_sequence = max(max_add_sequence, buy_info.add_sequence)
+            # 🎯 获取加仓信息
+            max_add_sequence = table.max_add_sequence()
                  
-            print(f"[{self.account_id}] 买单成交: {strategy_key} Level{buy_info.level}")
+            if self._debug_log:
+                _log(f"[{self.account_id}] 买单成交: {strategy_key} 第{buy_info.add_sequence}次")
             return buy_info,max_add_sequence
         return None
     
-    def mark_sell_order_filled(self, order_id: str) -> Optional[str]:
+    def release_buy_info(self, buy_info: BuyOrderInfo) -> None:
+        """回收mark_buy_order_filled返回的BuyOrderInfo，调用后不可再使用该对象"""
+        if len(self._buyinfo_pool) < self._buyinfo_pool_limit:
+            buy_info.is_filled = False
+            self._buyinfo_pool.append(buy_info)
+    
+    def mark_sell_order_filled(self, order_id: str) -> Optional[StrategyKey]:
         """标记卖单成交，返回strategy_key"""
-        strategy_key = self.order_strategy_mapping.get(order_id)
-        if strategy_key and order_id in self.strategy_sell_orders.get(strategy_key, set()):
-            self.strategy_sell_orders[strategy_key].discard(order_id)
+        strategy_id = self.order_strategy_mapping.get(order_id)
+        if strategy_id is not None and order_id in self.strategy_sell_orders[strategy_id]:
+            self.strategy_sell_orders[strategy_id].discard(order_id)
             self.order_references.pop(order_id, None)
             self.order_strategy_mapping.pop(order_id, None)
             
-            print(f"[{self.account_id}] 卖单成交: {strategy_key}")
+            strategy_key = self._strategy_keys[strategy_id]
+            if self._debug_log:
+                _log(f"[{self.account_id}] 卖单成交: {strategy_key}")
             return strategy_key
         return None
     
-    def get_strategy_buy_orders_count(self, strategy_key: str) -> int:
+    def get_strategy_buy_orders_count(self, strategy_key: StrategyKey) -> int:
         """获取策略的活跃买单数量"""
-        return len(self.strategy_buy_orders.get(strategy_key, {}))
+        strategy_id = self._strategy_ids.get(strategy_key)
+        return len(self.strategy_buy_orders[strategy_id]) if strategy_id is not None else 0
     
-    def get_strategy_missing_buy_orders(self, strategy_key: str) -> int:
+    def get_strategy_missing_buy_orders(self, strategy_key: StrategyKey) -> int:
         """获取策略缺失的买单数量"""
-        current_count = self.get_strategy_buy_orders_count(strategy_key)
-        return max(0, self.target_buy_orders_count - current_count)
+        missing = self.target_buy_orders_count - self.get_strategy_buy_orders_count(strategy_key)
+        return missing if missing > 0 else 0
     
-    def get_strategy_sell_orders(self, strategy_key: str) -> List[str]:
-        """获取策略的活跃卖单ID列表"""
-        return list(self.strategy_sell_orders.get(strategy_key, set()))
+    def get_strategy_sell_orders(self, strategy_key: StrategyKey) -> Iterable[str]:
+        """获取策略的活跃卖单ID (内部集合的只读视图，遍历期间不要修改卖单)"""
+        strategy_id = self._strategy_ids.get(strategy_key)
+        return self.strategy_sell_orders[strategy_id] if strategy_id is not None else ()
     
-    def clear_strategy_orders(self, strategy_key: str) -> tuple:
+    def pop_strategy_sell_orders(self, strategy_key: StrategyKey) -> Set[str]:
+        """取出并注销策略的全部活跃卖单，返回其订单ID"""
+        strategy_id = self._strategy_ids.get(strategy_key)
+        if strategy_id is None:
+            return set()
+        
+        sell_order_ids = self.strategy_sell_orders[strategy_id]
+        if sell_order_ids:
+            self.strategy_sell_orders[strategy_id] = set()
+            for order_id in sell_order_ids:
+                self.order_references.pop(order_id, None)
+                self.order_strategy_mapping.pop(order_id, None)
+        return sell_order_ids
+    
+    def clear_strategy_orders(self, strategy_key: StrategyKey) -> tuple:
         """清除策略的所有订单，返回(buy_order_ids, sell_order_ids)"""
-        buy_order_ids = list(self.strategy_buy_orders.get(strategy_key, {}).keys())
-        sell_order_ids = list(self.strategy_sell_orders.get(strategy_key, set()))
+        strategy_id = self._strategy_ids.get(strategy_key)
+        if strategy_id is None:
+            return [], []
         
-        # 清除记录
-        self.strategy_buy_orders.pop(strategy_key, None)
-        self.strategy_sell_orders.pop(strategy_key, None)
+        # 清除记录 (买单表清空、卖单集合整体换新，逐个移除索引)
+        references = self.order_references
+        mapping = self.order_strategy_mapping
         
-        for order_id in buy_order_ids + sell_order_ids:
-            self.order_references.pop(order_id, None)
-            self.order_strategy_mapping.pop(order_id, None)
+        buy_order_ids = self.strategy_buy_orders[strategy_id].clear()
+        for order_id in buy_order_ids:
+            references.pop(order_id, None)
+            mapping.pop(order_id, None)
+        
+        sell_order_ids = self.strategy_sell_orders[strategy_id]
+        self.strategy_sell_orders[strategy_id] = set()
+        for order_id in sell_order_ids:
+            references.pop(order_id, None)
+            mapping.pop(order_id, None)
         
         return buy_order_ids, sell_order_ids
     
-    def get_order_strategy(self, order_id: str) -> Optional[str]:
+    def export_strategy_orders(self, strategy_key: StrategyKey) -> dict:
+        """导出策略活跃订单 (用于状态缓存)"""
+        strategy_id = self._strategy_ids.get(strategy_key)
+        if strategy_id is None:
+            return {'buy': [], 'sell': []}
+        
+        table = self.strategy_buy_orders[strategy_id]
+        references = self.order_references
+        buy = [
+            [order_id, references.get(order_id, ""), float(table.price[slot]), float(table.volume[slot]),
+             float(table.avg_price[slot]), float(table.total_volume[slot]), int(table.add_seq[slot])]
+            for order_id, slot in table.id_to_slot.items()
+        ]
+        sell = [[order_id, references.get(order_id, "")] for order_id in self.strategy_sell_orders[strategy_id]]
+        return {'buy': buy, 'sell': sell}
+    
+    def import_strategy_orders(self, strategy_key: StrategyKey, orders: dict) -> None:
+        """恢复export_strategy_orders导出的活跃订单"""
+        for order_id, reference, price, volume, avg_price, total_volume, add_sequence in orders.get('buy', ()):
+            self.register_strategy_buy_order(strategy_key, order_id, reference, price, avg_price,
+                                             volume, total_volume, add_sequence)
+        for order_id, reference in orders.get('sell', ()):
+            self.register_strategy_sell_order(strategy_key, order_id, reference)
+        _log(f"[{self.account_id}] 恢复订单: {strategy_key} 买单{len(orders.get('buy', ()))}个 "
+             f"卖单{len(orders.get('sell', ()))}个")
+    
+    def get_order_strategy(self, order_id: str) -> Optional[StrategyKey]:
         """获取订单所属策略"""
-        return self.order_strategy_mapping.get(order_id)
+        strategy_id = self.order_strategy_mapping.get(order_id)
+        return self._strategy_keys[strategy_id] if strategy_id is not None else None
     
     def classify_order(self, order: OrderData) -> str:
         """根据订单reference分类订单"""
@@ -251,6 +635,16 @@ class MartinOrderManager:
 class SimpleMartinManager:
     """简化马丁策略管理器 - 专注状态管理和价格计算"""
     
+    __slots__ = (
+        'account_id', 'symbol', 'mode', 'config', 'contract',
+        'lever', 'first_margin', 'first_margin_add', 'adding_number', 'max_add_count',
+        'amount_multiplier', 'price_multiple', 'profit_target', 'opp_ratio', 'buy_orders_count',
+        'direction_str', 'ref_prefix', 'opp_sign', 'profit_sign',
+        '_price_factor_table', '_margin_factor_table',
+        'price_tick', 'contract_size', 'min_order_size', '_min_size_f', '_inv_min_size', '_inv_price_tick',
+        'state',
+    )
+    
     def __init__(self, account_id: str, symbol: str, mode: int, config: dict, contract_info: ContractData):
         self.account_id = account_id
         self.symbol = symbol
@@ -263,17 +657,33 @@ class SimpleMartinManager:
         self.first_margin = config.get('first_margin', 50.0)       # 首次保证金
         self.first_margin_add = config.get('first_margin_add', 50.0)  # 加仓保证金
         self.adding_number = config.get('adding_number', 20)       # 最大加仓次数
+        self.max_add_count = self.adding_number
         self.amount_multiplier = config.get('amount_multiplier', 1.2)  # 加仓金额倍数
         self.price_multiple = config.get('price_multiple', 1.1)     # 价格倍数
         self.profit_target = config.get('profit_target', 0.01)     # 止盈比例
         self.opp_ratio = config.get('opp_ratio', 0.025)           # 默认止盈触发比例
         self.buy_orders_count= config.get('buy_orders_count', 10) # 买单队列数量
-
+        
+        # 多空方向和reference前缀只在创建时计算
+        self.direction_str = "LONG" if mode == 1 else "SHORT"
+        self.ref_prefix = MartinOrderManager.reference_prefix(symbol, self.direction_str)
+        
+        # 多空符号: 做多挂单价格向下、止盈向上，做空相反
+        self.opp_sign = 1.0 if mode == 1 else -1.0
+        self.profit_sign = self.opp_sign
+        
+        # 价格/保证金倍数表: 只依赖配置，预先算好price_multiple**i和amount_multiplier**i
+        i = np.arange(self.buy_orders_count + self.adding_number)
+        self._price_factor_table = float(self.price_multiple) ** i
+        self._margin_factor_table = float(self.amount_multiplier) ** i
         
         # 合约信息
         self.price_tick = contract_info.pricetick  # 价格精度
         self.contract_size = contract_info.size   # 合约乘数
         self.min_order_size = self._get_min_order_size(contract_info)   # 最小下单单位
+        self._min_size_f = float(self.min_order_size)
+        self._inv_min_size = 1.0 / self._min_size_f
+        self._inv_price_tick = 1.0 / float(self.price_tick)
         
         # 策略状态
         self.state = MartinState(
@@ -282,40 +692,50 @@ class SimpleMartinManager:
             avg_price=0.0,
             position_size=0.0,
             add_count=0,
+            max_add_count=self.max_add_count,
             total_margin_used=0.0,
             execution_mode="normal",
-            last_update=datetime.now()
+            last_update_ns=time.monotonic_ns(),
+            is_active=True
         )
         
         mode_text = "做多" if mode == 1 else "做空"
-        print(f"[{account_id}] 创建队列马丁策略: {symbol} {mode_text}")
-        print(f"  买单队列数量: {self.buy_orders_count}")
-        print(f"  价格步长: {self.price_step_ratio:.1%}")
-        print(f"  每层保证金: {self.margin_per_level}")
+        _log(f"[{account_id}] 创建队列马丁策略: {symbol} {mode_text}\n"
+             f"  买单队列数量: {self.buy_orders_count}\n"
+             f"  价格步长: {self.opp_ratio:.1%}\n"
+             f"  每层保证金: {self.first_margin_add}")
         
     def update_position_on_buy(self, trade_price: float, trade_volume: float) -> None:
         """买入时更新仓位"""
-        if self.state.position_size > 0:
-            total_cost = self.state.avg_price * self.state.position_size + trade_price * trade_volume
-            self.state.position_size += trade_volume
-            self.state.avg_price = total_cost / self.state.position_size
+        self.update_position_on_buys(np.array([trade_price]), np.array([trade_volume]))
+    
+    def update_position_on_buys(self, prices: np.ndarray, volumes: np.ndarray) -> None:
+        """多笔买入成交一次更新仓位 (只做一次除法)"""
+        state = self.state
+        add_cost = float((prices * volumes).sum())
+        add_vol = float(volumes.sum())
+        
+        if state.position_size > 0:
+            total_cost = state.avg_price * state.position_size + add_cost
+            state.position_size += add_vol
         else:
-            self.state.avg_price = trade_price
-            self.state.position_size = trade_volume
+            total_cost = add_cost
+            state.position_size = add_vol
+        state.avg_price = total_cost / state.position_size
         
-        self.state.add_count += 1
-        self.state.last_update = datetime.now()
+        state.add_count += len(prices)
+        state.last_update_ns = time.monotonic_ns()
         
-        print(f"[{self.account_id}] 买入更新: 仓位={self.state.position_size:.6f} 成本={self.state.avg_price:.6f} 第{self.state.add_count}次")
+        _log(f"[{self.account_id}] 买入更新: 仓位={state.position_size:.6f} 成本={state.avg_price:.6f} 第{state.add_count}次")
         
     def update_position_on_sell(self, trade_volume: float) -> None:
         """卖出时更新仓位"""
         self.state.position_size -= trade_volume
-        self.state.last_update = datetime.now()
+        self.state.last_update_ns = time.monotonic_ns()
         
-        print(f"[{self.account_id}] 卖出更新: 剩余仓位={self.state.position_size:.6f}")
+        _log(f"[{self.account_id}] 卖出更新: 剩余仓位={self.state.position_size:.6f}")
         
-        if self.state.position_size <= float(self.min_order_size):
+        if self.state.position_size <= self._min_size_f:
             self.reset_state()
     
     def calculate_first_order_params(self, current_price: float) -> Optional[tuple]:
@@ -329,80 +749,63 @@ class SimpleMartinManager:
         return  volume
         
     
-    def calculate_buy_orders_queue(self, base_price: float,add_count:int, max_add_sequence:int) -> List[tuple]:
-        """计算买单队列价格和数量，返回[(price, volume, add_sequence), ...]"""
-        orders = []
+    def calculate_buy_orders_queue(self, base_price: float,add_count:int, max_add_sequence:int) -> Tuple[tuple, ...]:
+        """计算买单队列价格和数量，返回((price, volume, add_sequence), ...)，price/volume为Decimal"""
         # 计算还可以挂多少单（最大加仓次数 - 已加仓次数）
         # 如果是首次开仓（add_count==0），则挂 buy_orders_count 个买单
         # 否则每次只挂1单（即加仓时只补1单）
-        # 返回 [(price, volume, add_sequence,), ...]
-        before_price=base_price
+        # 返回 ((price, volume, add_sequence, avg_price, total_volume), ...)
+        # 已达最大加仓次数时直接返回空元组，不做任何计算
+        if max_add_sequence >= self.max_add_count:
+            return ()
+        
+        # 首次开仓一次算出整个队列，补单只算下一层；两种情况都是_calc_queue的一段切片
         if add_count == 0:
-            if self.mode == 1:
-                for i in range(0, self.buy_orders_count ):
-                    older_price=before_price*(1-self.opp_ratio*self.price_multiple**i)
-                    #older_price=before_price*(1-opp_ratio*price_multiple**i)
-                    older_margin=self.first_margin_add*self.amount_multiplier**i
-                    #older_margin=first_margin_add*amount_multiplie**i
-                    older_pos=older_margin*self.lever/(older_price*self.contract_size)
-                    volume = self._round_to_size_tick(older_pos)
-                    #older_pos=older_margin*lever/(older_price*ctVal)
-                    
-                    #average_cost = (average_cost*total_pos +older_margin*lever)/(total_pos+older_pos)
-                    self.state.avg_price = (self.state.avg_price*self.state.position_size +older_margin*self.lever)/(self.state.position_size+volume)
-                    self.state.position_size = self.state.position_size+volume
-                    orders.append((older_price, volume, i+1,self.state.avg_price,self.state.position_size)) 
-                    before_price=older_price
-                    #total_pos = total_pos+older_pos
-            elif self.mode == 2:
-                for i in range(0, self.buy_orders_count ):
-                    older_price=before_price*(1+self.opp_ratio*self.price_multiple**i)
-                    older_margin=self.first_margin_add*self.amount_multiplier**i
-                    older_pos=older_margin*self.lever/(older_price*self.contract_size)
-                    volume = self._round_to_size_tick(older_pos)
-                    self.state.avg_price = (self.state.avg_price*self.state.position_size +older_margin*self.lever)/(self.state.position_size+volume)
-                    self.state.position_size = self.state.position_size+volume
-                    orders.append((older_price, volume, i+1,self.state.avg_price,self.state.position_size))     
-                    before_price=older_price
+            first, count = 0, self.buy_orders_count
         elif max_add_sequence < self.buy_orders_count:
-             #计算增加挂单的要素
-             if self.mode == 1:
-                older_price=before_price*(1-self.opp_ratio*self.price_multiple**max_add_sequence)
-                older_margin=self.first_margin_add*self.amount_multiplier**max_add_sequence
-                older_pos=older_margin*self.lever/(older_price*self.contract_size)
-                volume = self._round_to_size_tick(older_pos)
-                self.state.avg_price = (self.state.avg_price*self.state.position_size +older_margin*self.lever)/(self.state.position_size+volume)
-                self.state.position_size = self.state.position_size+volume
-                orders.append((older_price, volume, i+1,self.state.avg_price,self.state.position_size))     
-                before_price=older_price
-             elif self.mode == 2:
-                older_price=before_price*(1+self.opp_ratio*self.price_multiple**max_add_sequence)
-                older_margin=self.first_margin_add*self.amount_multiplier**max_add_sequence
-                older_pos=older_margin*self.lever/(older_price*self.contract_size)
-                volume = self._round_to_size_tick(older_pos)
-                self.state.avg_price = (self.state.avg_price*self.state.position_size +older_margin*self.lever)/(self.state.position_size+volume)
-                self.state.position_size = self.state.position_size+volume
-                orders.append((older_price, volume, i+1,self.state.avg_price,self.state.position_size))     
-                before_price=older_price
+            first, count = max_add_sequence, 1
         else:
-             return None # 不需要下单
-    
-        return orders
+            return () # 不需要下单
+        
+        state = self.state
+        last = first + count
+        prices, vols, avg_prices, total_vols = _calc_queue(
+            self.opp_sign, float(base_price), float(self.opp_ratio), self._price_factor_table[first:last],
+            float(self.first_margin_add), self._margin_factor_table[first:last], float(self.lever),
+            float(self.contract_size), self._min_size_f, self._inv_min_size, state.avg_price, state.position_size
+        )
+        
+        # 累计成本/仓位，均价 = cum_cost / cum_vol
+        state.avg_price = float(avg_prices[-1])
+        state.position_size = float(total_vols[-1])
+        
+        # 下单价格/数量直接给出对齐合约精度的Decimal
+        to_price = self.to_order_price
+        to_volume = self.to_order_volume
+        return tuple(
+            (to_price(price), to_volume(volume), add_sequence, avg_price, total_volume)
+            for price, volume, add_sequence, avg_price, total_volume in zip(
+                prices.tolist(), vols.tolist(), range(first + 1, last + 1), avg_prices.tolist(), total_vols.tolist())
+        )
     
     def calculate_sell_order_params(self,avg_price:float,total_volume:float, add_sequence:int) -> Optional[tuple]:
-        """计算卖单价格和数量，返回(price, volume)"""
+        """计算卖单价格和数量，返回(price, volume)，均为对齐合约精度的Decimal"""
         
         # 动态止盈比例
         profit_target = self._calculate_profit_target(add_sequence)
         
-        if self.mode == 1:  # 做多
-            price = avg_price * (1 + profit_target)
-        else:  # 做空
-            price = avg_price * (1 - profit_target)
-        
+        price = avg_price * (1 + self.profit_sign * profit_target)
         volume = self._round_to_size_tick(total_volume)
         
-        return price, volume
+        return self.to_order_price(price), self.to_order_volume(volume)
+    
+    def to_order_price(self, price: float) -> Decimal:
+        """价格按pricetick向下取整为Decimal (整数跳数 × pricetick，不经过字符串解析)"""
+        return self.price_tick * int(price * self._inv_price_tick + 1e-9)
+    
+    def to_order_volume(self, volume: float) -> Decimal:
+        """数量按最小下单单位取整为Decimal"""
+        return self.min_order_size * round(volume * self._inv_min_size)
     
     def get_health_status(self) -> dict:
         """获取策略健康状态"""
@@ -414,36 +817,29 @@ class SimpleMartinManager:
             'avg_price': self.state.avg_price,
             'add_count': self.state.add_count,
             'is_healthy': self._check_health(),
-            'last_update': self.state.last_update.isoformat()
+            'last_update': _fmt_ts(self.state.last_update_ns)
         }
     
     def reset_state(self) -> None:
         """重置策略状态"""
-        print(f"[{self.account_id}] {self.symbol} 重置马丁状态: 完成{self.state.add_count}次加仓")
+        _log(f"[{self.account_id}] {self.symbol} 重置马丁状态: 完成{self.state.add_count}次加仓")
         self.state.avg_price = 0.0
         self.state.position_size = 0.0
         self.state.add_count = 0
         self.state.total_margin_used = 0.0
         self.state.execution_mode = "normal"
-        self.state.last_update = datetime.now()
-    
-    def _calculate_profit_target(self) -> float:
-        """根据加仓次数计算止盈比例"""
-        if self.state.add_count <= 3:
-            return 0.01      # 1%
-        elif self.state.add_count <= 6:
-            return 0.012     # 1.2%
-        elif self.state.add_count <= 10:
-            return 0.015     # 1.5%
-        elif self.state.add_count <= 15:
-            return 0.02      # 2%
-        else:
-            return 0.025     # 2.5%
+        self.state.last_update_ns = time.monotonic_ns()
+    
+    def _calculate_profit_target(self, add_count: Optional[int] = None) -> float:
+        """根据加仓次数计算止盈比例 (默认取当前已加仓次数)"""
+        if add_count is None:
+            add_count = self.state.add_count
+        return _profit_target(int(add_count))
     
     def _check_health(self) -> bool:
         """检查策略健康状态"""
         # 检查更新时间
-        if (datetime.now() - self.state.last_update).total_seconds() > 600:  # 10分钟无更新
+        if time.monotonic_ns() - self.state.last_update_ns > 600_000_000_000:  # 10分钟无更新
             return False
         
         # 检查加仓次数
@@ -465,13 +861,101 @@ class SimpleMartinManager:
     
     def _round_to_size_tick(self, volume: float) -> float:
         """调整到合约最小单位"""
-        return max(float(self.min_order_size), round(volume / float(self.min_order_size)) * float(self.min_order_size))
+        return _round_volume(float(volume), self._min_size_f, self._inv_min_size)
     
     def get_state(self) -> MartinState:
         """获取策略状态"""
         return self.state
 
 
+# =============================================================================
+# 马丁状态缓存 - 可选Redis
+# =============================================================================
+
+class MartinStateCache:
+    """
+    马丁策略状态缓存
+    
+    每个策略一个hash: martin:{account_id}:{strategy_key}，字段state/orders/saved_at，
+    每次写入刷新TTL；热启动时直接读取，不必从交易所重建状态。
+    未安装redis或未配置地址时所有操作为空操作；单调时钟字段(last_update_ns)跨进程无意义，不写入缓存
+    """
+    
+    TTL = 24 * 3600         # 缓存过期时间(秒)
+    MAX_AGE = 600           # 热启动只采用10分钟内写入的缓存
+    
+    def __init__(self, account_id: str, url: Optional[str], log: logging.Logger):
+        self.account_id = account_id
+        self.prefix = f"martin:{account_id}:"
+        self.log = log
+        self.client = None
+        
+        if redis is None or not url:
+            return
+        try:
+            self.client = redis.Redis.from_url(url)
+        except Exception as e:
+            self.log.warning("⚠️ Redis状态缓存不可用: %s", e)
+    
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None
+    
+    def save(self, entries: Dict[StrategyKey, tuple]) -> None:
+        """批量写入 {strategy_key: (state, orders)}，一次pipeline提交"""
+        if not self.client or not entries:
+            return
+        
+        saved_at = time.time()
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for strategy_key, (state, orders) in entries.items():
+                state.pop('last_update_ns', None)
+                name = f"{self.prefix}{strategy_key}"
+                pipe.hset(name, mapping={
+                    'state': json.dumps(state),
+                    'orders': json.dumps(orders),
+                    'saved_at': saved_at
+                })
+                pipe.expire(name, self.TTL)
+            pipe.execute()
+        except Exception as e:
+            self.log.error("❌ 写入状态缓存失败: %s", e)
+    
+    def load_all(self) -> Dict[StrategyKey, dict]:
+        """读取本账户未过期的策略缓存 {strategy_key: {'state': dict, 'orders': dict}}"""
+        if not self.client:
+            return {}
+        
+        try:
+            names = list(self.client.scan_iter(match=self.prefix + "*"))
+            if not names:
+                return {}
+            
+            pipe = self.client.pipeline(transaction=False)
+            for name in names:
+                pipe.hgetall(name)
+            results = pipe.execute()
+        except Exception as e:
+            self.log.error("❌ 读取状态缓存失败: %s", e)
+            return {}
+        
+        cached = {}
+        now = time.time()
+        for name, fields in zip(names, results):
+            try:
+                if now - float(fields[b'saved_at']) > self.MAX_AGE:
+                    continue
+                strategy_key = StrategyKey.parse(name.decode()[len(self.prefix):])
+                cached[strategy_key] = {
+                    'state': json.loads(fields[b'state']),
+                    'orders': json.loads(fields[b'orders'])
+                }
+            except (KeyError, ValueError):
+                continue
+        return cached
+
+
 # =============================================================================
 # 单账户专用执行器 - 重构版本
 # =============================================================================
@@ -479,76 +963,152 @@ class SimpleMartinManager:
 class SingleAccountExecutor:
     """单账户执行器 - 简化架构，直接操作"""
     
+    HEALTH_STALE_NS = 600_000_000_000   # 健康检查: 10分钟无更新视为异常
+    
+    __slots__ = (
+        'config', 'account_id', 'main_engine', 'event_engine', 'log',
+        'order_manager', 'martin_managers', '_symbol_to_managers', '_contract_cache', '_pending_opens',
+        'active', 'supported_symbols',
+        'timer_interval', '_timer_ticks', '_hc_keys', '_hc_index', '_hc_arrays', 'stats',
+        'state_cache', '_cached_states', '_cache_dirty',
+        '_work_q', '_worker', '_io_pool',
+    )
+    
     def __init__(self, config: AccountConfig, main_engine: MainEngine, event_engine: EventEngine):
         self.config = config
         self.account_id = config.account_id
         self.main_engine = main_engine
         self.event_engine = event_engine
+        self.log = _get_executor_logger(self.account_id)
         
         # 组件初始化
         self.order_manager = MartinOrderManager(self.account_id)
-        self.martin_managers: Dict[str, SimpleMartinManager] = {}
+        self.martin_managers: Dict[StrategyKey, SimpleMartinManager] = {}
+        self._symbol_to_managers: Dict[str, List[Tuple[StrategyKey, SimpleMartinManager]]] = defaultdict(list)   # 交易对 -> [(strategy_key, 管理器)]
+        self._contract_cache: Dict[str, ContractData] = {}     # vt_symbol -> 合约信息 (策略创建时写入)
+        self._pending_opens: Dict[str, tuple] = {}             # 首次开仓单 vt_orderid -> (strategy_key, volume)，只在工作线程读写
         
         # 执行器状态
         self.active = False
-        self.supported_symbols: Set[str] = set(config.supported_symbols or [])
+        self.supported_symbols: FrozenSet[str] = frozenset(config.supported_symbols or ())   # 运行期间不变
         
-        # 定时器和统计
-        self.timer_thread: Optional[threading.Thread] = None
+        # 定时任务 (由事件引擎的EVENT_TIMER驱动，每秒一次) 和统计
         self.timer_interval = 10
+        self._timer_ticks = 0
+        
+        # 健康检查用的结构数组 (每个策略一个下标)，处理完一批订单/成交后同步
+        self._hc_keys: List[StrategyKey] = []
+        self._hc_index: Dict[StrategyKey, int] = {}
+        self._hc_arrays: Dict[str, np.ndarray] = {
+            'add_seq': np.zeros(0, np.int32),
+            'max_add': np.zeros(0, np.int32),
+            'last_update_ns': np.zeros(0, np.int64),
+        }
+        
+        # 统计 (last_activity为time.monotonic_ns，展示时用_fmt_ts转换)
         self.stats = {
             'total_orders': 0,
             'total_trades': 0,
             'start_time': datetime.now(),
-            'last_activity': datetime.now()
+            'last_activity': time.monotonic_ns()
         }
         
-        print(f"[{self.account_id}] 初始化单账户执行器: 支持{len(self.supported_symbols)}个交易对")
+        # 状态缓存 (可选Redis): start时读取，add_martin_strategy时采用
+        self.state_cache = MartinStateCache(self.account_id, config.redis_url, self.log)
+        self._cached_states: Dict[StrategyKey, dict] = {}
+        self._cache_dirty: Set[StrategyKey] = set()
+        
+        # 订单/成交事件交给本账户的工作线程: 事件引擎线程只入队，撤单/下单的网络等待不阻塞其他账户
+        self._work_q: "queue.Queue[Optional[object]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        
+        # 下单IO线程池 (所有账户共用): 多笔补单并行发送
+        self._io_pool = _IO_POOL
+        
+        self.log.info("初始化单账户执行器: 支持%s个交易对", len(self.supported_symbols))
     
     def start(self) -> None:
         """启动执行器"""
         if self.active:
-            print(f"[{self.account_id}] 执行器已经在运行中")
+            self.log.info("执行器已经在运行中")
             return
         
-        print(f"[{self.account_id}] 启动单账户执行器...")
+        self.log.info("启动单账户执行器...")
         
-        # 注册事件监听
-        self._register_events()
+        # 预编译价格计算 (numba)
+        warmup_jit()
+        
+        # 读取状态缓存 (热启动)
+        self._cached_states = self.state_cache.load_all()
+        if self._cached_states:
+            self.log.info("读取到%s个策略的状态缓存", len(self._cached_states))
         
-        # 启动定时器
-        self._start_timer()
+        # 启动工作线程，再注册事件监听 (含定时任务)
+        self._worker = threading.Thread(target=self._run_worker, name=f"martin-{self.account_id}", daemon=True)
+        self._worker.start()
+        self._timer_ticks = 0
+        self._register_events()
         
         self.active = True
-        print(f"[{self.account_id}] 单账户执行器启动成功！")
+        self.log.info("单账户执行器启动成功！")
     
     def stop(self) -> None:
         """停止执行器"""
         if not self.active:
             return
         
-        print(f"[{self.account_id}] 停止单账户执行器...")
-        
-        # 停止定时器
-        self._stop_timer()
+        self.log.info("停止单账户执行器...")
         
-        # 注销事件监听
+        # 注销事件监听 (含定时任务)，再等工作线程处理完已入队的事件
         self._unregister_events()
+        self._work_q.put(None)
+        if self._worker:
+            self._worker.join(timeout=5)
+            self._worker = None
         
         self.active = False
-        print(f"[{self.account_id}] 单账户执行器已停止")
+        self.log.info("单账户执行器已停止")
     
     def add_martin_strategy(self, symbol: str, mode: int, config: dict) -> bool:
         """添加马丁策略 - 直接启动"""
+        if not self._check_new_strategy(symbol, mode):
+            return False
+        
+        contract_info, current_price = self._prefetch_strategy(symbol, config)
+        return self._create_strategy(symbol, mode, config, contract_info, current_price)
+    
+    def add_martin_strategies(self, strategies: List[tuple]) -> Dict[StrategyKey, bool]:
+        """
+        批量添加马丁策略
+        
+        参数: [(symbol, mode, config), ...]
+        合约信息、价格和杠杆设置并行获取，之后依次创建并开仓；返回 {strategy_key: 是否成功}
+        """
+        results = {StrategyKey.make(symbol, mode): False for symbol, mode, _ in strategies}
+        pending = [item for item in strategies if self._check_new_strategy(item[0], item[1])]
+        if not pending:
+            return results
+        
+        prefetched = list(self._io_pool.map(lambda item: self._prefetch_strategy(item[0], item[2]), pending))
+        
+        for (symbol, mode, config), (contract_info, current_price) in zip(pending, prefetched):
+            results[StrategyKey.make(symbol, mode)] = self._create_strategy(symbol, mode, config, contract_info, current_price)
+        return results
+    
+    def _check_new_strategy(self, symbol: str, mode: int) -> bool:
+        """检查交易对是否支持、策略是否已存在"""
         if symbol not in self.supported_symbols:
-            print(f"[{self.account_id}] 错误: 交易对 {symbol} 不在支持列表中")
+            self.log.warning("错误: 交易对 %s 不在支持列表中", symbol)
             return False
 
-        strategy_key = f"{symbol}_M{mode}"
+        strategy_key = StrategyKey.make(symbol, mode)
         if strategy_key in self.martin_managers:
-            print(f"[{self.account_id}] 策略已存在: {strategy_key}")
+            self.log.info("策略已存在: %s", strategy_key)
             return False
-        
+        return True
+    
+    def _prefetch_strategy(self, symbol: str, config: dict) -> tuple:
+        """获取合约信息和当前价格并设置杠杆，返回(contract_info, current_price)"""
         try:
             # 获取合约信息和当前价格
             contract_info = self._get_contract_info(symbol)
@@ -562,10 +1122,19 @@ class SingleAccountExecutor:
                     margin_mode = config.get('margin_mode', 'cross')  # cross 或 isolated
                     self._set_contract_leverage(symbol, lever, margin_mode)
             
-            current_price = self._get_current_price(symbol)
-
+            return contract_info, self._get_current_price(symbol)
+        except Exception as e:
+            self.log.error("❌ 获取合约信息失败 %s: %s", symbol, e)
+            return None, None
+    
+    def _create_strategy(self, symbol: str, mode: int, config: dict,
+                         contract_info: Optional[ContractData], current_price: Optional[float]) -> bool:
+        """创建马丁管理器并启动策略"""
+        strategy_key = StrategyKey.make(symbol, mode)
+        
+        try:
             if not contract_info or not current_price:
-                print(f"[{self.account_id}] 错误: 无法获取合约信息或价格 {symbol}")
+                self.log.warning("错误: 无法获取合约信息或价格 %s", symbol)
                 return False
             
             # 创建马丁管理器
@@ -577,30 +1146,177 @@ class SingleAccountExecutor:
                 contract_info=contract_info
             )
             self.martin_managers[strategy_key] = martin_manager
+            self._symbol_to_managers[symbol].append((strategy_key, martin_manager))
+            self._contract_cache[contract_info.vt_symbol] = contract_info
             
-            # 🎯 直接执行首次开仓
-            self._execute_first_open_order(strategy_key)
+            # 有新鲜的缓存状态时直接恢复，否则🎯 首次开仓交给工作线程执行 (开仓单登记与订单事件同一线程)
+            if self._restore_cached_strategy(strategy_key, martin_manager):
+                self.log.info("已从状态缓存恢复: %s", strategy_key)
+            else:
+                self._work_q.put(partial(self._execute_first_open_order, strategy_key, current_price))
+            self._cache_dirty.add(strategy_key)
+            self._register_health(strategy_key, martin_manager)
+            self._flush_state_cache()
             
-            print(f"[{self.account_id}] ✅ 马丁策略启动成功: {strategy_key}")
+            self.log.info("✅ 马丁策略启动成功: %s", strategy_key)
             return True
             
         except Exception as e:
-            print(f"[{self.account_id}] ❌ 添加策略失败: {e}")
+            self.log.error("❌ 添加策略失败: %s", e)
             return False
 
     def on_order(self, event: Event) -> None:
-        """订单事件处理 - 直接操作"""
+        """订单事件处理 - 已结束的订单入队，合并处理"""
         order: OrderData = event.data
         
-        if order.status != Status.ALLTRADED:
+        # 被拒/撤销的订单也入队，由工作线程清理首次开仓单
+        if order.status != Status.ALLTRADED and order.is_active():
             return
         
+        # 不相关交易对的订单在入队前过滤，不再进入订单管理器查找
+        if order.vt_symbol not in self.supported_symbols:
+            return
+        
+        self._work_q.put(order)
+    
+    def on_trade(self, event: Event) -> None:
+        """成交事件处理 - 入队，合并更新仓位状态"""
+        trade: TradeData = event.data
+        
+        if trade.vt_symbol not in self.supported_symbols:
+            return
+        
+        self._work_q.put(trade)
+    
+    def _run_worker(self) -> None:
+        """工作线程: 取出积压的订单/成交事件和任务整批处理，收到None时退出"""
+        while True:
+            batch = [self._work_q.get()]
+            try:
+                while True:
+                    batch.append(self._work_q.get_nowait())
+            except queue.Empty:
+                pass
+            
+            stopping = None in batch
+            if stopping:
+                batch = [data for data in batch if data is not None]
+            
+            if batch:
+                try:
+                    self._process_batch(batch)
+                except Exception as e:
+                    self.log.error("❌ 处理事件批次失败: %s", e)
+            
+            if stopping:
+                return
+    
+    def _process_batch(self, batch: List[object]) -> None:
+        """
+        处理一批事件
+        
+        严格按到达顺序处理: 连续的成交按交易对汇总后一次更新仓位，
+        遇到订单或任务(如首次开仓)时先结算它之前的成交，再处理该订单/执行该任务
+        """
+        trades: Dict[str, List[TradeData]] = {}
+        trade_count = 0
+        order_count = 0
+        for data in batch:
+            if isinstance(data, TradeData):
+                trades.setdefault(data.vt_symbol, []).append(data)
+                trade_count += 1
+                continue
+            
+            if trades:
+                self._apply_trades(trades)
+                trades = {}
+            
+            if isinstance(data, OrderData):
+                order_count += 1
+                self._process_filled_order(data)
+            else:
+                try:
+                    data()
+                except Exception as e:
+                    self.log.error("❌ 执行任务失败: %s", e)
+        
+        if trades:
+            self._apply_trades(trades)
+        
+        stats = self.stats
+        stats['total_orders'] += order_count
+        stats['total_trades'] += trade_count
+        stats['last_activity'] = time.monotonic_ns()
+        
+        self._sync_health(self._cache_dirty)
+        self._flush_state_cache()
+    
+    def _restore_cached_strategy(self, strategy_key: StrategyKey, martin_manager: SimpleMartinManager) -> bool:
+        """用缓存的状态和活跃订单恢复策略，交易所已不活跃的订单丢弃"""
+        cached = self._cached_states.pop(strategy_key, None)
+        if not cached:
+            return False
+        
+        state = cached['state']
+        if state.get('position_size', 0) <= 0:
+            return False
+        
+        martin_manager.state.avg_price = state['avg_price']
+        martin_manager.state.position_size = state['position_size']
+        martin_manager.state.add_count = state['add_count']
+        martin_manager.state.total_margin_used = state['total_margin_used']
+        martin_manager.state.execution_mode = state['execution_mode']
+        martin_manager.state.last_update_ns = time.monotonic_ns()
+        
+        # 与本地订单数据核对 (未知订单保留，等待后续订单事件)
+        orders = cached['orders']
+        for side in ('buy', 'sell'):
+            kept = []
+            for row in orders.get(side, ()):
+                order = self.main_engine.get_order(row[0])
+                if order is None or order.is_active():
+                    kept.append(row)
+            orders[side] = kept
+        self.order_manager.import_strategy_orders(strategy_key, orders)
+        return True
+    
+    def _flush_state_cache(self) -> None:
+        """把本批次变化的策略状态写入缓存"""
+        if not self._cache_dirty:
+            return
+        
+        dirty = self._cache_dirty
+        self._cache_dirty = set()
+        if not self.state_cache.enabled:
+            return
+        
+        entries = {}
+        for strategy_key in dirty:
+            martin_manager = self.martin_managers.get(strategy_key)
+            if martin_manager:
+                entries[strategy_key] = (
+                    asdict(martin_manager.state),
+                    self.order_manager.export_strategy_orders(strategy_key)
+                )
+        self.state_cache.save(entries)
+    
+    def _process_filled_order(self, order: OrderData) -> None:
+        """处理完全成交的订单 - 直接操作"""
         try:
+            pending = self._pending_opens.pop(order.vt_orderid, None)
+            if pending:
+                self._on_first_open_done(order, *pending)
+                return
+            
+            if order.status != Status.ALLTRADED:
+                return
+            
             strategy_key = self.order_manager.get_order_strategy(order.vt_orderid)
             if not strategy_key or strategy_key not in self.martin_managers:
                 return
             
             martin_manager = self.martin_managers[strategy_key]
+            self._cache_dirty.add(strategy_key)
             #current_price = self._get_current_price(order.vt_symbol)
             
             #if not current_price:   
@@ -616,104 +1332,129 @@ class SingleAccountExecutor:
                 self._handle_sell_order_filled(strategy_key, order)
                 
         except Exception as e:
-            print(f"[{self.account_id}] ❌ 处理订单事件失败: {e}")
+            self.log.error("❌ 处理订单事件失败: %s", e)
     
-    def on_trade(self, event: Event) -> None:
-        """成交事件处理 - 更新仓位状态"""
-        trade: TradeData = event.data
-        
-        if trade.vt_symbol not in self.supported_symbols:
-            return
-        
-        try:
-            # 找到对应的马丁管理器
-            for strategy_key, martin_manager in self.martin_managers.items():
-                if martin_manager.symbol == trade.vt_symbol:
-                    # 🎯 直接更新仓位
+    def _apply_trades(self, trades: Dict[str, List[TradeData]]) -> None:
+        """按交易对批量更新仓位状态 {vt_symbol: [TradeData]}"""
+        for vt_symbol, symbol_trades in trades.items():
+            try:
+                # 找到对应的马丁管理器 (交易对索引，与原逻辑一致取该交易对的第一个策略)
+                managers = self._symbol_to_managers.get(vt_symbol)
+                if not managers:
+                    continue
+                strategy_key, martin_manager = managers[0]
+                self._cache_dirty.add(strategy_key)
+                
+                # 🎯 直接更新仓位: 连续的买入成交合并成一次更新，卖出按顺序逐笔处理
+                # 首次开仓单的成交不计入 (开仓数量已计入，完全成交时由_on_first_open_done设置)
+                pending_opens = self._pending_opens
+                buy_prices: List[float] = []
+                buy_volumes: List[float] = []
+                for trade in symbol_trades:
+                    if trade.vt_orderid in pending_opens:
+                        continue
                     if trade.direction == Direction.LONG:
-                        martin_manager.update_position_on_buy(float(trade.price), float(trade.volume))
+                        buy_prices.append(float(trade.price))
+                        buy_volumes.append(float(trade.volume))
                     elif trade.direction == Direction.SHORT:
+                        if buy_prices:
+                            martin_manager.update_position_on_buys(np.array(buy_prices), np.array(buy_volumes))
+                            buy_prices, buy_volumes = [], []
                         martin_manager.update_position_on_sell(float(trade.volume))
-                    break
-                    
-        except Exception as e:
-            print(f"[{self.account_id}] ❌ 处理成交事件失败: {e}")
+                if buy_prices:
+                    martin_manager.update_position_on_buys(np.array(buy_prices), np.array(buy_volumes))
+                
+            except Exception as e:
+                self.log.error("❌ 处理成交事件失败: %s", e)
     
     def on_position(self, event: Event) -> None:
         """仓位事件处理器"""
         position: PositionData = event.data
         if position.vt_symbol in self.supported_symbols:
-            print(f"[{self.account_id}] 📊 仓位更新: {position.vt_symbol} 数量={position.volume}")
+            self.log.info("📊 仓位更新: %s 数量=%s", position.vt_symbol, position.volume)
     
     # =============================================================================
     # 直接操作方法 - 无指令层
     # =============================================================================
     
-    def _execute_first_open_order(self, strategy_key: str) -> None:
-        """执行首次开仓 - 直接操作"""
+    def _execute_first_open_order(self, strategy_key: StrategyKey, current_price: Optional[float] = None) -> None:
+        """执行首次开仓 - 直接操作 (调用方已有价格时传入，避免重复查询)"""
         martin_manager = self.martin_managers[strategy_key]
-        direction = "LONG" if martin_manager.mode == 1 else "SHORT"
 
         # 计算开仓参数
-        current_price = self._get_current_price(martin_manager.symbol)
+        if current_price is None:
+            current_price = self._get_current_price(martin_manager.symbol)
         volume = martin_manager.calculate_first_order_params(current_price)
         # 直接发送市价开仓单
-        order_id = self._send_market_order(strategy_key, direction, volume, "OPEN")
-        #查询订单的成交价
-        order = self.main_engine.get_order(order_id)
-        if order:
-            price = order.price
-            #注册新买单
-            reference = self.order_manager.generate_order_reference(martin_manager.symbol, "OPEN", direction)
-            self.order_manager.register_strategy_buy_order(strategy_key, order_id, reference, price, price,volume, volume, 0)
-            self._setup_initial_orders(strategy_key,price,volume,direction)
-        else:
-            print(f"[{self.account_id}] ❌ 首次开仓失败: {strategy_key}")
+        order_direction = Direction.LONG if martin_manager.mode == 1 else Direction.SHORT
+        order_id = self._send_market_order(strategy_key, order_direction, volume, "OPEN")
+        if not order_id:
+            self.log.error("❌ 首次开仓失败: %s", strategy_key)
             return
+        
+        # 成交价以ALLTRADED订单事件为准，届时再挂买单队列和卖单
+        self._pending_opens[order_id] = (strategy_key, volume)
+    
+    def _on_first_open_done(self, order: OrderData, strategy_key: StrategyKey, volume: float) -> None:
+        """首次开仓单结束: 完全成交后按成交均价设置初始订单队列"""
+        if order.status != Status.ALLTRADED:
+            self.log.error("❌ 首次开仓失败: %s %s", strategy_key, order.status.value)
+            return
+        
+        martin_manager = self.martin_managers.get(strategy_key)
+        if not martin_manager:
+            return
+        
+        price = float(order.traded_price or order.price)
+        martin_manager.state.avg_price = price
+        martin_manager.state.position_size = volume
+        self._cache_dirty.add(strategy_key)
+        self._setup_initial_orders(strategy_key, price, volume)
 
-    def _setup_initial_orders(self, strategy_key: str, current_price: float,total_volume:float,direction:str) -> None:
-        """设置初始订单队列（买单+卖单）"""
+    def _setup_initial_orders(self, strategy_key: StrategyKey, current_price: float,total_volume:float) -> None:
+        """设置初始订单队列（买单+卖单），整个队列一次批量提交"""
         martin_manager = self.martin_managers[strategy_key]
         
-        # 1. 设置买单队列
+        # 1. 买单队列 + 卖单的委托请求 (队列方向与策略方向一致)
         buy_orders = martin_manager.calculate_buy_orders_queue(current_price, 0, 0)
-        buy_success_count = 0
+        ladder_direction = Direction.LONG if martin_manager.mode == 1 else Direction.SHORT
+        reqs = [
+            self._create_limit_request(strategy_key, ladder_direction, volume, price, f"BUY_L{add_sequence}")
+            for price, volume, add_sequence, avg_price, total_volume_after in buy_orders
+        ]
+        
+        sell_params = martin_manager.calculate_sell_order_params(current_price,total_volume,0)
+        if sell_params:
+            sell_price, sell_volume = sell_params
+            reqs.append(self._create_limit_request(strategy_key, Direction.SHORT, sell_volume, sell_price, "PROFIT"))
+        
+        # 2. 一次批量发送，再按顺序登记返回的订单号
+        order_ids = self._send_batch_orders(reqs)
         
-        for price, volume,add_sequence,avg_price,total_volume in buy_orders:
-            order_id = self._send_limit_order(strategy_key, direction, volume, price, f"BUY_L{add_sequence}")
+        buy_success_count = 0
+        for (price, volume, add_sequence, avg_price, total_volume_after), req, order_id in zip(buy_orders, reqs, order_ids):
             if order_id:
-                reference = self.order_manager.generate_order_reference(martin_manager.symbol, f"BUY_L{add_sequence}", direction)
-                self.order_manager.register_strategy_buy_order(strategy_key, order_id, reference, price, avg_price, volume, total_volume, add_sequence)
+                self.order_manager.register_strategy_buy_order(strategy_key, order_id, req.reference, price, avg_price, volume, total_volume_after, add_sequence)
                 buy_success_count += 1
         
-        print(f"[{self.account_id}] ✅ 设置买单队列: {strategy_key} 成功{buy_success_count}/{len(buy_orders)}个")
+        self.log.info("✅ 设置买单队列: %s 成功%s/%s个", strategy_key, buy_success_count, len(buy_orders))
         
-        # 2. 设置卖单
-        sell_params = martin_manager.calculate_sell_order_params(current_price,total_volume,0)
-        if sell_params:
-            sell_price, sell_volume = sell_params
-            sell_order_id = self._send_limit_order(strategy_key, Direction.SHORT, sell_volume, sell_price, "PROFIT")
-            if sell_order_id:
-                reference = self.order_manager.generate_order_reference(martin_manager.symbol, "PROFIT", direction)
-                self.order_manager.register_strategy_sell_order(strategy_key, sell_order_id, reference)
-                print(f"[{self.account_id}] ✅ 设置卖单: {strategy_key} 价格={sell_price:.6f} 数量={sell_volume:.6f}")
+        if sell_params and order_ids[-1]:
+            self.order_manager.register_strategy_sell_order(strategy_key, order_ids[-1], reqs[-1].reference)
+            self.log.info("✅ 设置卖单: %s 价格=%.6f 数量=%.6f", strategy_key, sell_price, sell_volume)
     
-    def _handle_buy_order_filled(self, strategy_key: str, order: OrderData) -> None:
+    def _handle_buy_order_filled(self, strategy_key: StrategyKey, order: OrderData) -> None:
         """处理买单成交 - 直接操作"""
         martin_manager = self.martin_managers[strategy_key]
-        
-        # 获取策略方向
-        direction = "LONG" if martin_manager.mode == 1 else "SHORT"
 
-         # 标记买单成交
+        # 标记买单成交
         result = self.order_manager.mark_buy_order_filled(order.vt_orderid, strategy_key)
         if not result:
-            print(f"[{self.account_id}] 警告: 买单成交记录失败 {order.vt_orderid}")
+            self.log.warning("警告: 买单成交记录失败 %s", order.vt_orderid)
             return
         
-        print(f"[{self.account_id}] 买单成交: {strategy_key}  price{buy_info.price} 第{buy_info.add_sequence}次")
-
         buy_info, max_add_sequence = result
+        self.log.info("买单成交: %s 价格=%s 第%s次", strategy_key, buy_info.price, buy_info.add_sequence)
         
         # 如果挂单列表最大加仓次数小于最大加仓次数，则补充挂单
         if max_add_sequence < martin_manager.max_add_count:
@@ -722,149 +1463,147 @@ class SingleAccountExecutor:
             
             success_count = 0
             if buy_orders:
-                for price, volume, add_sequence,avg_price,total_volume in buy_orders:
-                    action = f"BUY_L{add_sequence}"
-                    order_id = self._send_limit_order(strategy_key, Direction.LONG, volume, price, action)   #等修改完逻辑 再修改交易所接口
+                # 补充买单一次批量提交，再按顺序注册
+                reqs = [
+                    self._create_limit_request(strategy_key, Direction.LONG, volume, price, f"BUY_L{add_sequence}")
+                    for price, volume, add_sequence, avg_price, total_volume in buy_orders
+                ]
+                order_ids = self._send_batch_orders(reqs)
+                for (price, volume, add_sequence,avg_price,total_volume), req, order_id in zip(buy_orders, reqs, order_ids):
                     if order_id:
                         # 注册买单
-                        reference = self.order_manager.generate_order_reference(martin_manager.symbol, action, direction)
-                        self.order_manager.register_strategy_buy_order(strategy_key, order_id, reference, price, volume, total_volume, add_sequence)
+                        self.order_manager.register_strategy_buy_order(strategy_key, order_id, req.reference, price, avg_price, volume, total_volume, add_sequence)
                         success_count += 1
-                print(f"[{self.account_id}] ✅ 补充买单: {strategy_key} 成功{success_count}/{len(buy_orders)}个")
+                self.log.info("✅ 补充买单: %s 成功%s/%s个", strategy_key, success_count, len(buy_orders))
 
 
         # 🎯 直接取消现有卖单
-        sell_order_ids = self.order_manager.get_strategy_sell_orders(strategy_key)
-        for sell_order_id in sell_order_ids:
-            result=self._cancel_order(sell_order_id)
-            if result:
-                print(f"[{self.account_id}] ✅ 取消卖单: {sell_order_id} 成功")
-                #注销卖单
-                self.order_manager.unregister_strategy_sell_order(strategy_key, sell_order_id)
-            else:
-                print(f"[{self.account_id}] ❌ 取消卖单失败: {sell_order_id}")
+        sell_order_ids = self.order_manager.pop_strategy_sell_orders(strategy_key)
+        if sell_order_ids:
+            self._cancel_orders_batch(list(sell_order_ids))
            
         # 🎯 直接生成新卖单
         sell_order_result = martin_manager.calculate_sell_order_params(buy_info.avg_price,buy_info.total_volume,buy_info.add_sequence)
         if sell_order_result:
             sell_price, sell_volume = sell_order_result
-            sell_order_id = self._send_limit_order(strategy_key, Direction.SHORT, sell_volume, sell_price, "PROFIT")
+            sell_req = self._create_limit_request(strategy_key, Direction.SHORT, sell_volume, sell_price, "PROFIT")
+            sell_order_id = self._send_order(sell_req)
             if sell_order_id:
-                reference = self.order_manager.generate_order_reference(martin_manager.symbol, "PROFIT", direction)
-                self.order_manager.register_strategy_sell_order(strategy_key, sell_order_id, reference)
-                print(f"[{self.account_id}] ✅ 新卖单: {strategy_key} 价格={sell_price:.6f} 数量={sell_volume:.6f}")
+                self.order_manager.register_strategy_sell_order(strategy_key, sell_order_id, sell_req.reference)
+                self.log.info("✅ 新卖单: %s 价格=%.6f 数量=%.6f", strategy_key, sell_price, sell_volume)
         
+        # 成交视图用完，回收到对象池
+        self.order_manager.release_buy_info(buy_info)
        
-    def _handle_sell_order_filled(self, strategy_key: str, order: OrderData, current_price: float) -> None:
+    def _handle_sell_order_filled(self, strategy_key: StrategyKey, order: OrderData) -> None:
         """处理卖单成交 - 直接操作"""
         martin_manager = self.martin_managers[strategy_key]
         
         # 标记卖单成交
         result = self.order_manager.mark_sell_order_filled(order.vt_orderid)
         if not result:
-            print(f"[{self.account_id}] 警告: 卖单成交记录失败 {order.vt_orderid}")
+            self.log.warning("警告: 卖单成交记录失败 %s", order.vt_orderid)
             return
         
-        print(f"[{self.account_id}] 卖单成交: {strategy_key}")
+        self.log.info("卖单成交: %s", strategy_key)
+        
+        # 新周期要用的价格在撤单期间并行获取
+        price_future = self._io_pool.submit(self._get_current_price, martin_manager.symbol)
         
         # 完全平仓 - 直接取消所有买单并重置
         buy_order_ids, sell_order_ids = self.order_manager.clear_strategy_orders(strategy_key)
-        for buy_order_id in buy_order_ids:
-            self._cancel_order(buy_order_id)
-        for sell_order_id in sell_order_ids:
-            self._cancel_order(sell_order_id)
+        self._cancel_orders_batch([*buy_order_ids, *sell_order_ids])
             
         martin_manager.reset_state()
-        print(f"[{self.account_id}] ✅ 马丁周期完成: {strategy_key} 开始新周期")
+        self.log.info("✅ 马丁周期完成: %s 开始新周期", strategy_key)
             
         # 直接开始新周期
-        self._execute_first_open_order(strategy_key, current_price)
-     
-    '''
-    def _refill_buy_orders(self, strategy_key: str, current_price: float, count: int) -> None:
-        """补充买单 - 直接操作"""
-        martin_manager = self.martin_managers[strategy_key]
-        
-        # 获取策略方向
-        direction = "LONG" if martin_manager.mode == 1 else "SHORT"
-        
-        # 计算需要补充的买单
-        buy_orders = martin_manager.calculate_buy_orders_queue(current_price, 0, 0)
-        refill_orders = buy_orders[:count]  # 只取需要的数量
-        
-        success_count = 0
-        for price, volume, level in refill_orders:
-            order_id = self._send_limit_order(strategy_key, Direction.LONG, volume, price, f"REFILL_L{level}")
-            if order_id:
-                # 注册买单
-                reference = self.order_manager.generate_order_reference(martin_manager.symbol, f"REFILL_L{level}", direction)
-                self.order_manager.register_strategy_buy_order(strategy_key, order_id, reference, price, volume, level)
-                success_count += 1
-        
-        print(f"[{self.account_id}] ✅ 补充买单: {strategy_key} 成功{success_count}/{count}个")
-    '''
-    def _send_market_order(self, strategy_key: str, direction: Direction, volume: float, action: str) -> Optional[str]:
+        self._execute_first_open_order(strategy_key, price_future.result())
+    
+    def _send_market_order(self, strategy_key: StrategyKey, direction: Direction, volume: float, action: str) -> Optional[str]:
         """发送市价单"""
         martin_manager = self.martin_managers[strategy_key]
         
-        # 获取策略方向
-        strategy_direction = "LONG" if martin_manager.mode == 1 else "SHORT"
-        
         order_req = OrderRequest(
             symbol=martin_manager.symbol,
             exchange=Exchange.OKX,
             direction=direction,
             type=OrderType.MARKET,
-            volume=Decimal(str(volume)),
-            reference=self.order_manager.generate_order_reference(martin_manager.symbol, action, strategy_direction)
+            volume=martin_manager.to_order_volume(volume),
+            reference=self.order_manager.generate_order_reference(martin_manager.ref_prefix, action)
         )
         
         return self._send_order(order_req)
     
-    def _send_limit_order(self, strategy_key: str, direction: Direction, volume: float, price: float, action: str) -> Optional[str]:
+    def _send_limit_order(self, strategy_key: StrategyKey, direction: Direction, volume: Decimal, price: Decimal, action: str) -> Optional[str]:
         """发送限价单"""
+        return self._send_order(self._create_limit_request(strategy_key, direction, volume, price, action))
+    
+    def _create_limit_request(self, strategy_key: StrategyKey, direction: Direction, volume: Decimal, price: Decimal, action: str) -> OrderRequest:
+        """构造限价单请求 (price/volume已按合约精度对齐)"""
         martin_manager = self.martin_managers[strategy_key]
         
-        # 获取策略方向
-        strategy_direction = "LONG" if martin_manager.mode == 1 else "SHORT"
-        
-        order_req = OrderRequest(
+        return OrderRequest(
             symbol=martin_manager.symbol,
             exchange=Exchange.OKX,
             direction=direction,
             type=OrderType.LIMIT,
-            volume=Decimal(str(volume)),
-            price=Decimal(str(price)),
-            reference=self.order_manager.generate_order_reference(martin_manager.symbol, action, strategy_direction)
+            volume=volume,
+            price=price,
+            reference=self.order_manager.generate_order_reference(martin_manager.ref_prefix, action)
         )
-        
-        return self._send_order(order_req)
     
     def _send_order(self, order_req: OrderRequest) -> Optional[str]:
         """发送订单到交易所"""
         try:
-            # 构造完整的交易对名称
-            full_symbol = f"{order_req.symbol}.{order_req.exchange.value}"
-            contract = self.main_engine.get_contract(full_symbol)
+            contract = self._get_order_contract(order_req.vt_symbol)
             
             if not contract:
-                print(f"[{self.account_id}] ❌ 无法获取合约信息: {full_symbol}")
+                self.log.error("❌ 无法获取合约信息: %s", order_req.vt_symbol)
                 return None
             
             vt_orderid = self.main_engine.send_order(order_req, contract.gateway_name)
             
             if vt_orderid:
                 direction_text = "买入" if order_req.direction == Direction.LONG else "卖出"
-                print(f"[{self.account_id}] ✅ 发送订单: {direction_text} 价格={order_req.price} 数量={order_req.volume}")
+                self.log.info("✅ 发送订单: %s 价格=%s 数量=%s", direction_text, order_req.price, order_req.volume)
                 return vt_orderid
             else:
-                print(f"[{self.account_id}] ❌ 发送订单失败")
+                self.log.error("❌ 发送订单失败")
                 return None
                 
         except Exception as e:
-            print(f"[{self.account_id}] ❌ 发送订单异常: {e}")
+            self.log.error("❌ 发送订单异常: %s", e)
             return None
     
+    def _send_batch_orders(self, reqs: List[OrderRequest]) -> List[Optional[str]]:
+        """
+        批量发送订单，按网关分组后每组调用一次main_engine.send_orders
+        
+        OKX网关按batch-orders每个请求最多提交20笔；返回与reqs一一对应的订单号，失败为None
+        """
+        order_ids: List[Optional[str]] = [None] * len(reqs)
+        groups: Dict[str, List[int]] = {}
+        for i, req in enumerate(reqs):
+            contract = self._get_order_contract(req.vt_symbol)
+            if not contract:
+                self.log.error("❌ 无法获取合约信息: %s", req.vt_symbol)
+                continue
+            groups.setdefault(contract.gateway_name, []).append(i)
+        
+        for gateway_name, indexes in groups.items():
+            try:
+                vt_orderids = self.main_engine.send_orders([reqs[i] for i in indexes], gateway_name)
+            except Exception as e:
+                self.log.error("❌ 批量发送订单异常: %s", e)
+                continue
+            for i, vt_orderid in zip(indexes, vt_orderids):
+                order_ids[i] = vt_orderid or None
+        
+        sent = len(reqs) - order_ids.count(None)
+        self.log.info("✅ 批量发送订单: 成功%s/%s个", sent, len(reqs))
+        return order_ids
+    
     def _cancel_order(self, order_id: str) -> bool:
         """取消订单"""
         try:
@@ -872,12 +1611,36 @@ class SingleAccountExecutor:
             if order and order.is_active():
                 cancel_req = order.create_cancel_request()
                 self.main_engine.cancel_order(cancel_req, order.gateway_name)
-                print(f"[{self.account_id}] ✅ 撤销订单: {order_id}")
+                self.log.info("✅ 撤销订单: %s", order_id)
                 return True
         except Exception as e:
-            print(f"[{self.account_id}] ❌ 撤销订单失败 {order_id}: {e}")
+            self.log.error("❌ 撤销订单失败 %s: %s", order_id, e)
         return False
     
+    def _cancel_orders_batch(self, order_ids: List[str]) -> List[bool]:
+        """
+        批量撤单，按网关分组后每组调用一次main_engine.cancel_orders
+        
+        返回与order_ids一一对应的结果: 已发出撤单请求为True，订单不存在或已不活跃为False
+        """
+        results = [False] * len(order_ids)
+        groups: Dict[str, List[Tuple[int, CancelRequest]]] = {}
+        for i, order_id in enumerate(order_ids):
+            order = self.main_engine.get_order(order_id)
+            if order and order.is_active():
+                groups.setdefault(order.gateway_name, []).append((i, order.create_cancel_request()))
+        
+        for gateway_name, items in groups.items():
+            try:
+                self.main_engine.cancel_orders([req for _, req in items], gateway_name)
+            except Exception as e:
+                self.log.error("❌ 批量撤销订单失败: %s", e)
+                continue
+            for i, _ in items:
+                results[i] = True
+            self.log.info("✅ 批量撤销订单: %s个", len(items))
+        return results
+    
     # 其他辅助方法
     def _get_current_price(self, symbol: str) -> Optional[float]:
         """获取当前价格"""
@@ -889,6 +1652,15 @@ class SingleAccountExecutor:
             pass
         return None
     
+    def _get_order_contract(self, vt_symbol: str) -> Optional[ContractData]:
+        """下单用合约信息: 先查本地缓存，未命中再查主引擎"""
+        contract = self._contract_cache.get(vt_symbol)
+        if contract is None:
+            contract = self.main_engine.get_contract(vt_symbol)
+            if contract:
+                self._contract_cache[vt_symbol] = contract
+        return contract
+    
     def _get_contract_info(self, symbol: str) -> Optional[ContractData]:
         """获取合约信息"""
         try:
@@ -902,7 +1674,8 @@ class SingleAccountExecutor:
         self.event_engine.register(EVENT_ORDER, self.on_order)
         self.event_engine.register(EVENT_TRADE, self.on_trade)
         self.event_engine.register(EVENT_POSITION, self.on_position)
-        print(f"[{self.account_id}] 事件监听已注册")
+        self.event_engine.register(EVENT_TIMER, self._on_timer)
+        self.log.info("事件监听已注册")
     
     def _unregister_events(self) -> None:
         """注销事件监听"""
@@ -910,50 +1683,58 @@ class SingleAccountExecutor:
             self.event_engine.unregister(EVENT_ORDER, self.on_order)
             self.event_engine.unregister(EVENT_TRADE, self.on_trade)
             self.event_engine.unregister(EVENT_POSITION, self.on_position)
-            print(f"[{self.account_id}] 事件监听已注销")
+            self.event_engine.unregister(EVENT_TIMER, self._on_timer)
+            self.log.info("事件监听已注销")
         except Exception as e:
-            print(f"[{self.account_id}] 注销事件监听失败: {e}")
+            self.log.warning("注销事件监听失败: %s", e)
     
-    def _start_timer(self) -> None:
-        """启动定时任务"""
-        if self.timer_thread and self.timer_thread.is_alive():
+    def _on_timer(self, event: Event) -> None:
+        """定时任务: 每timer_interval个EVENT_TIMER执行一次健康检查"""
+        if not self.active:
             return
         
-        self.timer_thread = threading.Thread(target=self._timer_loop, daemon=True)
-        self.timer_thread.start()
-        print(f"[{self.account_id}] 定时器已启动 (间隔: {self.timer_interval}秒)")
+        self._timer_ticks += 1
+        if self._timer_ticks < self.timer_interval:
+            return
+        
+        self._timer_ticks = 0
+        self._health_check()
     
-    def _stop_timer(self) -> None:
-        """停止定时任务"""
-        if self.timer_thread and self.timer_thread.is_alive():
-            self.timer_thread.join(timeout=5)
-        print(f"[{self.account_id}] 定时器已停止")
+    def _register_health(self, strategy_key: StrategyKey, martin_manager: SimpleMartinManager) -> None:
+        """为新策略分配健康检查数组下标 (只在创建策略时扩容)"""
+        if strategy_key not in self._hc_index:
+            self._hc_index[strategy_key] = len(self._hc_keys)
+            self._hc_keys.append(strategy_key)
+            arrays = self._hc_arrays
+            for name in arrays:
+                arrays[name] = np.append(arrays[name], 0)
+            arrays['max_add'][-1] = martin_manager.max_add_count
+        self._sync_health((strategy_key,))
     
-    def _timer_loop(self) -> None:
-        """定时任务循环"""
-        while self.active:
-            try:
-                # 健康检查
-                self._health_check()
-                
-                # 等待下一次执行
-                time.sleep(self.timer_interval)
-                
-            except Exception as e:
-                print(f"[{self.account_id}] ❌ 定时任务异常: {e}")
-                time.sleep(5)
+    def _sync_health(self, strategy_keys: Iterable[StrategyKey]) -> None:
+        """把策略的加仓次数/更新时间写入健康检查数组"""
+        arrays = self._hc_arrays
+        for strategy_key in strategy_keys:
+            index = self._hc_index.get(strategy_key)
+            if index is not None:
+                state = self.martin_managers[strategy_key].state
+                arrays['add_seq'][index] = state.add_count
+                arrays['last_update_ns'][index] = state.last_update_ns
     
     def _health_check(self) -> None:
-        """健康检查"""
+        """健康检查: 一次向量比较得出所有策略的状态，只输出异常的策略"""
         try:
-            for strategy_key, martin_manager in self.martin_managers.items():
-                health_status = martin_manager.get_health_status()
-                
-                if not health_status['is_healthy']:
-                    print(f"[{self.account_id}] ⚠️ 策略健康检查异常: {strategy_key}")
+            if not self._hc_keys:
+                return
+            
+            arrays = self._hc_arrays
+            unhealthy = ((time.monotonic_ns() - arrays['last_update_ns'] > self.HEALTH_STALE_NS)
+                         | (arrays['add_seq'] >= arrays['max_add']))
+            for index in np.flatnonzero(unhealthy):
+                self.log.warning("⚠️ 策略健康检查异常: %s", self._hc_keys[index])
                 
         except Exception as e:
-            print(f"[{self.account_id}] ❌ 健康检查失败: {e}")
+            self.log.error("❌ 健康检查失败: %s", e)
 
     def _set_contract_leverage(self, symbol: str, lever: int, margin_mode: str) -> None:
         """设置合约杠杆倍数"""
@@ -961,83 +1742,12 @@ class SingleAccountExecutor:
             # 获取网关实例
             gateway = self.main_engine.get_gateway(self.config.gateway_name)
             if not gateway or not hasattr(gateway, 'set_leverage'):
-                print(f"[{self.account_id}] 警告: 网关不支持杠杆设置")
+                self.log.warning("警告: 网关不支持杠杆设置")
                 return
             
             # 设置杠杆
             gateway.set_leverage(symbol, lever, margin_mode)
-            print(f"[{self.account_id}] ✅ 设置杠杆: {symbol} {lever}倍 {margin_mode}模式")
+            self.log.info("✅ 设置杠杆: %s %s倍 %s模式", symbol, lever, margin_mode)
             
         except Exception as e:
-            print(f"[{self.account_id}] ❌ 设置杠杆失败: {e}")
-
-
-# =============================================================================
-# 使用示例
-# =============================================================================
-
-if __name__ == "__main__":
-    """
-    单账户执行器使用示例
-    """
-    from howtrader.event import EventEngine
-    from howtrader.trader.engine import MainEngine
-    
-    # 创建引擎
-    event_engine = EventEngine()
-    main_engine = MainEngine(event_engine)
-    
-    # 账户配置
-    account_config = AccountConfig(
-        account_id="TEST_ACCOUNT_001",
-        api_key="your_api_key",
-        api_secret="your_api_secret", 
-        api_passphrase="your_passphrase",
-        gateway_name="OKX",
-        test_mode=True,
-        supported_symbols=["BTC-USDT-SWAP.OKX", "ETH-USDT-SWAP.OKX"]
-    )
-    
-    # 马丁策略配置
-   
-    martin_config={
-    'opp_ratio': 0.0025,
-    'profit_target': 0.0055,
-    'lever': 10,
-    'initial_margin':100000,
-    'adding_number': 25,
-    'amount_multiplie': 1.13,
-    'price_multiple': 1.10,
-    'mode': 1
-     }
-    
-    try:
-        print("🚀 启动买单队列马丁策略测试")
-        
-        # 创建执行器
-        executor = SingleAccountExecutor(account_config, main_engine, event_engine)
-        
-        # 启动执行器
-        executor.start()
-        
-        # 添加BTC做多策略
-        if executor.add_martin_strategy("BTC-USDT-SWAP.OKX", 1, martin_config):
-            print("✅ BTC做多马丁策略添加成功")
-        
-        print("\n🔄 执行器运行中...")
-        print("按 Ctrl+C 停止")
-        
-        # 主循环
-        while True:
-            time.sleep(30)
-        
-    except KeyboardInterrupt:
-        print("\n🛑 收到停止信号...")
-        
-    except Exception as e:
-        print(f"❌ 运行异常: {e}")
-        
-    finally:
-        if 'executor' in locals():
-            executor.stop()
-        print("🏁 执行器已停止")
\ No newline at end of file
+            self.log.error("❌ 设置杠杆失败: %s", e)
@@ -9,18 +9,26 @@
 向真实的OKX交易所请求PEPE-USDT-SWAP等合约数据
 """
 
-import time
 import sys
-from typing import Optional, List
+import threading
+from collections import defaultdict
+from typing import Optional, List, Tuple
 from decimal import Decimal
 
+import numpy as np
+
 # HowTrader imports
-from howtrader.event import EventEngine
+from howtrader.event import EventEngine, Event
 from howtrader.trader.engine import MainEngine
+from howtrader.trader.event import EVENT_CONTRACT
 from howtrader.trader.object import ContractData
 from howtrader.trader.constant import Exchange, Product
 from howtrader.gateway.okx import OkxGateway
 
+# 收到该数量的合约推送即认为合约数据已就绪
+CONTRACT_READY_COUNT = 50
+CONTRACT_WAIT_TIMEOUT = 20
+
 class RealContractTester:
     """真实合约信息测试器"""
     
@@ -31,6 +39,14 @@ class RealContractTester:
         self.gateway_name = "OKX"
         self.connected = False
         
+        # 连接时绑定一次的引擎查询方法
+        self.get_contract = None
+        self.get_all_contracts = None
+        
+        # 合约缓存: 每个合约的大写symbol只计算一次，后续查询复用
+        self._contracts: List[ContractData] = []
+        self._upper: List[Tuple[str, ContractData]] = []
+        
         print(f"📋 Event Engine: {type(self.event_engine)}")
         print(f"📋 Main Engine: {type(self.main_engine)}")
     
@@ -43,6 +59,13 @@ class RealContractTester:
             gateway = self.main_engine.add_gateway(OkxGateway, self.gateway_name)
             print(f"✅ 网关添加成功: {type(gateway)}")
             
+            # 绑定合约查询方法 (只探测一次，缺失时直接报错，而不是每次调用时再getattr)
+            self.get_contract = getattr(self.main_engine, 'get_contract', None)
+            self.get_all_contracts = getattr(self.main_engine, 'get_all_contracts', None)
+            if not self.get_contract or not self.get_all_contracts:
+                raise RuntimeError("main_engine 缺少 get_contract / get_all_contracts 方法")
+            print(f"✅ get_contract 方法已可用: {type(self.get_contract)}")
+            
             # 配置连接参数 (公开数据不需要API密钥)
             setting = {
                 "key": "",                    # 空字符串表示只获取公开数据
@@ -56,29 +79,32 @@ class RealContractTester:
             print(f"📋 连接配置: {setting}")
             print(f"🔗 开始连接到 {self.gateway_name}...")
             
-            # 连接到交易所
-            self.main_engine.connect(setting, self.gateway_name)
+            # 监听合约推送，达到数量后唤醒等待线程 (代替每秒轮询)
+            ready = threading.Event()
+            counter = [0]
             
-            # 等待连接和数据加载
-            print("⏳ 等待合约数据加载...")
-            for i in range(20):  # 等待最多20秒
-                time.sleep(1)
-                
-                # 检查get_contract方法是否可用
-                get_contract_func = getattr(self.main_engine, 'get_contract', None)
-                if get_contract_func:
-                    print(f"✅ get_contract 方法已可用: {type(get_contract_func)}")
-                    
-                    # 检查是否有合约数据
-                    get_all_contracts = getattr(self.main_engine, 'get_all_contracts', None)
-                    if get_all_contracts:
-                        contracts = get_all_contracts()
-                        if contracts and len(contracts) > 0:
-                            self.connected = True
-                            print(f"🎉 连接成功！获取到 {len(contracts)} 个合约")
-                            return True
+            def on_contract(event: Event) -> None:
+                counter[0] += 1
+                if counter[0] >= CONTRACT_READY_COUNT:
+                    ready.set()
+            
+            self.event_engine.register(EVENT_CONTRACT, on_contract)
+            try:
+                # 连接到交易所
+                self.main_engine.connect(setting, self.gateway_name)
                 
-                print(f"   等待中... ({i+1}/20)")
+                # 等待合约数据加载
+                print("⏳ 等待合约数据加载...")
+                ready.wait(timeout=CONTRACT_WAIT_TIMEOUT)
+            finally:
+                self.event_engine.unregister(EVENT_CONTRACT, on_contract)
+            
+            # 检查是否有合约数据
+            self._refresh_contracts()
+            if self._contracts:
+                self.connected = True
+                print(f"🎉 连接成功！获取到 {len(self._contracts)} 个合约")
+                return True
             
             print("❌ 连接超时 - 未能获取到合约数据")
             return False
@@ -89,20 +115,28 @@ class RealContractTester:
             traceback.print_exc()
             return False
     
+    def _refresh_contracts(self) -> None:
+        """
+        增量刷新合约缓存
+        
+        连接时只等到部分合约推送就返回，之后合约仍会陆续到达；
+        引擎按推送顺序保存合约，新合约都在末尾，只为新增部分计算大写symbol
+        """
+        contracts = self.get_all_contracts()
+        new_contracts = contracts[len(self._contracts):]
+        if new_contracts:
+            self._contracts.extend(new_contracts)
+            self._upper.extend((c.symbol.upper(), c) for c in new_contracts)
+    
     def test_get_contract_method(self) -> None:
         """测试 get_contract 方法"""
         print(f"\n🔬 测试 main_engine.get_contract 方法")
         print("=" * 50)
         
-        # 1. 测试 getattr 方法
-        get_contract_func = getattr(self.main_engine, 'get_contract', None)
-        print(f"1️⃣ getattr 结果: {get_contract_func}")
-        print(f"   类型: {type(get_contract_func)}")
-        print(f"   是否可调用: {callable(get_contract_func)}")
-        
-        if not get_contract_func:
-            print("❌ get_contract 方法不存在")
-            return
+        # 1. 连接时绑定的方法
+        print(f"1️⃣ 绑定结果: {self.get_contract}")
+        print(f"   类型: {type(self.get_contract)}")
+        print(f"   是否可调用: {callable(self.get_contract)}")
         
         # 2. 测试具体合约查询
         test_symbols = [
@@ -116,7 +150,7 @@ class RealContractTester:
         for symbol in test_symbols:
             print(f"\n🔍 查询: {symbol}")
             try:
-                contract = get_contract_func(symbol)
+                contract = self.get_contract(symbol)
                 if contract:
                     self.print_contract_info(contract)
                 else:
@@ -157,18 +191,9 @@ class RealContractTester:
     
     def find_similar_contracts(self, search_term: str) -> None:
         """查找相似合约"""
-        get_all_contracts = getattr(self.main_engine, 'get_all_contracts', None)
-        if not get_all_contracts:
-            print("   ❌ get_all_contracts 方法不可用")
-            return
-        
-        all_contracts = get_all_contracts()
+        self._refresh_contracts()
         search_upper = search_term.upper()
-        
-        similar = []
-        for contract in all_contracts:
-            if search_upper in contract.symbol.upper():
-                similar.append(contract)
+        similar = [c for s, c in self._upper if search_upper in s]
         
         if similar:
             print(f"   🔎 找到 {len(similar)} 个相似合约:")
@@ -188,58 +213,54 @@ class RealContractTester:
         print(f"📋 模拟马丁管理器加载合约: {symbol}")
         
         try:
-            # 1. 获取get_contract方法 (这是我们在SimpleMartinManager中使用的方式)
-            get_contract = getattr(self.main_engine, 'get_contract', None)
-            print(f"1️⃣ getattr 获取方法: {'成功' if get_contract else '失败'}")
+            # 1. 使用连接时绑定的get_contract方法 (SimpleMartinManager中同样只取一次)
+            print(f"1️⃣ 绑定方法: {'成功' if self.get_contract else '失败'}")
+            
+            # 2. 获取合约信息
+            contract = self.get_contract(symbol)
+            print(f"2️⃣ 获取合约信息: {'成功' if contract else '失败'}")
             
-            if get_contract:
-                # 2. 获取合约信息
-                contract = get_contract(symbol)
-                print(f"2️⃣ 获取合约信息: {'成功' if contract else '失败'}")
+            if contract:
+                # 3. 提取马丁策略需要的关键信息
+                price_tick = contract.pricetick
+                contract_size = contract.size
                 
-                if contract:
-                    # 3. 提取马丁策略需要的关键信息
-                    price_tick = contract.pricetick
-                    contract_size = contract.size
-                    
-                    # 根据交易所获取最小下单单位
-                    if contract.exchange == Exchange.OKX:
-                        min_size = getattr(contract, 'min_size', None)
-                        if min_size and min_size > 0:
-                            min_order_size = min_size
-                        else:
-                            min_order_size = contract.min_volume
+                # 根据交易所获取最小下单单位
+                if contract.exchange == Exchange.OKX:
+                    min_size = getattr(contract, 'min_size', None)
+                    if min_size and min_size > 0:
+                        min_order_size = min_size
                     else:
                         min_order_size = contract.min_volume
-                    
-                    print(f"3️⃣ 提取关键信息:")
-                    print(f"   📏 价格精度: {price_tick}")
-                    print(f"   ⚖️  合约乘数: {contract_size}")
-                    print(f"   🎯 最小下单单位: {min_order_size}")
-                    
-                    # 4. 测试订单数量调整
-                    test_volume = 123.456789
-                    min_size_float = float(min_order_size)
-                    adjusted_volume = max(min_size_float, round(test_volume / min_size_float) * min_size_float)
-                    
-                    print(f"4️⃣ 订单调整测试:")
-                    print(f"   原始数量: {test_volume}")
-                    print(f"   调整后数量: {adjusted_volume}")
-                    
-                    # 5. 测试价格调整
-                    test_price = 0.00001234567
-                    price_tick_float = float(price_tick)
-                    adjusted_price = round(test_price / price_tick_float) * price_tick_float
-                    
-                    print(f"5️⃣ 价格调整测试:")
-                    print(f"   原始价格: {test_price}")
-                    print(f"   调整后价格: {adjusted_price}")
-                    
                 else:
-                    print("❌ 无法获取合约信息")
-            else:
-                print("❌ 无法获取 get_contract 方法")
+                    min_order_size = contract.min_volume
+                
+                print(f"3️⃣ 提取关键信息:")
+                print(f"   📏 价格精度: {price_tick}")
+                print(f"   ⚖️  合约乘数: {contract_size}")
+                print(f"   🎯 最小下单单位: {min_order_size}")
+                
+                # 4. 测试订单数量调整 (按数组整体取整，与马丁管理器多档挂单批量计算的方式一致)
+                test_volumes = np.array([123.456789, 0.5, 2468.91357, 98765.4321], dtype=np.float64)
+                min_size_float = float(min_order_size)
+                adjusted_volumes = np.maximum(min_size_float, np.round(test_volumes / min_size_float) * min_size_float)
+                
+                print(f"4️⃣ 订单调整测试:")
+                for test_volume, adjusted_volume in zip(test_volumes, adjusted_volumes):
+                    print(f"   原始数量: {test_volume} -> 调整后数量: {adjusted_volume}")
                 
+                # 5. 测试价格调整
+                test_prices = np.array([0.00001234567, 0.00001198765, 0.00001112233], dtype=np.float64)
+                price_tick_float = float(price_tick)
+                adjusted_prices = np.round(test_prices / price_tick_float) * price_tick_float
+                
+                print(f"5️⃣ 价格调整测试:")
+                for test_price, adjusted_price in zip(test_prices, adjusted_prices):
+                    print(f"   原始价格: {test_price} -> 调整后价格: {adjusted_price}")
+                
+            else:
+                print("❌ 无法获取合约信息")
+
         except Exception as e:
             print(f"❌ 测试过程出错: {e}")
             import traceback
@@ -250,45 +271,44 @@ class RealContractTester:
         print(f"\n📋 列出所有可用合约")
         print("=" * 50)
         
-        get_all_contracts = getattr(self.main_engine, 'get_all_contracts', None)
-        if not get_all_contracts:
-            print("❌ get_all_contracts 方法不可用")
-            return
-        
-        all_contracts = get_all_contracts()
+        self._refresh_contracts()
+        all_contracts = self._contracts
         print(f"总共获取到 {len(all_contracts)} 个合约")
         
-        # 按产品类型分组
-        futures_contracts = []
-        spot_contracts = []
-        other_contracts = []
+        # 单次遍历: 同时完成产品分组、PEPE筛选和热门合约采样
+        popular_symbols = ["BTC", "ETH", "DOGE", "SHIB", "PEPE"]
+        buckets = defaultdict(list)
+        pepe_contracts = []
+        popular = {}
         
-        for contract in all_contracts:
-            if contract.product == Product.FUTURES:
-                futures_contracts.append(contract)
-            elif contract.product == Product.SPOT:
-                spot_contracts.append(contract)
-            else:
-                other_contracts.append(contract)
+        for sym_upper, contract in self._upper:
+            buckets[contract.product].append(contract)
+            if "PEPE" in sym_upper:
+                pepe_contracts.append(contract)
+            if "SWAP" in sym_upper:
+                for symbol_part in popular_symbols:
+                    if symbol_part in sym_upper:
+                        popular.setdefault(symbol_part, contract)  # 取第一个
+        
+        futures_count = len(buckets.get(Product.FUTURES, ()))
+        spot_count = len(buckets.get(Product.SPOT, ()))
+        other_count = len(all_contracts) - futures_count - spot_count
         
         print(f"\n📊 合约分类:")
-        print(f"   🔮 期货合约: {len(futures_contracts)} 个")
-        print(f"   💰 现货合约: {len(spot_contracts)} 个")
-        print(f"   🎯 其他合约: {len(other_contracts)} 个")
+        print(f"   🔮 期货合约: {futures_count} 个")
+        print(f"   💰 现货合约: {spot_count} 个")
+        print(f"   🎯 其他合约: {other_count} 个")
         
         # 显示PEPE相关合约
-        pepe_contracts = [c for c in all_contracts if "PEPE" in c.symbol.upper()]
         print(f"\n🐸 PEPE相关合约 ({len(pepe_contracts)} 个):")
         for contract in pepe_contracts:
             print(f"   {contract.vt_symbol} ({contract.product.value})")
         
         # 显示部分热门合约
-        popular_symbols = ["BTC", "ETH", "DOGE", "SHIB", "PEPE"]
         print(f"\n🔥 热门合约样本:")
         for symbol_part in popular_symbols:
-            matches = [c for c in all_contracts if symbol_part in c.symbol.upper() and "SWAP" in c.symbol]
-            if matches:
-                contract = matches[0]  # 取第一个
+            contract = popular.get(symbol_part)
+            if contract:
                 print(f"   {contract.vt_symbol}: size={contract.size}, tick={contract.pricetick}")
     
     def disconnect(self) -> None:
@@ -7,9 +7,11 @@
 """
 
 import time
-from howtrader.event import EventEngine
+import threading
+from howtrader.event import EventEngine, Event
 from howtrader.trader.setting import SETTINGS
 from howtrader.trader.engine import MainEngine
+from howtrader.trader.event import EVENT_POSITION, EVENT_TRADE
 from howtrader.gateway.okx import OkxGateway
 from howtrader.app.cta_strategy import CtaStrategyApp
 
@@ -21,6 +23,9 @@ SETTINGS["log.active"] = True
 SETTINGS["log.console"] = True
 SETTINGS["log.file"] = True
 
+# 状态打印最小间隔(秒)，短时间内多次仓位推送合并为一次打印
+STATUS_MIN_INTERVAL = 10
+
 # OKX API 配置
 OKX_SETTING = {
     "key": "50fe3b78-1019-433d-9f64-675e47a7daaa",
@@ -90,21 +95,59 @@ def main():
     strategy.on_start()
     print(f"▶️  启动策略完成")
     
+    # 状态显示: 成交/持仓推送时置脏标记，打印线程只在有变化时打印
+    dirty = threading.Event()
+    stop_event = threading.Event()
+    dirty.set()     # 启动后先打印一次
+    
+    def on_position(event: Event) -> None:
+        if event.data.vt_symbol == vt_symbol:
+            dirty.set()
+    
+    def print_status_loop() -> None:
+        next_print = time.monotonic()
+        last_status = None
+        while True:
+            dirty.wait()
+            if stop_event.is_set():
+                return
+            
+            # 距上次打印不足最小间隔时，等到间隔结束再合并打印
+            delay = next_print - time.monotonic()
+            if delay > 0 and stop_event.wait(delay):
+                return
+            dirty.clear()
+            
+            status = (float(strategy.pos), strategy.avg_price, strategy.current_increase_pos_count)
+            if status == last_status:
+                continue
+            last_status = status
+            next_print = time.monotonic() + STATUS_MIN_INTERVAL
+            
+            print(f"⏰ {time.strftime('%H:%M:%S')} | 仓位: {status[0]:.6f} | "
+                  f"平均价: {status[1]:.6f} | 加仓次数: {status[2]}")
+    
+    event_engine.register(EVENT_TRADE, on_position)
+    event_engine.register(EVENT_POSITION, on_position)
+    threading.Thread(target=print_status_loop, name="StatusPrinter", daemon=True).start()
+    
     try:
         print("\n🎯 策略运行中，按 Ctrl+C 退出...")
         print("💡 可以通过日志文件查看策略运行状态")
         
-        while True:
-            time.sleep(10)
-            
-            # 简单状态显示
-            current_pos = float(strategy.pos)
-            print(f"⏰ {time.strftime('%H:%M:%S')} | 仓位: {current_pos:.6f} | "
-                  f"平均价: {strategy.avg_price:.6f} | 加仓次数: {strategy.current_increase_pos_count}")
+        # 主线程阻塞等待退出 (带超时等待，Windows下Ctrl+C也能中断)
+        while not stop_event.wait(1):
+            pass
                     
     except KeyboardInterrupt:
         print("\n🛑 接收到退出信号...")
         
+        # 停止状态打印线程，注销事件监听
+        stop_event.set()
+        dirty.set()
+        event_engine.unregister(EVENT_TRADE, on_position)
+        event_engine.unregister(EVENT_POSITION, on_position)
+        
         # 停止策略
         strategy.on_stop()
         print("🛑 策略已停止")
@@ -6,23 +6,72 @@
 将数据库中的1分钟K线数据合成为4小时K线数据，用于回测
 """
 
+import os
 import sqlite3
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from itertools import repeat
 from pathlib import Path
 import numpy as np
 
+# dbbardata写入列顺序 (与INSERT_BAR_SQL一致)
+BAR_COLUMNS = [
+    'symbol', 'exchange', 'datetime', 'interval', 'open_price', 'high_price',
+    'low_price', 'close_price', 'volume', 'open_interest', 'turnover'
+]
+
+# 数据库中datetime的存储格式；读取时按固定格式解析，不逐行推断格式
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+PARSE_DATES = {'datetime': {'format': DATETIME_FORMAT}}
+
+# 4小时区间长度(纳秒)，区间按Unix时间对齐 (即每天0/4/8/12/16/20点)
+BUCKET_NS = 4 * 3600 * 1_000_000_000
+
+INSERT_BAR_SQL = """
+    INSERT OR REPLACE INTO dbbardata 
+    (symbol, exchange, datetime, interval, open_price, high_price, 
+     low_price, close_price, volume, open_interest, turnover)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
 class TimeframeConverter:
     """时间周期转换器"""
     
-    def __init__(self, db_path: str = "howtrader/database.db"):
+    def __init__(self, db_path: str = "howtrader/database.db", use_float32: bool = False):
+        """
+        use_float32: 1分钟OHLCV在内存中按float32处理，内存和聚合带宽减半；
+                     float32只有约7位有效数字，价格位数多的交易对写回的4小时价格会有误差，默认关闭
+        """
         self.db_path = db_path
         self.conn = None
+        self._insert_cursor = None  # 复用的4小时K线写入游标
+        self.use_float32 = use_float32
+        self.bulk_mode = False      # 处于bulk_transaction中时，save_4h_data不单独提交
         
     def connect_db(self):
         """连接数据库"""
         try:
             self.conn = sqlite3.connect(self.db_path)
+            
+            # 批量读写设置: WAL日志、降低fsync频率、临时表放内存、256MB页缓存
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA temp_store=MEMORY")
+            self.conn.execute("PRAGMA cache_size=-262144")
+            self.conn.execute("PRAGMA busy_timeout=30000")      # 多进程转换时等待其他进程的写锁
+            self.conn.execute("PRAGMA cache_spill=OFF")         # 大批量写入时不在事务中途把脏页刷出
+            
+            # (symbol, exchange, interval, datetime) 已有DbBarData的唯一索引，按交易对加载/排序直接走索引；
+            # 另建只含1m数据的部分索引，供批量转换查询有1m数据的交易对
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_1m ON dbbardata(symbol, exchange, datetime) WHERE interval = '1m'"
+            )
+            
+            # 所有交易对共用一个写入游标，INSERT语句只预编译一次
+            self._insert_cursor = self.conn.cursor()
+            
             print(f"✅ 已连接数据库: {self.db_path}")
             return True
         except Exception as e:
@@ -32,9 +81,30 @@ class TimeframeConverter:
     def close_db(self):
         """关闭数据库连接"""
         if self.conn:
+            self._insert_cursor = None
             self.conn.close()
             print("🔒 数据库连接已关闭")
     
+    @contextmanager
+    def bulk_transaction(self):
+        """
+        批量写入事务: 期间所有save_4h_data共用一个事务，结束时一次提交，出错整体回滚
+        
+        批量转换不需要逐个交易对持久化，事务期间关闭同步 (synchronous=OFF)，结束后恢复NORMAL
+        """
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("BEGIN")
+        self.bulk_mode = True
+        try:
+            yield
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        finally:
+            self.bulk_mode = False
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+    
     def get_available_symbols(self):
         """获取可用的交易对和时间周期"""
         if not self.conn:
@@ -57,51 +127,104 @@ class TimeframeConverter:
         
         return df
     
-    def load_minute_data(self, symbol: str, exchange: str = "OKX"):
-        """加载1分钟数据"""
+    def get_last_4h(self, symbol: str, exchange: str = "OKX"):
+        """获取已保存的最后一根4小时K线的开始时间，没有时返回None"""
         if not self.conn:
             self.connect_db()
-            
+        
+        row = self.conn.execute(
+            "SELECT MAX(datetime) FROM dbbardata WHERE symbol = ? AND exchange = ? AND interval = '4h'",
+            (symbol, exchange)
+        ).fetchone()
+        if not row or row[0] is None:
+            return None
+        return pd.Timestamp(row[0])
+    
+    def _minute_query(self, symbol: str, exchange: str, since: datetime = None):
+        """1分钟数据查询语句和参数 (since: 只查询该时间及之后的数据)"""
         query = """
         SELECT datetime, open_price, high_price, low_price, close_price, volume
         FROM dbbardata 
         WHERE symbol = ? AND exchange = ? AND interval = '1m'
-        ORDER BY datetime ASC
         """
+        params = [symbol, exchange]
+        if since is not None:
+            query += " AND datetime >= ?"
+            params.append(since.strftime(DATETIME_FORMAT))
+        query += " ORDER BY datetime ASC"
+        return query, params
+    
+    def _prepare_minute_df(self, df: pd.DataFrame) -> pd.DataFrame:
+        """时间列设为索引 (datetime已在读取时解析；use_float32时OHLCV降为float32)"""
+        df.set_index('datetime', inplace=True)
+        if self.use_float32:
+            df = df.astype(np.float32, copy=False)
+        return df
+    
+    def load_minute_data(self, symbol: str, exchange: str = "OKX", since: datetime = None):
+        """加载1分钟数据 (since: 只加载该时间及之后的数据)"""
+        if not self.conn:
+            self.connect_db()
         
-        df = pd.read_sql_query(query, self.conn, params=[symbol, exchange])
+        query, params = self._minute_query(symbol, exchange, since)
+        df = pd.read_sql_query(query, self.conn, params=params, parse_dates=PARSE_DATES)
         
         if df.empty:
             print(f"⚠️  未找到 {symbol} 的1分钟数据")
             return None
             
-        # 转换时间格式
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        df.set_index('datetime', inplace=True)
+        df = self._prepare_minute_df(df)
         
         print(f"✅ 加载 {symbol} 1分钟数据: {len(df):,} 根K线")
         print(f"   时间范围: {df.index[0]} ~ {df.index[-1]}")
         
         return df
     
-    def convert_to_4h(self, df: pd.DataFrame):
-        """将1分钟数据转换为4小时数据"""
+    def iter_minute_chunks(self, symbol: str, exchange: str = "OKX", since: datetime = None,
+                           chunksize: int = 500_000):
+        """按块读取1分钟数据，内存占用只与chunksize有关"""
+        if not self.conn:
+            self.connect_db()
+        
+        query, params = self._minute_query(symbol, exchange, since)
+        for df in pd.read_sql_query(
+            query, self.conn, params=params, parse_dates=PARSE_DATES, chunksize=chunksize
+        ):
+            if not df.empty:
+                yield self._prepare_minute_df(df)
+    
+    def convert_to_4h(self, df: pd.DataFrame, since: datetime = None):
+        """将1分钟数据转换为4小时数据 (since: 丢弃该时间之前的K线)"""
         if df is None or df.empty:
             return None
             
         print("🔄 开始转换为4小时K线...")
         
-        # 使用pandas resample进行重采样
-        df_4h = df.resample('4H', label='left', closed='left').agg({
-            'open_price': 'first',
-            'high_price': 'max', 
-            'low_price': 'min',
-            'close_price': 'last',
-            'volume': 'sum'
-        }).dropna()
+        # 数据已按时间排序: 相邻行区间号变化处即为每个4小时区间的起点，
+        # 用reduceat按区间整段聚合，等价于resample('4H', label='left', closed='left')去掉空区间
+        vals = df[['open_price', 'high_price', 'low_price', 'close_price', 'volume']].to_numpy()
+        # pandas 2 的索引可能是us/ms精度，先统一为纳秒再分桶
+        ns = df.index.values.astype('datetime64[ns]', copy=False).view(np.int64)
+        bucket = ns // BUCKET_NS
+        starts = np.flatnonzero(np.diff(bucket, prepend=bucket[0] - 1))
+        ends = np.r_[starts[1:] - 1, len(vals) - 1]
+        
+        df_4h = pd.DataFrame(
+            {
+                'open_price': vals[starts, 0],
+                'high_price': np.maximum.reduceat(vals[:, 1], starts),
+                'low_price': np.minimum.reduceat(vals[:, 2], starts),
+                'close_price': vals[ends, 3],
+                'volume': np.add.reduceat(vals[:, 4], starts)
+            },
+            index=pd.DatetimeIndex(pd.to_datetime(bucket[starts] * BUCKET_NS), name='datetime')
+        ).dropna()
         
-        # 重命名列以匹配数据库格式
-        df_4h.columns = ['open_price', 'high_price', 'low_price', 'close_price', 'volume']
+        if since is not None:
+            df_4h = df_4h[df_4h.index >= since]
+            if df_4h.empty:
+                print("✅ 没有新的4小时K线")
+                return None
         
         print(f"✅ 转换完成: {len(df_4h):,} 根4小时K线")
         print(f"   时间范围: {df_4h.index[0]} ~ {df_4h.index[-1]}")
@@ -116,74 +239,96 @@ class TimeframeConverter:
             
         print("💾 保存4小时数据到数据库...")
         
-        # 准备插入数据
-        insert_data = []
-        for dt, row in df_4h.iterrows():
-            # 确保dt是datetime对象并格式化
-            if hasattr(dt, 'strftime'):
-                dt_str = dt.strftime('%Y-%m-%d %H:%M:%S')
-            else:
-                dt_str = str(dt)
-            insert_data.append((
-                symbol,
-                exchange,
-                dt_str,
-                '4h',
-                row['open_price'],
-                row['high_price'], 
-                row['low_price'],
-                row['close_price'],
-                row['volume'],
-                0,  # open_interest
-                0   # turnover
-            ))
+        # 准备插入数据: 整列赋值常量、整列格式化时间，不逐行遍历
+        index = df_4h.index
+        if isinstance(index, pd.DatetimeIndex):
+            dt_str = index.strftime(DATETIME_FORMAT)
+        else:
+            dt_str = index.astype(str)
+        out = df_4h.assign(
+            symbol=symbol,
+            exchange=exchange,
+            datetime=dt_str,
+            interval='4h',
+            open_interest=0.0,
+            turnover=0.0
+        )[BAR_COLUMNS]
         
         try:
-            # 使用INSERT OR REPLACE避免重复
+            # 使用INSERT OR REPLACE避免重复 (to_sql只能追加，重复K线会违反唯一索引)
             if self.conn is None:
                 print("❌ 数据库连接为空")
                 return False
-                
-            cursor = self.conn.cursor()
-            cursor.executemany("""
-                INSERT OR REPLACE INTO dbbardata 
-                (symbol, exchange, datetime, interval, open_price, high_price, 
-                 low_price, close_price, volume, open_interest, turnover)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, insert_data)
             
-            self.conn.commit()
-            print(f"✅ 成功保存 {len(insert_data):,} 根4小时K线")
+            rows = out.itertuples(index=False, name=None)
+            if self.bulk_mode:
+                # 由外层bulk_transaction统一提交
+                self._insert_cursor.executemany(INSERT_BAR_SQL, rows)
+            else:
+                # 单个事务内批量写入
+                with self.conn:
+                    self._insert_cursor.executemany(INSERT_BAR_SQL, rows)
+            print(f"✅ 成功保存 {len(out):,} 根4小时K线")
             return True
             
         except Exception as e:
             print(f"❌ 保存失败: {e}")
             return False
     
-    def convert_symbol_to_4h(self, symbol: str, exchange: str = "OKX"):
-        """转换指定交易对为4小时数据"""
+    def convert_symbol_to_4h(self, symbol: str, exchange: str = "OKX", full: bool = False):
+        """
+        转换指定交易对为4小时数据
+        
+        默认增量转换: 从已保存的最后一根4小时K线开始重新合成 (该K线上次可能未走完)，
+        之前的K线不再加载；full=True时全量重建
+        
+        返回写入的4小时K线数量，没有数据或保存失败时返回None
+        """
         print(f"\n🔄 开始处理 {symbol}...")
         
-        # 1. 加载1分钟数据
-        df_1m = self.load_minute_data(symbol, exchange)
-        if df_1m is None:
-            return False
+        since = None if full else self.get_last_4h(symbol, exchange)
+        if since is not None:
+            print(f"   增量转换: 从 {since} 开始")
+        
+        # 按块加载1分钟数据、转换并立即保存；每块最后一个4小时区间可能延续到下一块，留到下一块一起合成
+        carry = None
+        saved = 0
+        for chunk in self.iter_minute_chunks(symbol, exchange, since):
+            if carry is not None:
+                chunk = pd.concat([carry, chunk])
             
-        # 2. 转换为4小时
-        df_4h = self.convert_to_4h(df_1m)
-        if df_4h is None:
-            return False
+            last_bucket = chunk.index[-1].floor('4H')
+            carry = chunk[chunk.index >= last_bucket]
             
-        # 3. 保存到数据库
-        success = self.save_4h_data(symbol, df_4h, exchange)
+            df_4h = self.convert_to_4h(chunk[chunk.index < last_bucket], since)
+            if df_4h is not None:
+                if not self.save_4h_data(symbol, df_4h, exchange):
+                    return None
+                saved += len(df_4h)
+        
+        if carry is None:
+            print(f"⚠️  未找到 {symbol} 的1分钟数据")
+            return None
         
-        if success:
-            print(f"🎉 {symbol} 4小时数据转换完成！")
+        df_4h = self.convert_to_4h(carry, since)
+        if df_4h is not None:
+            if not self.save_4h_data(symbol, df_4h, exchange):
+                return None
+            saved += len(df_4h)
         
-        return success
+        print(f"🎉 {symbol} 4小时数据转换完成！共 {saved:,} 根")
+        return saved
     
-    def batch_convert_all_1m_data(self):
-        """批量转换所有1分钟数据为4小时"""
+    def batch_convert_all_1m_data(self, max_workers: int = None):
+        """
+        批量转换所有1分钟数据为4小时
+        
+        各交易对互不相关，按交易对分给多个进程并行转换 (每个进程独立的数据库连接)；
+        max_workers默认取CPU核数，为1时在当前进程逐个转换，所有交易对在一个bulk_transaction内写入；
+        并行时各进程仍按块提交，避免长事务占住写锁让其他进程等待超时
+        
+        返回 {symbol: 写入的4小时K线数量}，只包含转换成功的交易对
+        """
         print("🚀 批量转换所有1分钟数据为4小时K线")
         print("=" * 60)
         
@@ -202,19 +347,42 @@ class TimeframeConverter:
         
         if df_symbols.empty:
             print("⚠️  未找到1分钟数据")
-            return
+            return {}
             
         print(f"📊 找到 {len(df_symbols)} 个交易对的1分钟数据:")
         for _, row in df_symbols.iterrows():
             print(f"   • {row['symbol']} ({row['exchange']})")
         
-        # 逐个转换
-        success_count = 0
-        for _, row in df_symbols.iterrows():
-            if self.convert_symbol_to_4h(row['symbol'], row['exchange']):
-                success_count += 1
+        symbols = df_symbols['symbol'].tolist()
+        exchanges = df_symbols['exchange'].tolist()
+        workers = min(len(symbols), max_workers or os.cpu_count() or 1)
+        
+        if workers <= 1:
+            # 逐个转换，整批一次提交
+            with self.bulk_transaction():
+                results = [
+                    self.convert_symbol_to_4h(symbol, exchange) for symbol, exchange in zip(symbols, exchanges)
+                ]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    _convert_symbol_worker, repeat(self.db_path), symbols, exchanges, repeat(self.use_float32)
+                ))
+        written = {symbol: count for symbol, count in zip(symbols, results) if count is not None}
                 
-        print(f"\n🎉 批量转换完成！成功: {success_count}/{len(df_symbols)}")
+        print(f"\n🎉 批量转换完成！成功: {len(written)}/{len(df_symbols)}")
+        return written
+
+def _convert_symbol_worker(db_path: str, symbol: str, exchange: str, use_float32: bool):
+    """进程池任务: 使用本进程自己的数据库连接转换一个交易对"""
+    converter = TimeframeConverter(db_path, use_float32)
+    try:
+        if not converter.connect_db():
+            return None
+        return converter.convert_symbol_to_4h(symbol, exchange)
+    finally:
+        converter.close_db()
+
 
 def main():
     """主函数"""
@@ -232,12 +400,13 @@ def main():
         converter.get_available_symbols()
         
         # 批量转换所有1分钟数据
-        converter.batch_convert_all_1m_data()
+        written = converter.batch_convert_all_1m_data()
         
-        # 最后再次显示数据概览
+        # 显示本次写入结果 (不再重新对全表做汇总查询)
         print("\n" + "=" * 50)
-        print("📊 转换后数据概览:")
-        converter.get_available_symbols()
+        print("📊 本次写入的4小时K线:")
+        for symbol, count in written.items():
+            print(f"📈 {symbol} (4h) - {count:,} 根K线")
         
     finally:
         converter.close_db()